@@ -59,6 +59,9 @@ setup(
         'xjson.xjson': ['*.json'],
     },
     test_suite='tests',
+    entry_points={
+        'console_scripts': ['xjson = xjson.cli:main']
+    },
     cmdclass={
         'update_version': Version
     }
@@ -9,7 +9,12 @@
 
 import unittest
 
-from . import test_xjson, test_namespaces
+from . import test_xjson, test_namespaces, test_cli, test_limits, \
+    test_plans, test_split, test_columns, test_hashcons, \
+    test_incremental, test_binary, test_digest, \
+    test_harvest, test_jsonld, test_converter, test_startup, \
+    test_service, test_index, test_spatial, test_merge, \
+    test_shared_registry, test_registry, test_preview, test_decorator
 
 if __name__ == '__main__':
     unittest.main()
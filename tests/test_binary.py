@@ -0,0 +1,102 @@
+""" file:   test_binary.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the binary serialization format
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson import binary
+from xjson.binary import BinaryFormatError, LazyDict, encode, decode
+from xjson.cli import render
+from xjson.gml import members
+from xjson.spatial import query
+
+from unittest import mock
+import os
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+class TestBinary(unittest.TestCase):
+
+    """ Tests for to_bytes and from_bytes
+    """
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def test_roundtrip(self):
+        """ Check that documents survive a roundtrip in every namespace mode
+        """
+        for handling in ('none', 'remove', 'shorten', 'identify'):
+            xjson = XJson.from_xml(self.xml, namespace_handling=handling)
+            result = XJson.from_bytes(xjson.to_bytes())
+            self.assertIsInstance(result.body, dict)
+            self.assertEqual(result.body, xjson.body)
+            self.assertEqual(dict(result.context.items()),
+                             dict(xjson.context.items()))
+            self.assertEqual(result.context.namespace_handling, handling)
+            self.assertEqual(dict(result.context.mapping.items()),
+                             dict(xjson.context.mapping.items()))
+            self.assertEqual(str(result), str(xjson))
+
+    def test_scalars(self):
+        """ Check that non-string values survive a roundtrip
+        """
+        body = {'a': [1, -300, 2.5, True, False, None], 'b': {}, 'c': u'é'}
+        self.assertEqual(decode(encode(body, ident='doc'))[::2],
+                         (body, 'doc'))
+        with self.assertRaises(ValueError):
+            encode({'a': 'nul\x00'})
+
+    def test_lazy(self):
+        """ Check that lazy decoding gives the same document
+        """
+        xjson = XJson.from_xml(self.xml)
+        lazy = XJson.from_bytes(xjson.to_bytes(), lazy=True)
+        self.assertIsInstance(lazy.body, LazyDict)
+        self.assertEqual(lazy.body, xjson.body)
+        members = lazy.body['wfs:FeatureCollection']['gml:featureMember']
+        self.assertEqual(len(members), 2)
+        feature = members[-1]['geosciml:MappedFeature']
+        self.assertEqual(feature['gml:name'], 'Second')
+        self.assertEqual(lazy.body.materialize(), xjson.body)
+        self.assertEqual(str(lazy), str(xjson))
+        with self.assertRaises(TypeError):
+            lazy.body['foo'] = 'bar'
+
+    def test_helpers_after_roundtrip(self):
+        """ Check that decoded documents work with the other helpers
+        """
+        xjson = XJson.from_xml(self.xml)
+        restored = XJson.from_bytes(xjson.to_bytes())
+        merged = XJson.merge([restored, restored])
+        root, = merged.body.values()
+        self.assertEqual(len(members(root)), 4)
+        self.assertEqual(len(query(restored, (9, 19, 12, 22))), 2)
+        for fmt in ('json', 'jsonl', 'yaml'):
+            self.assertEqual(render(restored, fmt), render(xjson, fmt))
+
+    def test_too_large(self):
+        """ Check that containers which overflow the length are rejected
+        """
+        with mock.patch.object(binary, '_MAX_LENGTH', 16):
+            self.assertEqual(decode(encode({'a': ['b']}))[0], {'a': ['b']})
+            with self.assertRaises(ValueError):
+                encode({'a': ['b'] * 20})
+
+    def test_bad_data(self):
+        """ Check that things which aren't binary documents are rejected
+        """
+        with self.assertRaises(BinaryFormatError):
+            XJson.from_bytes(b'{"not": "binary"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+""" file:   test_cli.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the command line interface
+"""
+
+from __future__ import print_function, division
+
+from xjson import cli
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+class TestCLI(unittest.TestCase):
+
+    """ Tests for bulk conversion from the command line
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.indir = os.path.join(self.tmpdir, 'in')
+        os.makedirs(os.path.join(self.indir, 'sub'))
+        shutil.copy(SAMPLE, os.path.join(self.indir, 'a.xml'))
+        shutil.copy(SAMPLE, os.path.join(self.indir, 'sub', 'b.xml'))
+        self.outdir = os.path.join(self.tmpdir, 'out')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_mirror_layout(self):
+        """ Check that directory trees are mirrored in the output
+        """
+        status = cli.main([self.indir, '-o', self.outdir, '-q', '-j', '2'])
+        self.assertEqual(status, 0)
+        for path in ('a.json', os.path.join('sub', 'b.json')):
+            with open(os.path.join(self.outdir, path)) as fhandle:
+                result = json.load(fhandle)
+            self.assertIn('@context', result)
+            self.assertIn('wfs:FeatureCollection', result)
+
+    def test_jsonl_flat(self):
+        """ Check JSONL output with a flat layout
+        """
+        status = cli.main([os.path.join(self.indir, '**', '*.xml'),
+                           '-o', self.outdir, '-f', 'jsonl', '-l', 'flat',
+                           '-n', 'remove', '-q', '-j', '1'])
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(os.listdir(self.outdir)),
+                         ['a.jsonl', 'b.jsonl'])
+        with open(os.path.join(self.outdir, 'a.jsonl')) as fhandle:
+            lines = fhandle.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('FeatureCollection', json.loads(lines[0]))
+
+    def test_flat_clash(self):
+        """ Check that a flat layout won't overwrite outputs
+        """
+        shutil.copy(SAMPLE, os.path.join(self.indir, 'sub', 'a.xml'))
+        with self.assertRaises(SystemExit) as raised:
+            cli.main([self.indir, '-o', self.outdir, '-l', 'flat', '-q'])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertFalse(os.path.exists(self.outdir))
+
+    def test_skip_up_to_date(self):
+        """ Check that outputs newer than their inputs aren't rebuilt
+        """
+        args = [self.indir, '-o', self.outdir, '-f', 'yaml', '-q', '-j', '1']
+        cli.main(args)
+        inpath = os.path.join(self.indir, 'a.xml')
+        outpath = os.path.join(self.outdir, 'a.yaml')
+        with open(outpath, 'w') as fhandle:
+            fhandle.write('sentinel')
+        mtime = os.path.getmtime(inpath) + 100
+        os.utime(outpath, (mtime, mtime))
+        cli.main(args)
+        with open(outpath) as fhandle:
+            self.assertEqual(fhandle.read(), 'sentinel')
+        cli.main(args + ['--force'])
+        with open(outpath) as fhandle:
+            self.assertNotEqual(fhandle.read(), 'sentinel')
+
+
+if __name__ == '__main__':
+    unittest.main()
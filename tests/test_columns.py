@@ -0,0 +1,84 @@
+""" file:   test_columns.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for columnar flattening of feature collections
+"""
+
+from __future__ import print_function, division
+
+from xjson.columns import ColumnStore
+
+import unittest
+
+FEATURES = b"""<?xml version="1.0"?>
+<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0"
+    xmlns:ex="http://example.org/ex"
+    xmlns:xlink="http://www.w3.org/1999/xlink">
+  <wfs:member>
+    <ex:Borehole ex:id="bh.1">
+      <ex:depth>10</ex:depth><ex:dip>45.5</ex:dip><ex:cored>true</ex:cored>
+      <ex:unit xlink:href="http://example.org/unit/1"/>
+    </ex:Borehole>
+  </wfs:member>
+  <wfs:member>
+    <ex:Borehole ex:id="bh.2">
+      <ex:depth>20</ex:depth><ex:dip>30</ex:dip><ex:cored>false</ex:cored>
+      <ex:log>a</ex:log><ex:log>b</ex:log>
+    </ex:Borehole>
+  </wfs:member>
+</wfs:FeatureCollection>
+"""
+
+
+class TestColumnStore(unittest.TestCase):
+
+    """ Tests for the column store
+    """
+
+    def setUp(self):
+        self.store = ColumnStore.from_xml(FEATURES)
+
+    def test_columns(self):
+        """ Check that features are flattened into aligned columns
+        """
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.dtypes, {
+            'ex:Borehole/@ex:id': 'str',
+            'ex:Borehole/ex:depth': 'int',
+            'ex:Borehole/ex:dip': 'float',
+            'ex:Borehole/ex:cored': 'bool',
+            'ex:Borehole/ex:unit/@xlink:href': 'str',
+            'ex:Borehole/ex:log': 'object'})
+        columns = self.store.to_dict()
+        self.assertEqual(columns['ex:Borehole/ex:depth'], [10, 20])
+        self.assertEqual(columns['ex:Borehole/ex:unit/@xlink:href'],
+                         ['http://example.org/unit/1', None])
+        self.assertEqual(columns['ex:Borehole/ex:log'], [None, ['a', 'b']])
+        self.assertEqual(list(self.store.header.body.keys()),
+                         ['wfs:FeatureCollection'])
+
+    def test_csv(self):
+        """ Check CSV export
+        """
+        lines = self.store.to_csv().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('ex:Borehole/@ex:id,'))
+        self.assertTrue(lines[2].endswith(',a b'))
+
+    def test_numpy(self):
+        """ Check structured array export
+        """
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        array = self.store.to_numpy()
+        self.assertEqual(array.dtype['ex:Borehole/ex:depth'], numpy.int64)
+        self.assertEqual(array['ex:Borehole/ex:dip'][0], 45.5)
+        self.assertTrue(array['ex:Borehole/ex:cored'][0])
+        self.assertIsNone(array['ex:Borehole/ex:unit/@xlink:href'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+""" file:   test_converter.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for reusable conversion sessions
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.converter import XJsonConverter
+
+from lxml.etree import XMLSyntaxError
+import os
+import unittest
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'data',
+                       'mapped_features.xml')
+
+OTHER = """<ex:Sites xmlns:ex="http://example.org/ex"
+    xmlns:xlink="http://www.w3.org/1999/xlink">
+  <ex:site xlink:href="http://example.org/site/1"/>
+  <ex:name>One</ex:name>
+</ex:Sites>"""
+
+# Same namespace as OTHER under a different prefix
+RENAMED = OTHER.replace('ex:', 'site:').replace('xmlns:ex', 'xmlns:site')
+
+HANDLING = ('none', 'shorten', 'remove', 'identify')
+
+
+class TestConverter(unittest.TestCase):
+
+    def setUp(self):
+        with open(FIXTURE, 'rb') as fhandle:
+            self.features = fhandle.read()
+        self.documents = [self.features, OTHER, RENAMED, self.features,
+                          OTHER, RENAMED]
+
+    def check_same(self, expected, result):
+        "Check that two converted documents match"
+        self.assertEqual(expected.body, result.body)
+        self.assertEqual(dict(expected.context.items()),
+                         dict(result.context.items()))
+        self.assertEqual(dict(expected.context.mapping),
+                         dict(result.context.mapping))
+
+    def test_same_as_from_xml(self):
+        "Converted documents should match XJson.from_xml"
+        for handling in HANDLING:
+            converter = XJsonConverter(namespace_handling=handling)
+            for xml in self.documents:
+                self.check_same(
+                    XJson.from_xml(xml, namespace_handling=handling),
+                    converter.convert(xml))
+            self.assertEqual(converter.documents, len(self.documents))
+
+    def test_convert_many(self):
+        "convert_many should convert each document in turn"
+        converter = XJsonConverter()
+        results = list(converter.convert_many(self.documents))
+        self.assertEqual(len(results), len(self.documents))
+        for xml, result in zip(self.documents, results):
+            self.check_same(XJson.from_xml(xml), result)
+
+    def test_contexts_are_separate(self):
+        "Each document should get its own context"
+        converter = XJsonConverter()
+        first = converter(self.features)
+        second = converter(OTHER)
+        self.assertIsNot(first.context, second.context)
+        self.assertNotIn('ex', second.context.keys() & first.context.keys())
+        self.assertTrue(any(k.startswith('ex:') for k in second.body))
+        self.assertFalse(any(k.startswith('ex:')
+                             for k in first.context.keys()))
+
+    def test_namespace_handling_kept(self):
+        "Namespace handling should survive between documents"
+        converter = XJsonConverter(namespace_handling='remove')
+        for _ in range(3):
+            result = converter(OTHER)
+            self.assertEqual(result.context.namespace_handling, 'remove')
+            self.assertIn('Sites', result.body)
+
+    def test_recovers_after_error(self):
+        "A parse error shouldn't break the next conversion"
+        converter = XJsonConverter()
+        converter(OTHER)
+        with self.assertRaises(XMLSyntaxError):
+            converter('<ex:Sites xmlns:ex="http://example.org/ex"><ex:name>')
+        self.check_same(XJson.from_xml(OTHER), converter(OTHER))
+        self.check_same(XJson.from_xml(self.features),
+                        converter(self.features))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+""" file:   test_decorator.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the with_xjson class decorator
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson, with_xjson
+from xjson.decorator import MetadataView
+from xjson.hashcons import FrozenDict
+
+import unittest
+
+
+@with_xjson('Rock', subelements=[
+    {'tag': 'name', 'text': 'granite'},
+    {'tag': 'colour', 'attrib': {'code': 'GR'}},
+    {'tag': 'mineral', 'text': 'quartz'},
+    {'tag': 'mineral', 'text': 'feldspar'}])
+class Rock(object):
+
+    "A decorated class"
+
+    def __init__(self, age=None):
+        self.age = age
+
+
+class TestDecorator(unittest.TestCase):
+
+    """ Tests for with_xjson
+    """
+
+    def test_template(self):
+        """ Check that the class gets a frozen XJson template
+        """
+        self.assertIsInstance(Rock.xjson, XJson)
+        self.assertEqual(Rock.xjson.ident, Rock.ident)
+        root = Rock.xjson.body['Rock']
+        self.assertIsInstance(root, FrozenDict)
+        self.assertEqual(root['name'], 'granite')
+        self.assertEqual(root['colour'], {'#attributes': {'code': 'GR'}})
+        self.assertEqual(root['mineral'], ('quartz', 'feldspar'))
+        self.assertRaises(TypeError, root.__setitem__, 'name', 'basalt')
+        self.assertTrue(Rock.xjson.context['name'].endswith('/name'))
+
+    def test_shared_until_written(self):
+        """ Check that instances share the template until they change it
+        """
+        first, second = Rock(), Rock(age=10)
+        self.assertNotIn('xjson', vars(first))
+        self.assertIsInstance(first.xjson, MetadataView)
+        self.assertIs(first.xjson, first.xjson)
+        self.assertIs(first.xjson.body, second.xjson.body)
+        self.assertIs(str(first.xjson), str(second.xjson))
+        self.assertIs(first.xjson.to_bytes(), second.xjson.to_bytes())
+
+        first.xjson['name'] = 'basalt'
+        self.assertTrue(first.xjson.modified)
+        self.assertFalse(second.xjson.modified)
+        self.assertEqual(first.xjson['name'], 'basalt')
+        self.assertEqual(second.xjson['name'], 'granite')
+        self.assertEqual(Rock.xjson.body['Rock']['name'], 'granite')
+
+        # Subtrees are still shared with the template
+        self.assertIs(first.xjson['colour'], second.xjson['colour'])
+
+    def test_serialization_cache(self):
+        """ Check that serializations follow changes
+        """
+        rock = Rock()
+        rock.xjson['name'] = 'basalt'
+        text = str(rock.xjson)
+        self.assertIn('basalt', text)
+        self.assertIs(str(rock.xjson), text)
+        rock.xjson['name'] = 'gabbro'
+        self.assertIn('gabbro', str(rock.xjson))
+        restored = XJson.from_bytes(rock.xjson.to_bytes())
+        self.assertEqual(restored.body['Rock']['name'], 'gabbro')
+        self.assertEqual(restored.body['Rock']['mineral'],
+                         ['quartz', 'feldspar'])
+        del rock.xjson['name']
+        self.assertNotIn('name', rock.xjson)
+        rock.xjson.reset()
+        self.assertIs(rock.xjson.to_xjson(), Rock.xjson)
+
+    def test_new_keys(self):
+        """ Check that keys added by an instance are defined in its context
+        """
+        rock, other = Rock(), Rock()
+        rock.xjson['texture'] = 'coarse'
+        rock.xjson['{http://example.org/ex}grain'] = 'fine'
+        self.assertEqual(rock.xjson['texture'], 'coarse')
+        self.assertEqual(rock.xjson['grain'], 'fine')
+        self.assertIn('"texture"', str(rock.xjson))
+        self.assertIsNone(Rock.xjson.context.get('texture'))
+        self.assertIs(other.xjson.context, Rock.xjson.context)
+
+        expanded = rock.xjson.to_xjson().expand()
+        root = expanded[Rock.xjson.context['Rock']]
+        self.assertEqual(root[Rock.xjson.context['name']], 'granite')
+        self.assertEqual(root['http://example.org/ex/grain'], 'fine')
+        self.assertTrue(any(key.endswith('/texture') and value == 'coarse'
+                            for key, value in root.items()))
+        restored = XJson.from_bytes(rock.xjson.to_bytes())
+        self.assertEqual(restored.context['grain'],
+                         'http://example.org/ex/grain')
+
+        rock.xjson.reset()
+        self.assertIs(rock.xjson.context, Rock.xjson.context)
+
+    def test_equality(self):
+        """ Check that instances of a class compare equal
+        """
+        self.assertEqual(Rock(), Rock(age=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
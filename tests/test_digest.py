@@ -0,0 +1,83 @@
+""" file:   test_digest.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for content-addressed identifiers
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+
+import os
+import unittest
+import uuid
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+class TestDigest(unittest.TestCase):
+
+    """ Tests for XJson digests and idents
+    """
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def test_content_addressed(self):
+        """ Check that idents follow the content of the document
+        """
+        first, second = XJson.from_xml(self.xml), XJson.from_xml(self.xml)
+        self.assertEqual(first.ident, second.ident)
+        self.assertEqual(first.digest, second.digest)
+        self.assertIsInstance(first.ident, uuid.UUID)
+
+        # Changing content or namespace handling changes the ident
+        changed = XJson.from_xml(self.xml.replace(b'First', b'Premier'))
+        self.assertNotEqual(changed.ident, first.ident)
+        removed = XJson.from_xml(self.xml, namespace_handling='remove')
+        self.assertNotEqual(removed.ident, first.ident)
+
+    def test_stable_ident(self):
+        """ Check that idents don't depend on the package version
+        """
+        # Pinned, since stored idents have to keep matching
+        self.assertEqual(XJson({'a': 'b'}).ident,
+                         uuid.UUID('8774303f-bd9e-518b-a3b3-a9b1ef15e8d2'))
+
+    def test_canonical(self):
+        """ Check that attribute order doesn't change the digest
+        """
+        first = XJson.from_xml(b'<a x="1" y="2"><b>c</b></a>')
+        second = XJson.from_xml(b'<a y="2" x="1"><b>c</b></a>')
+        self.assertEqual(first.digest, second.digest)
+        lazy = XJson.from_bytes(first.to_bytes(), lazy=True)
+        self.assertEqual(lazy.digest, first.digest)
+
+    def test_explicit_ident(self):
+        """ Check that idents and JSON bodies passed in are used
+        """
+        xjson = XJson('{"a": {"b": "c"}}', ident='doc')
+        self.assertEqual(xjson.ident, 'doc')
+        self.assertEqual(xjson.body, {'a': {'b': 'c'}})
+        restored = XJson.from_bytes(xjson.to_bytes())
+        self.assertEqual(restored.ident, 'doc')
+
+    def test_register(self):
+        """ Check that documents are registered under their ident
+        """
+        xjson = XJson.from_xml(self.xml)
+        xjson.register()
+        try:
+            self.assertIs(XJson.registry[xjson.ident], xjson)
+            XJson.from_xml(self.xml).register()
+            self.assertIs(XJson.registry[xjson.ident], xjson)
+        finally:
+            XJson.registry.deregister(xjson.ident)
+        self.assertNotIn(xjson.ident, XJson.registry)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+""" file:   test_harvest.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the paging WFS harvester
+"""
+
+from __future__ import print_function, division
+
+from xjson.harvest import WFSHarvester, HarvestError
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+import unittest
+import urllib.parse
+
+PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0"
+    xmlns:ex="http://example.org/ex" numberReturned="{0}">
+{1}</wfs:FeatureCollection>
+"""
+
+MEMBER = """  <wfs:member><ex:Site gml:id="site.{0}"
+    xmlns:gml="http://www.opengis.net/gml/3.2"><ex:name>Site {0}</ex:name>
+  </ex:Site></wfs:member>
+"""
+
+TOTAL = 23
+
+
+class StandInWFS(BaseHTTPRequestHandler):
+
+    """ A stand-in WFS serving TOTAL features
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """ Serve a page of features
+        """
+        query = dict(urllib.parse.parse_qsl(
+            urllib.parse.urlsplit(self.path).query))
+        self.server.requests.append((query, self.client_address))
+        if query.get('typeNames', query.get('typeName')) != 'ex:Site':
+            body = b'<ows:ExceptionReport xmlns:ows="urn:ows">' \
+                b'<ows:Exception>Unknown type</ows:Exception>' \
+                b'</ows:ExceptionReport>'
+        else:
+            time.sleep(0.01)
+            start = int(query['startIndex'])
+            count = int(query.get('count', query.get('maxFeatures')))
+            indices = range(start, min(start + count, TOTAL))
+            body = PAGE.format(len(indices), ''.join(
+                MEMBER.format(i) for i in indices)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHarvest(unittest.TestCase):
+
+    """ Tests for WFSHarvester
+    """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInWFS)
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{0}/wfs?map=test'.format(
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_paging(self):
+        """ Check that we get every feature, in order
+        """
+        harvester = WFSHarvester(self.url, 'ex:Site', page_size=5,
+                                 max_in_flight=3)
+        names = [f['ex:Site']['ex:name'] for f in harvester.features()]
+        self.assertEqual(names, ['Site {0}'.format(i) for i in range(TOTAL)])
+
+        # Connections are kept alive and reused
+        clients = set(client for _, client in self.server.requests)
+        self.assertLessEqual(len(clients), 3)
+        self.assertEqual(harvester.pool.connections_made, len(clients))
+        query = self.server.requests[0][0]
+        self.assertEqual(query['map'], 'test')
+        self.assertEqual(query['count'], '5')
+
+    def test_wfs1(self):
+        """ Check that WFS 1.x uses maxFeatures
+        """
+        harvester = WFSHarvester(self.url, 'ex:Site', version='1.1.0',
+                                 page_size=10)
+        self.assertEqual(len(list(harvester)), 3)
+        self.assertIn('maxFeatures', self.server.requests[0][0])
+
+    def test_backpressure(self):
+        """ Check that we don't run ahead of the consumer
+        """
+        harvester = WFSHarvester(self.url, 'ex:Site', page_size=1,
+                                 max_in_flight=2)
+        pages = iter(harvester)
+        next(pages)
+        time.sleep(0.2)
+        self.assertLessEqual(len(self.server.requests), 3)
+        pages.close()
+
+    def test_limit(self):
+        """ Check that we stop asking for pages at the feature limit
+        """
+        harvester = WFSHarvester(self.url, 'ex:Site', page_size=5,
+                                 max_in_flight=3, limit=7)
+        names = [f['ex:Site']['ex:name'] for f in harvester.features()]
+        self.assertEqual(names, ['Site {0}'.format(i) for i in range(7)])
+        self.assertEqual(sorted(int(query['count'])
+                                for query, _ in self.server.requests), [2, 5])
+
+    def test_max_bytes(self):
+        """ Check that a page cut short by max_bytes ends the harvest
+        """
+        harvester = WFSHarvester(self.url, 'ex:Site', page_size=5,
+                                 max_in_flight=1, max_bytes=400)
+        pages = list(harvester)
+        self.assertEqual(len(pages), 1)
+        self.assertTrue(pages[0].truncated)
+        self.assertEqual(len(list(WFSHarvester(
+            self.url, 'ex:Site', page_size=5, max_bytes=10000))), 5)
+
+    def test_exception_report(self):
+        """ Check that WFS exceptions are raised
+        """
+        with self.assertRaises(HarvestError):
+            list(WFSHarvester(self.url, 'ex:Nothing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+""" file:   test_hashcons.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for sharing identical subtrees
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.hashcons import SubtreeInterner, FrozenDict
+
+import json
+import pickle
+import unittest
+
+REPEATED = b"""<?xml version="1.0"?>
+<ex:collection xmlns:ex="http://example.org/ex">
+  <ex:item><ex:term codeSpace="http://example.org/cs">granite</ex:term>
+    <ex:id>1</ex:id></ex:item>
+  <ex:item><ex:term codeSpace="http://example.org/cs">granite</ex:term>
+    <ex:id>2</ex:id></ex:item>
+  <ex:item><ex:term codeSpace="http://example.org/cs">basalt</ex:term>
+    <ex:id>3</ex:id></ex:item>
+</ex:collection>
+"""
+
+
+class TestHashCons(unittest.TestCase):
+
+    """ Tests for the subtree interner
+    """
+
+    def test_shared_subtrees(self):
+        """ Check that identical subtrees are shared
+        """
+        interner = SubtreeInterner()
+        xjson = XJson.from_xml(REPEATED, interner=interner)
+        items = xjson.body['ex:collection']
+        self.assertIs(items[0]['ex:term'], items[1]['ex:term'])
+        self.assertIsNot(items[0]['ex:term'], items[2]['ex:term'])
+        self.assertEqual(interner.hits, 3)  # two attribute dicts, one term
+        self.assertEqual(json.dumps(xjson.body),
+                         json.dumps(XJson.from_xml(REPEATED).body))
+
+    def test_shared_between_documents(self):
+        """ Check that one interner can be used for many documents
+        """
+        interner = SubtreeInterner()
+        first = XJson.from_xml(REPEATED, interner=interner)
+        second = XJson.from_xml(REPEATED, interner=interner)
+        self.assertIs(first.body['ex:collection'][2],
+                      second.body['ex:collection'][2])
+
+    def test_max_size(self):
+        """ Check that large subtrees aren't shared
+        """
+        interner = SubtreeInterner(max_size=2)
+        xjson = XJson.from_xml(REPEATED, interner=interner)
+        items = xjson.body['ex:collection']
+        self.assertIs(items[0]['ex:term'], items[1]['ex:term'])
+        self.assertNotIsInstance(items[0], FrozenDict)
+        self.assertTrue(all(len(tree) <= 2 for tree in interner._subtrees))
+        with self.assertRaises(ValueError):
+            SubtreeInterner(max_size=0)
+
+    def test_max_entries(self):
+        """ Check that the tables drop their least recently used entries
+        """
+        interner = SubtreeInterner(max_entries=2)
+        first, second, third = ({'a': str(i)} for i in range(3))
+        shared = interner.intern(first)
+        evicted = interner.intern(second)
+        self.assertIs(interner.intern(dict(first)), shared)
+        interner.intern(third)  # drops second, the least recently used
+        self.assertEqual(len(interner), 2)
+        self.assertEqual(len(interner._strings), 2)
+        self.assertIs(interner.intern(dict(first)), shared)
+        self.assertIsNot(interner.intern(dict(second)), evicted)
+        self.assertEqual(interner.hits, 2)
+
+    def test_frozen(self):
+        """ Check that shared subtrees can't be modified
+        """
+        frozen = FrozenDict(a='1', b=None)
+        with self.assertRaises(TypeError):
+            frozen['a'] = '2'
+        with self.assertRaises(TypeError):
+            frozen.update(c='3')
+        self.assertEqual(frozen, {'b': None, 'a': '1'})
+        self.assertNotEqual(frozen, FrozenDict(b=None, a='1'))
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)), frozen)
+
+
+if __name__ == '__main__':
+    unittest.main()
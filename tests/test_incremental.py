@@ -0,0 +1,125 @@
+""" file:   test_incremental.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for incremental re-conversion
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.incremental import from_xml_incremental, IncrementalTarget, \
+    index_features
+
+from lxml.etree import XML, XMLParser
+import os
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+THIRD = b"""  <gml:featureMember>
+    <gsml:MappedFeature gml:id="mf.3"><gml:name>Third</gml:name>
+    </gsml:MappedFeature>
+  </gml:featureMember>
+</wfs:FeatureCollection>"""
+
+ANONYMOUS = b"""<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs"
+    xmlns:gml="http://www.opengis.net/gml">
+  <gml:featureMember><gml:Point><gml:pos>1 2</gml:pos></gml:Point>
+  </gml:featureMember>
+  <gml:featureMember><gml:Point><gml:pos>1 2</gml:pos></gml:Point>
+  </gml:featureMember>
+</wfs:FeatureCollection>"""
+
+PREFIXED = b"""<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs"
+    xmlns:gml="http://www.opengis.net/gml" xmlns:ex="http://example.org/ex">
+  <gml:featureMember><ex:Site gml:id="site.1"><ex:name>One</ex:name>
+  </ex:Site></gml:featureMember>
+</wfs:FeatureCollection>"""
+
+
+class TestIncremental(unittest.TestCase):
+
+    """ Tests for incremental conversion
+    """
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+        # Second version: mf.1 is modified, mf.3 is added
+        self.updated = self.xml.replace(b'>First<', b'>Premier<').replace(
+            b'</wfs:FeatureCollection>', THIRD)
+
+    def features(self, xjson):
+        """ Return the converted features in a document
+        """
+        members = xjson.body['wfs:FeatureCollection']['gml:featureMember']
+        return [m['geosciml:MappedFeature'] for m in members]
+
+    def test_changes(self):
+        """ Check that changes are detected and unchanged features reused
+        """
+        first, changes = from_xml_incremental(self.xml)
+        self.assertEqual(changes.added, ['mf.1', 'mf.2'])
+        second, changes = from_xml_incremental(self.updated, previous=first)
+        self.assertEqual(changes.added, ['mf.3'])
+        self.assertEqual(changes.modified, ['mf.1'])
+        self.assertEqual(changes.unchanged, ['mf.2'])
+        self.assertEqual(changes.removed, [])
+        self.assertIs(self.features(second)[1], self.features(first)[1])
+        self.assertEqual(second.body, XJson.from_xml(self.updated).body)
+
+        # And back again
+        third, changes = from_xml_incremental(self.xml, previous=second)
+        self.assertEqual(changes.removed, ['mf.3'])
+        self.assertEqual(changes.modified, ['mf.1'])
+
+    def test_conversion_skipped(self):
+        """ Check that only new and changed features are converted
+        """
+        first, _ = from_xml_incremental(self.xml)
+        target = IncrementalTarget(previous=index_features(first),
+                                   previous_context=first.context,
+                                   namespace_handling='shorten')
+        body, context = XML(self.updated, XMLParser(target=target))
+        self.assertEqual(target.converted, 2)
+        self.assertEqual(body, XJson.from_xml(self.updated).body)
+        self.assertEqual(dict(context.items()),
+                         dict(XJson.from_xml(self.updated).context.items()))
+
+    def test_anonymous(self):
+        """ Check that features without ids are kept apart by position
+        """
+        first, changes = from_xml_incremental(ANONYMOUS)
+        self.assertEqual(changes.added, ['#0', '#1'])
+        self.assertEqual(len(first.features), 2)
+        last = ANONYMOUS.rindex(b'1 2')
+        updated = ANONYMOUS[:last] + b'3 4' + ANONYMOUS[last + 3:]
+        second, changes = from_xml_incremental(updated, previous=first)
+        self.assertEqual(changes.unchanged, ['#0'])
+        self.assertEqual(changes.modified, ['#1'])
+
+    def test_prefix_changed(self):
+        """ Check that features are converted again if their prefix changes
+        """
+        first, _ = from_xml_incremental(PREFIXED)
+        renamed = PREFIXED.replace(b'ex:', b'foo:').replace(b'xmlns:ex',
+                                                             b'xmlns:foo')
+        second, changes = from_xml_incremental(renamed, previous=first)
+        self.assertEqual(changes.modified, ['site.1'])
+        self.assertEqual(second.body, XJson.from_xml(renamed).body)
+        self.assertIn('foo:name', str(second))
+
+    def test_plain_previous(self):
+        """ Check that documents converted normally can be used as the
+            previous version
+        """
+        previous = XJson.from_xml(self.xml)
+        _, changes = from_xml_incremental(self.xml, previous=previous)
+        self.assertFalse(changes)
+        self.assertEqual(changes.unchanged, ['mf.1', 'mf.2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+""" file:   test_index.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for sidecar offset indexes
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.gml import members
+from xjson.index import IndexedWriter, IndexedReader, index_xml, \
+    record_key, _IndexingTarget
+
+from lxml.etree import XML, XMLParser
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+def make_records(count):
+    "Make some feature records"
+    return [{'ex:Site': {'#attributes': {'gml:id': 'site.{0}'.format(idx)},
+                         'ex:name': 'Site {0}'.format(idx % 7)}}
+            for idx in range(count)]
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'features.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_record_key(self):
+        "Keys should come from gml:id or a key path"
+        record = make_records(1)[0]
+        self.assertEqual(record_key(record), 'site.0')
+        self.assertEqual(record_key(record, '*/ex:name'), 'Site 0')
+        self.assertEqual(record_key(record, 'ex:Site/ex:name'), 'Site 0')
+        self.assertIsNone(record_key(record, '*/ex:missing'))
+        self.assertIsNone(record_key({'ex:Site': 'text'}))
+
+    def test_lookup(self):
+        "Records should be found by their keys, in both formats"
+        records = make_records(500)
+        for fmt in ('jsonl', 'json'):
+            with IndexedWriter(self.path, fmt=fmt) as writer:
+                for record in records:
+                    writer.write(record)
+            with IndexedReader(self.path) as reader:
+                self.assertEqual(len(reader), 500)
+                for idx in (0, 17, 499):
+                    key = 'site.{0}'.format(idx)
+                    self.assertEqual(reader[key], records[idx])
+                    self.assertEqual(json.loads(reader.raw(key).decode()),
+                                     records[idx])
+                self.assertNotIn('site.500', reader)
+                self.assertRaises(KeyError, reader.__getitem__, 'site.500')
+                self.assertIsNone(reader.get('site.500'))
+
+            # The output should still be ordinary JSON
+            with open(self.path) as fhandle:
+                if fmt == 'json':
+                    self.assertEqual(json.load(fhandle), records)
+                else:
+                    self.assertEqual([json.loads(l) for l in fhandle],
+                                     records)
+
+    def test_key_path(self):
+        "Duplicate keys should all be returned, in order"
+        records = make_records(50)
+        with IndexedWriter(self.path, key='*/ex:name') as writer:
+            for record in records:
+                writer.write(record)
+            writer.write({'ex:Site': {}})
+        with IndexedReader(self.path) as reader:
+            self.assertEqual(reader.key, '*/ex:name')
+            self.assertEqual(len(reader), 50)
+            self.assertEqual(reader.get_all('Site 3'), records[3::7])
+
+    def test_empty(self):
+        "Empty files should have an empty index"
+        IndexedWriter(self.path).close()
+        with IndexedReader(self.path) as reader:
+            self.assertEqual(len(reader), 0)
+            self.assertNotIn('site.0', reader)
+
+    def test_stale_index(self):
+        "Changing the data file should invalidate the index"
+        with IndexedWriter(self.path) as writer:
+            writer.write(make_records(1)[0])
+        with open(self.path, 'ab') as fhandle:
+            fhandle.write(b'{}\n')
+        self.assertRaises(ValueError, IndexedReader, self.path)
+
+    def test_index_xml(self):
+        "Features should be written straight from the XML"
+        self.assertEqual(index_xml(SAMPLE, self.path), 2)
+        with open(SAMPLE, 'rb') as fhandle:
+            expected = XJson.from_xml(fhandle)
+        features = members(expected.body['wfs:FeatureCollection'])
+        with IndexedReader(self.path) as reader:
+            self.assertEqual(reader['mf.1'], features[0])
+            self.assertEqual(reader['mf.2'], features[1])
+            self.assertEqual(reader.context, dict(expected.context.items()))
+
+    def test_features_dropped(self):
+        "Written features shouldn't leave anything behind in the document"
+        with open(SAMPLE, 'rb') as fhandle:
+            xml = fhandle.read()
+        with IndexedWriter(self.path) as writer:
+            target = _IndexingTarget(writer, namespace_handling='shorten')
+            body, _ = XML(xml, XMLParser(target=target))
+            self.assertEqual(writer.records, 2)
+        root = body['wfs:FeatureCollection']
+        self.assertNotIn('gml:featureMember', root)
+        self.assertIn('gml:boundedBy', root)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+""" file:   test_jsonld.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for JSON-LD expansion and compaction
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+
+import io
+import json
+import os
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+GML = 'http://www.opengis.net/gml/'
+GSML = 'urn:cgi:xmlns:CGI:GeoSciML:2.0:'
+
+
+class TestJSONLD(unittest.TestCase):
+
+    """ Tests for XJson.expand and XJson.compact
+    """
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def test_expand(self):
+        """ Check that every namespace mode expands to the same thing
+        """
+        expanded = [XJson.from_xml(self.xml, namespace_handling=h).expand()
+                    for h in ('none', 'remove', 'shorten', 'identify')]
+        for other in expanded[1:]:
+            self.assertEqual(other, expanded[0])
+        root = expanded[0]['http://www.opengis.net/wfs/FeatureCollection']
+        feature = root[GML + 'featureMember'][0][GSML + 'MappedFeature']
+        self.assertEqual(feature[GML + 'name'], 'First')
+        self.assertEqual(feature['#attributes'], {GML + 'id': 'mf.1'})
+
+    def test_roundtrip(self):
+        """ Check that compacting with the same context gives the body back
+        """
+        for handling in ('none', 'remove', 'shorten', 'identify'):
+            xjson = XJson.from_xml(self.xml, namespace_handling=handling)
+            self.assertEqual(xjson.compact(xjson.context), xjson.body)
+
+    def test_containers(self):
+        """ Check that containers are expanded and compacted
+        """
+        xjson = XJson.from_xml(b'<a xmlns="http://example.org/ex">'
+                               b'<b>1</b><b>2</b></a>',
+                               namespace_handling='none')
+        expanded = xjson.expand()
+        self.assertEqual(expanded, {'http://example.org/ex/a': [
+            {'http://example.org/ex/b': '1'},
+            {'http://example.org/ex/b': '2'}]})
+        self.assertEqual(xjson.compact(xjson.context), xjson.body)
+
+    def test_compact_other(self):
+        """ Check compacting to a different set of prefixes
+        """
+        xjson = XJson.from_xml(self.xml, namespace_handling='remove')
+        compacted = xjson.compact({'g': GML[:-1]})
+        root = compacted['http://www.opengis.net/wfs/FeatureCollection']
+        self.assertIn('g:featureMember', root)
+        self.assertIn('g:boundedBy', root)
+
+    def test_stream(self):
+        """ Check that streamed output matches
+        """
+        xjson = XJson.from_xml(self.xml)
+        buf = io.StringIO()
+        xjson.expand(buf)
+        self.assertEqual(json.loads(buf.getvalue()), xjson.expand())
+        buf = io.StringIO()
+        xjson.compact(xjson.context, buf)
+        self.assertEqual(json.loads(buf.getvalue()), xjson.body)
+
+
+if __name__ == '__main__':
+    unittest.main()
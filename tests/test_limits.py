@@ -0,0 +1,83 @@
+""" file:   test_limits.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for resource-bounded conversion
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson, ConversionLimits, ConversionLimitError
+
+import os
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+class TestConversionLimits(unittest.TestCase):
+
+    """ Tests for conversion limits
+    """
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def test_unlimited(self):
+        """ Check that generous limits don't change the result
+        """
+        limits = ConversionLimits(max_depth=100, max_elements=1000,
+                                  max_text_bytes=10000)
+        bounded = XJson.from_xml(self.xml, limits=limits)
+        self.assertEqual(bounded.body, XJson.from_xml(self.xml).body)
+        self.assertFalse(bounded.truncated)
+
+    def test_raise(self):
+        """ Check that each limit raises when exceeded
+        """
+        for kwargs in ({'max_depth': 3}, {'max_elements': 5},
+                       {'max_text_bytes': 10}, {'max_data_bytes': 3},
+                       {'max_context_size': 1}):
+            limits = ConversionLimits(**kwargs)
+            with self.assertRaises(ConversionLimitError) as cm:
+                XJson.from_xml(self.xml, limits=limits)
+            self.assertEqual(cm.exception.limit, list(kwargs.keys())[0])
+
+    def test_truncate_depth(self):
+        """ Check that deep subtrees are dropped when truncating
+        """
+        limits = ConversionLimits(max_depth=2, policy='truncate')
+        xjson = XJson.from_xml(self.xml, limits=limits)
+        self.assertTrue(xjson.truncated)
+        root = xjson.body['wfs:FeatureCollection']
+        self.assertEqual(root['gml:boundedBy'], {})
+        self.assertEqual(root['gml:featureMember'], [{}, {}])
+
+    def test_truncate_text(self):
+        """ Check that text is cut off at the limits
+        """
+        limits = ConversionLimits(max_data_bytes=1, policy='truncate')
+        xjson = XJson.from_xml(self.xml, limits=limits)
+        envelope = xjson.body['wfs:FeatureCollection']['gml:boundedBy']
+        self.assertEqual(envelope['gml:Envelope']['gml:lowerCorner'], '1')
+
+    def test_truncate_elements(self):
+        """ Check that everything after the element limit is dropped
+        """
+        limits = ConversionLimits(max_elements=6, policy='truncate')
+        xjson = XJson.from_xml(self.xml, limits=limits)
+        root = xjson.body['wfs:FeatureCollection']
+        self.assertEqual(list(root.keys()),
+                         ['#attributes', 'gml:boundedBy', 'gml:featureMember'])
+        self.assertEqual(root['gml:featureMember'], {})
+
+    def test_invalid_policy(self):
+        """ Check that unknown policies are rejected
+        """
+        self.assertRaises(ValueError, ConversionLimits, policy='ignore')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+""" file:   test_merge.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for merging converted documents
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson, NamespaceMap
+from xjson.gml import members
+
+import unittest
+
+PAGE = """<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0"
+    xmlns:gml="http://www.opengis.net/gml/3.2"
+    xmlns:geo="urn:example:xmlns:Geo:{0}" numberReturned="{2}">
+{1}</wfs:FeatureCollection>"""
+
+MEMBER = """<wfs:member><geo:MappedFeature gml:id="mf.{0}">
+  <gml:name>Feature {0}</gml:name>
+  <geo:specification xlink:href="urn:x:{0}"
+    xmlns:xlink="http://www.w3.org/1999/xlink"/>
+</geo:MappedFeature></wfs:member>"""
+
+HANDLING = ('none', 'remove', 'shorten', 'identify')
+
+
+def page(indices, version='2.0'):
+    "Make a page of features"
+    return PAGE.format(version, ''.join(MEMBER.format(i) for i in indices),
+                       len(indices))
+
+
+class TestMerge(unittest.TestCase):
+
+    def test_same_as_whole(self):
+        "Merging pages should give the same result as one big document"
+        for handling in HANDLING:
+            whole = XJson.from_xml(page(range(6)),
+                                   namespace_handling=handling)
+            pages = [XJson.from_xml(page(indices),
+                                    namespace_handling=handling)
+                     for indices in ((0, 1), (2,), (3, 4, 5))]
+            merged = XJson.merge(pages)
+            self.assertEqual(merged.context.namespace_handling, handling)
+            (tag, root), = merged.body.items()
+            (whole_tag, whole_root), = whole.body.items()
+            self.assertEqual(tag, whole_tag)
+            self.assertEqual(members(root), members(whole_root))
+            self.assertEqual(dict(merged.context.items()),
+                             dict(whole.context.items()))
+
+    def test_members_not_copied(self):
+        "Members should be reused when nothing needs renaming"
+        pages = [XJson.from_xml(page(indices)) for indices in ((0, 1), (2,))]
+        merged = XJson.merge(pages)
+        merged_members = members(merged.body['wfs:FeatureCollection'])
+        self.assertIs(merged_members[0],
+                      members(pages[0].body['wfs:FeatureCollection'])[0])
+        self.assertIs(merged_members[2],
+                      pages[1].body['wfs:FeatureCollection']['wfs:member'])
+
+    def test_prefix_clash(self):
+        "Clashing prefixes should be renamed in the later documents"
+        first = XJson.from_xml(page((0, 1)))
+        second = XJson.from_xml(page((2, 3), version='2.2'))
+        self.assertIn('geo:MappedFeature',
+                      members(second.body['wfs:FeatureCollection'])[0])
+
+        merged = XJson.merge([first, second])
+        found = members(merged.body['wfs:FeatureCollection'])
+        self.assertEqual([list(m) for m in found],
+                         [['geo:MappedFeature']] * 2
+                         + [['geo_2.2:MappedFeature']] * 2)
+        self.assertEqual(merged.context['geo_2.2'],
+                         'urn:example:xmlns:Geo:2.2')
+
+        # Keys should still expand to the same IRIs
+        root_iri = 'http://www.opengis.net/wfs/2.0/FeatureCollection'
+        expected = first.expand()[root_iri] + second.expand()[root_iri]
+        self.assertEqual(merged.expand()[root_iri], expected)
+        self.assertIn('urn:example:xmlns:Geo:2.2:MappedFeature', expected[-1])
+
+    def test_versioned_prefixes(self):
+        "Prefixes containing a ':' should be renamed as a whole"
+        first = XJson.from_xml(
+            '<c xmlns:geo="urn:example:xmlns:Geo:1.0"><geo:Feat>0</geo:Feat>'
+            '</c>')
+        second = XJson.from_xml(
+            '<c xmlns:geo="urn:example:xmlns:Geo:2.0"><geo:A/>'
+            '<m xmlns:geo="urn:example:xmlns:Geo:1.0"><geo:Feat>1</geo:Feat>'
+            '</m></c>')
+        self.assertIn('geo:1.0:Feat', second.body['c']['m'])
+
+        merged = XJson.merge([first, second])
+        self.assertEqual(merged.body['c']['m'], {'geo:Feat': '1'})
+        self.assertIn('geo_2.0:A', merged.body['c'])
+        self.assertEqual(merged.context.resolve('geo:Feat'),
+                         'urn:example:xmlns:Geo:1.0:Feat')
+        self.assertEqual(merged.context.resolve('geo_2.0:A'),
+                         'urn:example:xmlns:Geo:2.0:A')
+
+    def test_errors(self):
+        "Empty or mixed merges should raise a ValueError"
+        self.assertRaises(ValueError, XJson.merge, [])
+        pages = [XJson.from_xml(page((0,)), namespace_handling='shorten'),
+                 XJson.from_xml(page((1,)), namespace_handling='remove')]
+        self.assertRaises(ValueError, XJson.merge, pages)
+
+    def test_truncated(self):
+        "Merging a truncated document should give a truncated result"
+        pages = [XJson.from_xml(page((0,))), XJson.from_xml(page((1,)))]
+        pages[1].truncated = True
+        self.assertTrue(XJson.merge(pages).truncated)
+
+
+class TestNamespaceMerge(unittest.TestCase):
+
+    def test_merge(self):
+        "Merged namespaces should get colon-free prefixes"
+        nsmap = NamespaceMap(geosciml='urn:cgi:xmlns:CGI:GeoSciML:2.0')
+        renamed = nsmap.merge({'geosciml': 'urn:cgi:xmlns:CGI:GeoSciML:22.0',
+                               'gsmlb': 'urn:cgi:xmlns:CGI:GeoSciML:2.0',
+                               'ex': 'http://example.org/ex'})
+        self.assertEqual(renamed, {'geosciml': 'geosciml_22.0',
+                                   'gsmlb': 'geosciml'})
+        self.assertEqual(nsmap['geosciml_22.0'],
+                         'urn:cgi:xmlns:CGI:GeoSciML:22.0')
+        self.assertEqual(nsmap['ex'], 'http://example.org/ex')
+
+
+if __name__ == '__main__':
+    unittest.main()
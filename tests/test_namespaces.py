@@ -10,7 +10,11 @@
 from __future__ import print_function, division
 
 from xjson.namespaces import NamespaceMap
+from xjson import well_known, XJson
 
+import os
+import shutil
+import tempfile
 import unittest
 
 
@@ -68,5 +72,136 @@ class TestXMLNamespaces(unittest.TestCase):
                          'urn:cgi:xmlns:CGI:GeoSciML:2.0')
 
 
+class TestWellKnownNamespaces(unittest.TestCase):
+
+    """ Tests for the table of well-known namespaces
+    """
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        for namespace_uri in list(well_known.added_namespaces()):
+            well_known.remove_namespace(namespace_uri)
+
+    def test_canonical(self):
+        """ Check that well-known namespaces get their canonical prefix
+        """
+        ns = NamespaceMap()
+        ns.add_from_uri('http://purl.org/dc/elements/1.1/')
+        self.assertEqual(ns['dc'], 'http://purl.org/dc/elements/1.1/')
+
+        # Unknown namespaces can't take well-known prefixes, whatever order
+        # things turn up in
+        ns.add_from_uri('urn:cgi:xmlns:CGI:GeoSciML:22.0')
+        ns.add_from_uri('urn:cgi:xmlns:CGI:GeoSciML:2.0')
+        self.assertEqual(ns.inverse['urn:cgi:xmlns:CGI:GeoSciML:22.0'],
+                         'geosciml:22.0')
+        self.assertEqual(ns['geosciml'], 'urn:cgi:xmlns:CGI:GeoSciML:2.0')
+
+    def test_read_only(self):
+        """ Check that the built-in table can't be modified
+        """
+        with self.assertRaises(TypeError):
+            well_known.WELL_KNOWN_NAMESPACES['urn:foo:bar'] = 'bar'
+        with self.assertRaises(ValueError):
+            well_known.add_namespace('http://www.opengis.net/gml', 'gml3')
+
+    def test_user_namespaces(self):
+        """ Check that added namespaces can be saved and loaded
+        """
+        uri = 'http://example.org/schemas/borehole/1.0'
+        well_known.add_namespace(uri, 'bh')
+        self.assertEqual(NamespaceMap('{' + uri + '}x').inverse[uri], 'bh')
+
+        filename = os.path.join(self.tempdir, 'namespaces.json')
+        well_known.save_namespaces(filename)
+        well_known.remove_namespace(uri)
+        self.assertIsNone(well_known.prefix_for(uri))
+        well_known.load_namespaces(filename)
+        self.assertEqual(well_known.prefix_for(uri), 'bh')
+
+
+DECLARED = b"""<bh:Borehole xmlns:bh="http://example.org/schemas/borehole/1.0"
+    xmlns:gsml="urn:cgi:xmlns:CGI:GeoSciML:2.0"
+    xmlns:gml="http://www.opengis.net/gml" gml:id="bh.1"
+    srsName="urn:ogc:def:crs:EPSG::4326">
+  <gsml:name>Hole</gsml:name>
+</bh:Borehole>
+"""
+
+
+class TestDeclaredNamespaces(unittest.TestCase):
+
+    """ Tests for namespaces declared in documents
+    """
+
+    def test_declared_prefix(self):
+        """ Check that declared prefixes are used unless well-known
+        """
+        xjson = XJson.from_xml(DECLARED)
+        self.assertEqual(list(xjson.body), ['bh:Borehole'])
+        self.assertEqual(xjson.body['bh:Borehole']['geosciml:name'], 'Hole')
+        self.assertEqual(xjson.context['bh'],
+                         'http://example.org/schemas/borehole/1.0')
+
+    def test_attribute_values(self):
+        """ Check that attribute values are left alone
+        """
+        for handling in ('shorten', 'remove'):
+            xjson = XJson.from_xml(DECLARED, namespace_handling=handling)
+            attributes = list(xjson.body.values())[0]['#attributes']
+            self.assertIn('urn:ogc:def:crs:EPSG::4326', attributes.values())
+            self.assertIn('bh.1', attributes.values())
+            self.assertNotIn('bh.1', xjson.context.keys())
+
+
+class TestCompactContext(unittest.TestCase):
+
+    """ Tests for the compact context in 'remove' mode
+    """
+
+    def test_compact(self):
+        """ Check that aliases are stored compactly but expand on lookup
+        """
+        context = XJson.from_xml(DECLARED, namespace_handling='remove').context
+        self.assertEqual(context['Borehole'],
+                         'http://example.org/schemas/borehole/1.0/Borehole')
+        self.assertEqual(context['name'],
+                         'urn:cgi:xmlns:CGI:GeoSciML:2.0:name')
+        rendered = str(context)
+        self.assertIn('"name": "geosciml:name"', rendered)
+        self.assertIn('"geosciml": "urn:cgi:xmlns:CGI:GeoSciML:2.0"',
+                      rendered)
+        self.assertIs(str(context), rendered)
+        context['extra'] = {'@id': 'geosciml:extra'}
+        self.assertIn('"extra": {"@id": "geosciml:extra"}', str(context))
+
+    def test_prefix_clash(self):
+        """ Check that local names which match a prefix keep a full IRI
+        """
+        kml = XJson.from_xml(
+            b'<kml xmlns="http://www.opengis.net/kml/2.2">'
+            b'<Placemark><name>A</name></Placemark></kml>',
+            namespace_handling='remove')
+        self.assertEqual(kml.context['kml'],
+                         'http://www.opengis.net/kml/2.2/kml')
+        self.assertEqual(kml.context['Placemark'],
+                         'http://www.opengis.net/kml/2.2/Placemark')
+        kml_ns = 'http://www.opengis.net/kml/2.2/'
+        self.assertEqual(kml.expand(), {kml_ns + 'kml': {
+            kml_ns + 'Placemark': {kml_ns + 'name': 'A'}}})
+
+        gml = XJson.from_xml(
+            b'<gml:gml xmlns:gml="http://www.opengis.net/gml">'
+            b'<gml:name>A</gml:name></gml:gml>',
+            namespace_handling='remove')
+        self.assertEqual(gml.context['gml'], 'http://www.opengis.net/gml/gml')
+        self.assertEqual(gml.context['name'],
+                         'http://www.opengis.net/gml/name')
+        self.assertNotIn('gml:gml', str(gml.context))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,112 @@
+""" file:   test_plans.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for precompiled conversion plans
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson, ConversionPlan
+
+import os
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+GSML = '{urn:cgi:xmlns:CGI:GeoSciML:2.0}'
+
+SCHEMA = b"""<?xml version="1.0"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           xmlns:gml="http://www.opengis.net/gml"
+           targetNamespace="urn:cgi:xmlns:CGI:GeoSciML:2.0"
+           elementFormDefault="qualified">
+  <xs:element name="MappedFeature">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="observationMethod" type="xs:string"/>
+        <xs:element name="specification" type="gml:ReferenceType"/>
+        <xs:element name="occurrences">
+          <xs:complexType>
+            <xs:sequence>
+              <xs:element name="occurrence" type="xs:string"
+                          maxOccurs="unbounded"/>
+            </xs:sequence>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+MISMATCHED = b"""<?xml version="1.0"?>
+<gsml:MappedFeature xmlns:gsml="urn:cgi:xmlns:CGI:GeoSciML:2.0"
+                    xmlns:xlink="http://www.w3.org/1999/xlink">
+  <gsml:specification xlink:href="http://example.org/1" xlink:title="x"/>
+  <gsml:occurrences><gsml:occurrence>only one</gsml:occurrence>
+  </gsml:occurrences>
+  <gsml:observationMethod>mixed<gsml:b/>content</gsml:observationMethod>
+</gsml:MappedFeature>
+"""
+
+
+class TestConversionPlan(unittest.TestCase):
+
+    """ Tests for conversion plans
+    """
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def assertSameConversion(self, xml, plan):
+        """ Check that a plan doesn't change the conversion
+        """
+        for handling in ('none', 'remove', 'shorten', 'identify'):
+            expected = XJson.from_xml(xml, namespace_handling=handling)
+            planned = XJson.from_xml(xml, namespace_handling=handling,
+                                     plan=plan)
+            self.assertEqual(expected.body, planned.body)
+            self.assertEqual(dict(expected.context.items()),
+                             dict(planned.context.items()))
+
+    def test_learn(self):
+        """ Check that plans can be learned from samples
+        """
+        plan = ConversionPlan.learn(self.xml)
+        self.assertEqual(plan.get(GSML + 'specification'), 'href')
+        self.assertEqual(plan.get('{http://www.opengis.net/gml}name'), 'data')
+        self.assertIsNone(plan.get(GSML + 'MappedFeature'))
+        self.assertSameConversion(self.xml, plan)
+
+    def test_from_xsd(self):
+        """ Check that plans can be compiled from a schema
+        """
+        plan = ConversionPlan.from_xsd(SCHEMA)
+        self.assertEqual(plan.entries, {
+            GSML + 'observationMethod': 'data',
+            GSML + 'specification': 'href',
+            GSML + 'occurrences': 'container',
+            GSML + 'occurrence': 'data'})
+
+    def test_fallback(self):
+        """ Check that elements which don't match the plan are still
+            converted correctly
+        """
+        plan = ConversionPlan.from_xsd(SCHEMA)
+        self.assertSameConversion(MISMATCHED, plan)
+
+    def test_roundtrip(self):
+        """ Check that plans can be saved and loaded
+        """
+        plan = ConversionPlan.learn(self.xml)
+        self.assertEqual(ConversionPlan.loads(plan.dumps()).entries,
+                         plan.entries)
+        with self.assertRaises(ValueError):
+            plan['foo'] = 'bar'
+
+
+if __name__ == '__main__':
+    unittest.main()
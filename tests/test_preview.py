@@ -0,0 +1,138 @@
+""" file:   test_preview.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for stopping conversion early
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.gml import members
+from xjson.incremental import from_xml_incremental
+from xjson.index import IndexedReader, index_xml
+from xjson.spatial import from_xml_spatial
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+FEATURE = (b'<gml:featureMember><ex:Site gml:id="site.{0}">'
+           b'<gml:name>Site {0}</gml:name></ex:Site></gml:featureMember>')
+
+
+def make_collection(count):
+    "Make a big feature collection"
+    return b''.join(
+        [b'<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs" '
+         b'xmlns:gml="http://www.opengis.net/gml" '
+         b'xmlns:ex="http://example.org/ex">']
+        + [FEATURE.replace(b'{0}', str(idx).encode('ascii'))
+           for idx in range(count)]
+        + [b'</wfs:FeatureCollection>'])
+
+
+class CountingReader(io.BytesIO):
+
+    "Keeps track of how much has been read"
+
+    def __init__(self, data):
+        super(CountingReader, self).__init__(data)
+        self.nread = 0
+
+    def read(self, size=-1):
+        data = super(CountingReader, self).read(size)
+        self.nread += len(data)
+        return data
+
+
+def feature_ids(xjson):
+    "Get the ids of the features in a converted collection"
+    root, = xjson.body.values()
+    return [feature['#attributes']['gml:id']
+            for member in members(root) for feature in member.values()]
+
+
+class TestPreview(unittest.TestCase):
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def test_limit(self):
+        "Only the first features are converted"
+        preview = XJson.from_xml(self.xml, limit=1)
+        self.assertTrue(preview.truncated)
+        self.assertEqual(feature_ids(preview), ['mf.1'])
+        full = XJson.from_xml(self.xml)
+        self.assertEqual(preview.context.mapping.items(),
+                         full.context.mapping.items())
+        root, = preview.body.values()
+        self.assertIn('gml:boundedBy', root)
+
+    def test_limit_not_reached(self):
+        "A limit which isn't reached gives the whole document"
+        preview = XJson.from_xml(self.xml, limit=5)
+        self.assertFalse(preview.truncated)
+        self.assertEqual(preview.body, XJson.from_xml(self.xml).body)
+
+    def test_stops_reading(self):
+        "The rest of the document isn't read"
+        source = CountingReader(make_collection(20000))
+        preview = XJson.from_xml(source, limit=3)
+        self.assertEqual(feature_ids(preview),
+                         ['site.0', 'site.1', 'site.2'])
+        self.assertLess(source.nread, len(source.getvalue()) // 10)
+
+    def test_max_bytes(self):
+        "Partial features are dropped when the bytes run out"
+        cut = self.xml.index(b'<gml:name>Second')
+        preview = XJson.from_xml(self.xml, max_bytes=cut)
+        self.assertTrue(preview.truncated)
+        self.assertEqual(feature_ids(preview), ['mf.1'])
+
+    def test_max_bytes_structure(self):
+        "Open elements are closed off in other documents"
+        xml = b'<a><b>one</b><c><d>two</d><e>three</e></c></a>'
+        preview = XJson.from_xml(xml, max_bytes=xml.index(b'<e>'))
+        self.assertTrue(preview.truncated)
+        self.assertEqual(preview.body, {'a': {'b': 'one', 'c': {'d': 'two'}}})
+        self.assertRaises(ValueError, XJson.from_xml, xml, max_bytes=2)
+
+    def test_other_readers(self):
+        "The spatial and incremental readers stop reading too"
+        source = CountingReader(make_collection(20000))
+        result = from_xml_spatial(source, limit=3)
+        self.assertTrue(result.truncated)
+        self.assertEqual(list(result.spatial_features),
+                         ['site.0', 'site.1', 'site.2'])
+        self.assertLess(source.nread, len(source.getvalue()) // 10)
+
+        source = CountingReader(make_collection(20000))
+        result, changes = from_xml_incremental(source, limit=3)
+        self.assertEqual(feature_ids(result), ['site.0', 'site.1', 'site.2'])
+        self.assertEqual(changes.added, ['site.0', 'site.1', 'site.2'])
+        self.assertLess(source.nread, len(source.getvalue()) // 10)
+
+    def test_index_xml(self):
+        "Indexing can stop early too"
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'features.jsonl')
+            count = index_xml(io.BytesIO(make_collection(1000)), path,
+                              limit=10)
+            self.assertEqual(count, 10)
+            with IndexedReader(path) as reader:
+                self.assertIn('site.9', reader)
+                self.assertNotIn('site.10', reader)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+""" file:   test_registry.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the registry under concurrent use
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson, XJsonRegistry
+from xjson.singleton import singleton
+
+import threading
+import time
+import unittest
+
+
+class TestRegistry(unittest.TestCase):
+
+    """ Tests for XJsonRegistry with many threads
+    """
+
+    def test_singleton_race(self):
+        """ Check that racing first calls all get the same instance
+        """
+        class Slow(object, metaclass=singleton):
+            def __init__(self):
+                time.sleep(0.01)
+
+        barrier = threading.Barrier(8)
+        instances = []
+
+        def make():
+            barrier.wait()
+            instances.append(Slow())
+
+        threads = [threading.Thread(target=make) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(map(id, instances))), 1)
+
+    def test_registered_ids(self):
+        """ Check that registered idents are kept on the instance
+        """
+        registry = XJsonRegistry()
+        self.assertIs(registry, XJsonRegistry())
+        self.assertNotIn('registered_ids', vars(XJsonRegistry))
+        xjson = XJson({'a': 1}, ident='registry.single')
+        xjson.register()
+        try:
+            self.assertIn('registry.single', registry.registered_ids)
+        finally:
+            registry.deregister('registry.single')
+        self.assertNotIn('registry.single', registry.registered_ids)
+
+    def test_concurrent_register(self):
+        """ Check that concurrent registrations are all kept, and that only
+            the first registration of an ident wins
+        """
+        registry = XJsonRegistry()
+        nthreads, count = 8, 200
+        barrier = threading.Barrier(nthreads)
+        winners = []
+
+        def work(thread):
+            barrier.wait()
+            shared = XJson({'thread': thread}, ident='registry.shared')
+            registry.register(shared)
+            if registry['registry.shared'] is shared:
+                winners.append(thread)
+            for idx in range(count):
+                ident = 'registry.{0}.{1}'.format(thread, idx)
+                registry.register(XJson({'n': idx}, ident=ident))
+                self.assertEqual(registry[ident].body, {'n': idx})
+
+        threads = [threading.Thread(target=work, args=(thread,))
+                   for thread in range(nthreads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            self.assertEqual(len(winners), 1)
+            for thread in range(nthreads):
+                for idx in range(count):
+                    self.assertIn('registry.{0}.{1}'.format(thread, idx),
+                                  registry.registered_ids)
+        finally:
+            for ident in [i for i in list(registry.registered_ids)
+                          if str(i).startswith('registry.')]:
+                registry.deregister(ident)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+""" file:   test_service.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the local conversion service
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson, ConversionLimits
+from xjson.cli import render
+from xjson.service import ConversionService, make_server, frame, unframe, \
+    UnixHTTPConnection
+
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+class TestFraming(unittest.TestCase):
+
+    def test_roundtrip(self):
+        "Framed payloads should come back unchanged"
+        payloads = [b'', b'one', b'\x00' * 300]
+        self.assertEqual(unframe(frame(payloads)), payloads)
+
+    def test_truncated(self):
+        "Truncated frames should raise a ValueError"
+        data = frame([b'abcdef'])
+        for end in (2, len(data) - 1):
+            self.assertRaises(ValueError, unframe, data[:end])
+
+
+class TestConversionService(unittest.TestCase):
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+        self.documents = [self.xml.replace(b'First', str(i).encode())
+                          for i in range(20)]
+        self.service = ConversionService(workers=1)
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_convert(self):
+        "Results should match XJson.from_xml"
+        expected = XJson.from_xml(self.xml)
+        result = self.service.convert(self.xml)
+        self.assertEqual(result.body, expected.body)
+        self.assertEqual(self.service.convert(self.xml, 'jsonl'),
+                         render(expected, 'jsonl').encode('utf-8'))
+        decoded = XJson.from_bytes(self.service.convert(self.xml, 'binary'))
+        self.assertEqual(decoded.body, expected.body)
+
+    def test_batches_coalesced(self):
+        "Concurrent requests should be batched, and come back in order"
+        results = self.service.convert_batch(self.documents)
+        for idx, result in enumerate(results):
+            members = result.body['wfs:FeatureCollection']['gml:featureMember']
+            self.assertEqual(members[0]['geosciml:MappedFeature']['gml:name'],
+                             str(idx))
+        metrics = self.service.metrics.snapshot()
+        self.assertEqual(metrics['requests'], 20)
+        self.assertLess(metrics['batches'], 20)
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertIn('p95', metrics['latency_ms'])
+
+    def test_errors(self):
+        "Bad documents should fail without affecting the others"
+        results = self.service.convert_batch([b'<broken>', self.xml])
+        self.assertIsInstance(results[0], Exception)
+        self.assertIsInstance(results[1], XJson)
+        rendered = self.service.convert_batch([b'<broken>'], 'json')
+        self.assertIn('#error', json.loads(rendered[0].decode('utf-8')))
+        self.assertRaises(Exception, self.service.convert, b'<broken>')
+        self.assertEqual(self.service.metrics.snapshot()['errors'], 3)
+
+    def test_cache(self):
+        "Repeated requests should come from the cache"
+        first = self.service.convert(self.xml, 'json')
+        second = self.service.convert(self.xml, 'json')
+        self.assertEqual(first, second)
+        self.assertEqual(self.service.metrics.snapshot()['cache_hits'], 1)
+
+    def test_bad_format(self):
+        "Unknown formats should raise a ValueError"
+        self.assertRaises(ValueError, self.service.submit, self.xml, 'xml')
+
+    def test_close_race(self):
+        "Requests submitted while closing are either rejected or finished"
+        futures, started = [], threading.Event()
+
+        def _submit():
+            started.set()
+            while True:
+                try:
+                    futures.append(self.service.submit(self.xml))
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=_submit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        self.service.close()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            self.assertIsInstance(future.result(timeout=10), XJson)
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        with open(SAMPLE, 'rb') as fhandle:
+            self.xml = fhandle.read()
+        self.service = ConversionService(workers=2)
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.service.close()
+
+    def start(self, **kwargs):
+        "Start a server in the background"
+        server = make_server(self.service, **kwargs)
+        thread = threading.Thread(target=server.serve_forever,
+                                  kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        self.servers.append(server)
+        return server
+
+    def request(self, connection, method, path, body=None):
+        "Make a request, returning the status and body"
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def check_server(self, connection):
+        "Check conversion over a connection to the server"
+        expected = XJson.from_xml(self.xml)
+
+        status, body = self.request(connection, 'POST',
+                                    '/convert?format=jsonl', self.xml)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body.decode('utf-8'))[
+            'wfs:FeatureCollection'], expected.body['wfs:FeatureCollection'])
+
+        status, body = self.request(connection, 'POST', '/batch?format=binary',
+                                    frame([self.xml, b'<broken>']))
+        self.assertEqual(status, 200)
+        first, second = unframe(body)
+        self.assertEqual(XJson.from_bytes(first).body, expected.body)
+        self.assertIn('#error', XJson.from_bytes(second).body)
+
+        status, body = self.request(connection, 'POST', '/convert',
+                                    b'<broken>')
+        self.assertEqual(status, 400)
+
+        status, body = self.request(connection, 'GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body.decode('utf-8'))['requests'], 4)
+
+    def test_http(self):
+        "The service should work over localhost HTTP"
+        server = self.start()
+        host, port = server.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        try:
+            self.check_server(connection)
+        finally:
+            connection.close()
+
+    def test_request_too_large(self):
+        "Requests over the size limit should get a 413 without being read"
+        self.service.close()
+        self.service = ConversionService(
+            workers=1, limits=ConversionLimits(max_input_bytes=100))
+        self.assertEqual(self.service.max_request_bytes, 100)
+        server = self.start()
+        host, port = server.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        try:
+            status, _ = self.request(connection, 'POST', '/convert',
+                                     self.xml)
+            self.assertEqual(status, 413)
+        finally:
+            connection.close()
+        self.assertEqual(self.service.metrics.snapshot()['requests'], 0)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'needs Unix sockets')
+    def test_socket_path_checked(self):
+        "Only an old socket should be replaced, never another file"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'out.json')
+            with open(path, 'w') as fhandle:
+                fhandle.write('{}')
+            self.assertRaises(ValueError, make_server, self.service,
+                              socket_path=path)
+            self.assertTrue(os.path.isfile(path))
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'needs Unix sockets')
+    def test_unix_socket(self):
+        "The service should work over a Unix socket"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'xjson.sock')
+
+            # Leave a stale socket behind, which should be replaced
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(path)
+            stale.close()
+            self.start(socket_path=path)
+            connection = UnixHTTPConnection(path, timeout=10)
+            try:
+                self.check_server(connection)
+            finally:
+                connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
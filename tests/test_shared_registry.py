@@ -0,0 +1,131 @@
+""" file:   test_shared_registry.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the registry shared between processes
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.binary import LazyDict
+from xjson.gml import members
+from xjson.shared_registry import SharedRegistry
+from xjson.spatial import query_registry
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+
+def register_documents(path, prefix, count):
+    "Register some documents from another process"
+    with SharedRegistry(path) as registry:
+        for idx in range(count):
+            registry.register(
+                XJson({'doc': {'n': idx}}, ident='{0}.{1}'.format(prefix, idx)))
+
+
+class TestSharedRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'registry')
+        self.registry = SharedRegistry(self.path)
+
+    def tearDown(self):
+        self.registry.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_register_lookup(self):
+        "Registered documents can be looked up by ident"
+        with open(SAMPLE, 'rb') as fhandle:
+            xjson = XJson.from_xml(fhandle.read())
+        self.registry.register(xjson)
+        self.assertIn(xjson.ident, self.registry)
+        self.assertIn(str(xjson.ident), self.registry.registered_ids)
+        found = self.registry[xjson.ident]
+        self.assertEqual(found.ident, xjson.ident)
+        self.assertEqual(str(found), str(xjson))
+        self.assertIs(self.registry.get(xjson.ident), found)
+        self.assertIsNone(self.registry.get('missing'))
+
+    def test_helpers(self):
+        "Looked-up documents work with the other helpers"
+        with open(SAMPLE, 'rb') as fhandle:
+            xjson = XJson.from_xml(fhandle.read())
+        self.registry.register(xjson)
+        found = query_registry(self.registry, (9, 19, 12, 22))
+        self.assertEqual(len(found), 2)
+        merged = XJson.merge([self.registry[xjson.ident], xjson])
+        root, = merged.body.values()
+        self.assertEqual(len(members(root)), 4)
+
+    def test_lazy(self):
+        "Lazy registries only decode what is used"
+        self.registry.register(XJson({'doc': {'n': 1}}, ident='a'))
+        with SharedRegistry(self.path, lazy=True) as other:
+            document = other['a']
+            self.assertIsInstance(document.body, LazyDict)
+            self.assertEqual(document.body, {'doc': {'n': 1}})
+
+    def test_replace_existing(self):
+        "Existing documents are only replaced when asked"
+        self.registry.register(XJson({'doc': 1}, ident='a'))
+        self.registry.register(XJson({'doc': 2}, ident='a'))
+        self.assertEqual(self.registry['a'].body['doc'], 1)
+        self.registry.register(XJson({'doc': 2}, ident='a'),
+                               replace_existing=True)
+        self.assertEqual(self.registry['a'].body['doc'], 2)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_deregister(self):
+        "Deregistered documents are gone from every registry on the file"
+        other = SharedRegistry(self.path)
+        try:
+            self.registry.register(XJson({'doc': 1}, ident='a'))
+            self.assertIn('a', other)
+            other.deregister('a')
+            self.assertNotIn('a', self.registry)
+            self.assertRaises(KeyError, self.registry.deregister, 'a')
+        finally:
+            other.close()
+
+    def test_growth(self):
+        "The file grows and is remapped as documents are added"
+        body = {'doc': {'text': 'x' * 100000}}
+        for idx in range(30):
+            self.registry.register(XJson(body, ident=str(idx)))
+        with SharedRegistry(self.path) as other:
+            self.assertEqual(sorted(other, key=int),
+                             [str(idx) for idx in range(30)])
+            self.assertEqual(other['29'].body['doc']['text'], 'x' * 100000)
+
+    def test_not_a_registry(self):
+        "Other files are rejected"
+        path = os.path.join(self.tmpdir, 'other')
+        with open(path, 'wb') as fhandle:
+            fhandle.write(b'not a registry file')
+        self.assertRaises(ValueError, SharedRegistry, path)
+
+    def test_processes(self):
+        "Registrations from several processes are all visible"
+        workers = [multiprocessing.Process(target=register_documents,
+                                           args=(self.path, prefix, 20))
+                   for prefix in ('p', 'q', 'r')]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(len(self.registry), 60)
+        self.assertEqual(self.registry['q.7'].body, {'doc': {'n': 7}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+""" file:   test_spatial.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for feature bounding boxes and the spatial index
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.spatial import SpatialIndex, from_xml_spatial, spatial_index, \
+    query, query_registry, parse_coordinates
+
+import io
+import os
+import random
+import unittest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'data',
+                      'mapped_features.xml')
+
+GEOMETRIES = b"""<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0"
+    xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:ex="http://example.org/ex">
+  <wfs:member><ex:Road gml:id="road.1"><ex:shape>
+    <gml:LineString srsDimension="3">
+      <gml:posList>0 0 5 10 2 5 4 8 5</gml:posList>
+    </gml:LineString></ex:shape></ex:Road></wfs:member>
+  <wfs:member><ex:Area gml:id="area.1"><ex:extent><gml:Envelope>
+    <gml:lowerCorner>20 30</gml:lowerCorner>
+    <gml:upperCorner>25 35</gml:upperCorner>
+  </gml:Envelope></ex:extent></ex:Area></wfs:member>
+  <wfs:member><ex:Old gml:id="old.1"><ex:where><gml:LineString>
+    <gml:coordinates cs=";" ts="|">-5;-5|-1;-2</gml:coordinates>
+  </gml:LineString></ex:where></ex:Old></wfs:member>
+  <wfs:member><ex:Nowhere><ex:name>no geometry</ex:name></ex:Nowhere>
+  </wfs:member>
+</wfs:FeatureCollection>"""
+
+# One feature with a 3D geometry followed by a 2D one
+MIXED = b"""<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs/2.0"
+    xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:ex="http://example.org/ex">
+  <wfs:member><ex:Well gml:id="well.1">
+    <ex:trace><gml:LineString srsDimension="3">
+      <gml:posList>0 0 -100 1 1 -200</gml:posList>
+    </gml:LineString></ex:trace>
+    <ex:site><gml:LineString>
+      <gml:posList>2 3 4 5 6 7</gml:posList>
+    </gml:LineString></ex:site>
+  </ex:Well></wfs:member>
+</wfs:FeatureCollection>"""
+
+
+class TestCoordinates(unittest.TestCase):
+
+    def test_parse(self):
+        "Coordinate strings should be split into x and y values"
+        self.assertEqual(parse_coordinates('1 2 3 4'), ([1, 3], [2, 4]))
+        self.assertEqual(parse_coordinates('1 2 9 3 4 9', dimension=3),
+                         ([1, 3], [2, 4]))
+        self.assertEqual(parse_coordinates('1,2 3,4', 'coordinates'),
+                         ([1, 3], [2, 4]))
+        self.assertEqual(parse_coordinates('1,5;2,5', 'coordinates', cs=';',
+                                           ts=' ', decimal=','),
+                         ([1.5], [2.5]))
+        self.assertEqual(parse_coordinates('7', 'Y'), ([], [7]))
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(42)
+        self.boxes = {}
+        for idx in range(500):
+            x, y = rand.uniform(0, 100), rand.uniform(0, 100)
+            size = rand.choice((0, 0.5, 2, 60))
+            self.boxes[idx] = (x, y, x + size, y + size)
+        self.index = SpatialIndex()
+        for key, bbox in self.boxes.items():
+            self.index.insert(key, bbox)
+
+    def brute_force(self, bbox):
+        "Find intersecting boxes the slow way"
+        return [key for key, box in self.boxes.items()
+                if box[0] <= bbox[2] and bbox[0] <= box[2]
+                and box[1] <= bbox[3] and bbox[1] <= box[3]]
+
+    def test_query(self):
+        "Queries should match a brute force search"
+        for bbox in ((10, 10, 20, 20), (50, 50, 50, 50), (-10, -10, 500, 500),
+                     (200, 200, 300, 300)):
+            self.assertEqual(self.index.query(bbox), self.brute_force(bbox))
+
+    def test_insert_after_build(self):
+        "Boxes added after a query should be found"
+        self.index.query((0, 0, 1, 1))
+        self.index.insert('new', (1000, 1000, 1001, 1001))
+        self.assertEqual(self.index.query((999, 999, 1000, 1000)), ['new'])
+        self.index.remove('new')
+        self.assertEqual(self.index.query((999, 999, 1000, 1000)), [])
+
+    def test_invalid(self):
+        "Inverted boxes should raise a ValueError"
+        self.assertRaises(ValueError, self.index.insert, 'bad', (1, 1, 0, 0))
+
+    def test_save_load(self):
+        "Indexes should survive saving and loading"
+        handle = io.StringIO()
+        self.index.save(handle)
+        handle.seek(0)
+        loaded = SpatialIndex.load(handle)
+        self.assertEqual(len(loaded), len(self.index))
+        self.assertEqual(loaded.query((10, 10, 20, 20)),
+                         self.brute_force((10, 10, 20, 20)))
+
+
+class TestFeatureBoxes(unittest.TestCase):
+
+    def test_boxes(self):
+        "Feature boxes should be worked out during conversion"
+        result = from_xml_spatial(GEOMETRIES)
+        self.assertEqual(result.bboxes, {'road.1': (0, 0, 10, 8),
+                                         'area.1': (20, 30, 25, 35),
+                                         'old.1': (-5, -5, -1, -2)})
+        self.assertEqual(result.body, XJson.from_xml(GEOMETRIES).body)
+        self.assertEqual(query(result, (1, 1, 21, 31)),
+                         [result.spatial_features['road.1'],
+                          result.spatial_features['area.1']])
+
+    def test_mixed_dimensions(self):
+        "srsDimension should only apply to the geometry which declares it"
+        result = from_xml_spatial(MIXED)
+        self.assertEqual(result.bboxes, {'well.1': (0, 0, 6, 7)})
+        self.assertEqual(spatial_index(XJson.from_xml(MIXED)).bbox('well.1'),
+                         (0, 0, 6, 7))
+
+    def test_boxes_from_converted(self):
+        "Boxes should match when worked out after conversion"
+        for handling in ('none', 'remove', 'shorten', 'identify'):
+            expected = from_xml_spatial(GEOMETRIES,
+                                        namespace_handling=handling)
+            converted = XJson.from_xml(GEOMETRIES, namespace_handling=handling)
+            index = spatial_index(converted)
+            for key, bbox in expected.bboxes.items():
+                self.assertEqual(index.bbox(key), bbox)
+            self.assertEqual(query(converted, (1, 1, 21, 31)),
+                             query(expected, (1, 1, 21, 31)))
+
+    def test_registry(self):
+        "Queries should run over every document in a registry"
+        with open(SAMPLE, 'rb') as fhandle:
+            sample = from_xml_spatial(fhandle)
+        registry = {'sample': sample, 'other': from_xml_spatial(GEOMETRIES)}
+        found = query_registry(registry, (10.5, 20.5, 19, 29))
+        self.assertEqual([(doc, list(feature)) for doc, feature in found],
+                         [(sample, ['geosciml:MappedFeature'])])
+        self.assertEqual(sample.bboxes, {'mf.1': (10, 20, 10, 20),
+                                         'mf.2': (11, 21, 11, 21)})
+
+
+if __name__ == '__main__':
+    unittest.main()
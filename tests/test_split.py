@@ -0,0 +1,75 @@
+""" file:   test_split.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for parallel conversion by member splitting
+"""
+
+from __future__ import print_function, division
+
+from xjson import XJson
+from xjson.split import from_xml_split, scan
+
+import json
+import os
+import tempfile
+import unittest
+
+HEADER = b"""<?xml version="1.0" encoding="UTF-8"?>
+<!-- a <comment> before the root -->
+<wfs:FeatureCollection xmlns:wfs="http://www.opengis.net/wfs"
+    xmlns:gml="http://www.opengis.net/gml"
+    xmlns:gsml="urn:cgi:xmlns:CGI:GeoSciML:2.0" note="a > b">
+  <gml:boundedBy><gml:Null>unknown</gml:Null></gml:boundedBy>
+"""
+MEMBER = b"""  <gml:featureMember>
+    <gsml:MappedFeature gml:id="mf.{0}">
+      <gml:name>Feature {0}</gml:name>
+    </gsml:MappedFeature>
+  </gml:featureMember>
+"""
+FOOTER = b"</wfs:FeatureCollection>\n"
+
+
+class TestSplit(unittest.TestCase):
+
+    """ Tests for splitting feature collections
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.xml')
+        with os.fdopen(handle, 'wb') as fhandle:
+            fhandle.write(HEADER)
+            for idx in range(50):
+                fhandle.write(MEMBER.replace(b'{0}', str(idx).encode()))
+            fhandle.write(FOOTER)
+        with open(self.path, 'rb') as fhandle:
+            self.xml = fhandle.read()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_scan(self):
+        """ Check that we find the root element and members
+        """
+        header, footer, start, end, qname = scan(self.xml)
+        self.assertTrue(header.endswith(b'note="a > b">'))
+        self.assertEqual(footer, b'</wfs:FeatureCollection>')
+        self.assertEqual(self.xml[end:].strip(), footer)
+        self.assertEqual(qname, b'gml:featureMember')
+
+    def test_matches_serial(self):
+        """ Check that split conversion matches a serial conversion
+        """
+        for handling in ('shorten', 'remove', 'none'):
+            expected = XJson.from_xml(self.xml, namespace_handling=handling)
+            result = from_xml_split(self.path, namespace_handling=handling,
+                                    processes=2, chunks=4, min_chunk_bytes=1)
+            self.assertEqual(json.dumps(result.body),
+                             json.dumps(expected.body))
+            self.assertEqual(dict(result.context.items()),
+                             dict(expected.context.items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
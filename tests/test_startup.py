@@ -0,0 +1,70 @@
+""" file:   test_startup.py
+    author: xjson developers
+    date:   October 2026
+
+    description: Tests for the cost of importing xjson
+"""
+
+from __future__ import print_function, division
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Modules that shouldn't be loaded until they're needed
+HEAVY = ('lxml', 'lxml.etree', 'json', 'uuid', 'xjson.xjson',
+         'xjson.registry', 'xjson.json_target')
+
+# Snapshot the loaded modules before importing anything we check for, and
+# only import json to report the result once the snapshot is compared
+SCRIPT = """
+import sys
+before = set(sys.modules)
+import xjson
+loaded = sorted(set(sys.modules) - before)
+import json
+sys.stdout.write(json.dumps(loaded))
+"""
+
+
+def run(script):
+    "Run a script in a fresh interpreter, returning its decoded output"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    output = subprocess.check_output([sys.executable, '-c', script],
+                                     cwd=root, env=env)
+    return json.loads(output.decode('utf-8'))
+
+
+class TestStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.loaded = run(SCRIPT)
+
+    def test_heavy_modules_deferred(self):
+        "Importing xjson shouldn't load lxml or the converter"
+        for module in HEAVY:
+            self.assertNotIn(module, self.loaded)
+
+    def test_only_package_loaded(self):
+        "Importing xjson should only load the package itself"
+        self.assertIn('xjson', self.loaded)
+        self.assertEqual([module for module in self.loaded
+                          if module.startswith('xjson.')], [])
+
+    def test_names_load_on_use(self):
+        "Public names should still be importable from the package"
+        names = run("""
+import json, sys
+import xjson
+from xjson import XJson, NamespaceMap, XJSON_NAMESPACE
+sys.stdout.write(json.dumps([XJson.__name__, 'lxml' in sys.modules,
+                             sorted(set(xjson.__all__) - set(dir(xjson)))]))
+""")
+        self.assertEqual(names, ['XJson', True, []])
+
+
+if __name__ == '__main__':
+    unittest.main()
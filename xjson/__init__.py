@@ -4,12 +4,48 @@
     date:   Wednesday 27 August, 2014
 
     description: Functions to deal with.xjson
+
+    Names are imported from their submodules on first use (PEP 562), so
+    `import xjson` doesn't load lxml or the converter until something
+    actually needs them. This keeps startup cheap for short-lived
+    processes which only touch part of the package.
 """
 
-from .registry import XJsonRegistry
-from .xjson import XJson, yamlify
-from .namespaces import NamespaceMap
-from .decorator import with_xjson, XJSON_NAMESPACE
+import importlib
+
+# Submodule providing each public name
+_SUBMODULES = {
+    'XJsonRegistry': 'registry',
+    'XJson': 'xjson',
+    'yamlify': 'xjson',
+    'NamespaceMap': 'namespaces',
+    'with_xjson': 'decorator',
+    'XJSON_NAMESPACE': 'xjson_namespace',
+    'ConversionLimits': 'limits',
+    'ConversionLimitError': 'limits',
+    'ConversionPlan': 'plans',
+    '__version__': 'xjson_namespace',
+}
 
 __all__ = ['XJsonRegistry', 'XJson', 'NamespaceMap',
-           'yamlify', 'XJSON_NAMESPACE', 'with_xjson']
+           'yamlify', 'XJSON_NAMESPACE', 'with_xjson',
+           'ConversionLimits', 'ConversionLimitError', 'ConversionPlan']
+
+
+def __getattr__(name):
+    """ Import public names from their submodules on first access
+    """
+    try:
+        submodule = _SUBMODULES[name]
+    except KeyError:
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name))
+    value = getattr(importlib.import_module('.' + submodule, __name__), name)
+
+    # Cache on the package so we only come through here once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
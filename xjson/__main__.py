@@ -0,0 +1,13 @@
+""" file:   __main__.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Allows conversion using `python -m xjson`
+"""
+
+import sys
+
+from .cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
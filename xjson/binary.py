@@ -0,0 +1,442 @@
+""" file:   binary.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Compact binary serialization for XJson documents
+
+    Converted documents repeat the same keys ('#attributes', prefixed tags)
+    and often the same values endlessly, so the binary form stores every
+    string once in a table and refers to it by index. Containers carry
+    their encoded length, so a reader can skip over subtrees without
+    decoding them - `decode(..., lazy=True)` returns mappings which only
+    decode the parts of the document that are actually looked at.
+
+    Layout (all integers are unsigned LEB128 varints unless noted):
+
+        magic        b'XJB' + version byte
+        strings      count, byte length, then the utf-8 encoded strings
+                     joined with NUL characters (which XML can't contain)
+        ident        string index, or 0 for no ident (indices start at 1)
+        handling     string index of the namespace handling
+        mapping      a dict value holding the NamespaceMap
+        context      a dict value holding the JSON-LD context
+        body         the body value
+
+    Values are a type byte followed by:
+
+        NONE, TRUE, FALSE   nothing
+        STRING              string index
+        INT                 zigzag-encoded varint
+        FLOAT               8-byte little-endian double
+        DICT                4-byte little-endian payload length, count,
+                            then (key string index, value) pairs
+        LIST                4-byte little-endian payload length, count,
+                            then values
+
+    Container payloads are limited to 4 GiB by their length prefix, and
+    encoding a bigger container raises a ValueError rather than writing a
+    truncated length.
+
+    A full (eager) decode is pure Python, so it is slower than the C json
+    decoder. Loading lazily is the fast path - with
+    `XJson.from_bytes(data, lazy=True)` only the subtrees which are used
+    are ever decoded.
+"""
+
+from __future__ import print_function, division
+
+from .json_context import JSONLDContext
+
+from collections.abc import Mapping, Sequence
+import struct
+
+MAGIC = b'XJB\x01'
+
+NONE, TRUE, FALSE, STRING, INT, FLOAT, DICT, LIST = range(8)
+
+_LENGTH = struct.Struct('<I')
+_MAX_LENGTH = 0xffffffff
+_FLOAT = struct.Struct('<d')
+
+
+class BinaryFormatError(ValueError):
+
+    """ Raised when bytes can't be decoded as an XJson document
+    """
+
+    pass
+
+
+def _write_varint(out, value):
+    """ Append an unsigned varint to a bytearray
+    """
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    """ Read an unsigned varint, returning (value, new position)
+    """
+    byte = buf[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    result, shift = byte & 0x7f, 7
+    while True:
+        pos += 1
+        byte = buf[pos]
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos + 1
+        shift += 7
+
+
+class _Encoder(object):
+
+    """ Encodes values into a bytearray, collecting a string table
+    """
+
+    def __init__(self):
+        super(_Encoder, self).__init__()
+        self.strings = {}
+        self.out = bytearray()
+
+    def string(self, value):
+        """ Return the table index for a string
+        """
+        try:
+            return self.strings[value]
+        except KeyError:
+            index = self.strings[value] = len(self.strings) + 1
+            return index
+
+    def value(self, value):
+        """ Encode a value
+        """
+        out = self.out
+        if isinstance(value, str):
+            out.append(STRING)
+            _write_varint(out, self.string(value))
+        elif value is None:
+            out.append(NONE)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, int):
+            out.append(INT)
+            _write_varint(out, (value << 1) if value >= 0
+                          else ((-value << 1) - 1))
+        elif isinstance(value, float):
+            out.append(FLOAT)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, Mapping):
+            out.append(DICT)
+            start = len(out)
+            out += b'\x00\x00\x00\x00'
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                _write_varint(out, self.string(key))
+                self.value(item)
+            self.close(start)
+        elif isinstance(value, (list, tuple, Sequence)):
+            out.append(LIST)
+            start = len(out)
+            out += b'\x00\x00\x00\x00'
+            _write_varint(out, len(value))
+            for item in value:
+                self.value(item)
+            self.close(start)
+        else:
+            raise TypeError('Can not encode {0!r} of type {1}'.format(
+                value, type(value).__name__))
+
+    def close(self, start):
+        """ Fill in the length prefix of a container starting at start
+        """
+        length = len(self.out) - start - 4
+        if length > _MAX_LENGTH:
+            raise ValueError('Container of {0} bytes is too large to encode, '
+                             'the limit is {1} bytes'.format(length,
+                                                             _MAX_LENGTH))
+        _LENGTH.pack_into(self.out, start, length)
+
+
+def encode(body, context=None, ident=None):
+    """ Encode a document in the binary format
+
+        Parameters:
+            body - the document body
+            context - the JSONLDContext for the document. Optional.
+            ident - the document identifier. Optional.
+
+        Returns:
+            a bytes instance
+    """
+    context = context if context is not None else JSONLDContext()
+    encoder = _Encoder()
+    header = bytearray()
+    _write_varint(header, encoder.string(str(ident))
+                  if ident is not None else 0)
+    _write_varint(header, encoder.string(context.namespace_handling))
+    encoder.value(dict(context.mapping.items()))
+    encoder.value(dict(context.items()))
+    encoder.value(body)
+
+    # String table goes first so the reader can split it in one go
+    strings = '\x00'.join(encoder.strings).encode('utf-8')
+    if strings.count(b'\x00') != max(len(encoder.strings) - 1, 0):
+        raise ValueError('Strings containing NUL characters can not be '
+                         'encoded')
+    table = bytearray(MAGIC)
+    _write_varint(table, len(encoder.strings))
+    _write_varint(table, len(strings))
+    return bytes(table + strings + header + encoder.out)
+
+
+class _Decoder(object):
+
+    """ Decodes values from a buffer using a string table
+    """
+
+    def __init__(self, buf, strings):
+        super(_Decoder, self).__init__()
+        self.buf = buf
+        self.strings = strings
+
+    def skip(self, pos):
+        """ Return the position after the value at pos
+        """
+        kind = self.buf[pos]
+        if kind in (DICT, LIST):
+            return pos + 5 + _LENGTH.unpack_from(self.buf, pos + 1)[0]
+        elif kind in (STRING, INT):
+            return _read_varint(self.buf, pos + 1)[1]
+        elif kind == FLOAT:
+            return pos + 9
+        return pos + 1
+
+    def value(self, pos):
+        """ Decode a complete value, returning (value, new position)
+        """
+        buf, strings = self.buf, self.strings
+        kind = buf[pos]
+        pos += 1
+        if kind == STRING:
+            index, pos = _read_varint(buf, pos)
+            return strings[index], pos
+        elif kind == DICT:
+            count, pos = _read_varint(buf, pos + 4)
+            result = {}
+            value = self.value
+            for _ in range(count):
+                key, pos = _read_varint(buf, pos)
+                result[strings[key]], pos = value(pos)
+            return result, pos
+        elif kind == LIST:
+            count, pos = _read_varint(buf, pos + 4)
+            result = []
+            value = self.value
+            for _ in range(count):
+                item, pos = value(pos)
+                result.append(item)
+            return result, pos
+        elif kind == NONE:
+            return None, pos
+        elif kind == TRUE:
+            return True, pos
+        elif kind == FALSE:
+            return False, pos
+        elif kind == INT:
+            value, pos = _read_varint(buf, pos)
+            return (value >> 1) ^ -(value & 1), pos
+        elif kind == FLOAT:
+            return _FLOAT.unpack_from(buf, pos)[0], pos + 8
+        raise BinaryFormatError('Unknown value type {0} at offset {1}'.format(
+            kind, pos - 1))
+
+    def lazy(self, pos):
+        """ Decode a value lazily, returning (value, new position)
+
+            Containers are returned as LazyDict or LazyList instances.
+        """
+        kind = self.buf[pos]
+        if kind == DICT:
+            return LazyDict(self, pos), self.skip(pos)
+        elif kind == LIST:
+            return LazyList(self, pos), self.skip(pos)
+        return self.value(pos)
+
+
+class LazyDict(Mapping):
+
+    """ A read-only mapping which decodes its values on first access
+
+        Keys are decoded (and values skipped over) the first time the
+        mapping is used. Use `materialize` to get an ordinary dict.
+    """
+
+    __slots__ = ('_decoder', '_pos', '_offsets', '_cache')
+
+    def __init__(self, decoder, pos):
+        super(LazyDict, self).__init__()
+        self._decoder = decoder
+        self._pos = pos
+        self._offsets = None
+        self._cache = {}
+
+    def _index(self):
+        """ Find the offsets of the values in this mapping
+        """
+        if self._offsets is None:
+            decoder = self._decoder
+            buf, strings = decoder.buf, decoder.strings
+            count, pos = _read_varint(buf, self._pos + 5)
+            offsets = {}
+            for _ in range(count):
+                key, pos = _read_varint(buf, pos)
+                offsets[strings[key]] = pos
+                pos = decoder.skip(pos)
+            self._offsets = offsets
+        return self._offsets
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            value, _ = self._decoder.lazy(self._index()[key])
+            self._cache[key] = value
+            return value
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        return len(self._index())
+
+    def __repr__(self):
+        return 'LazyDict({0})'.format(list(self.keys()))
+
+    def materialize(self):
+        """ Decode everything into an ordinary dict
+        """
+        return self._decoder.value(self._pos)[0]
+
+
+class LazyList(Sequence):
+
+    """ A read-only sequence which decodes its items on first access
+    """
+
+    __slots__ = ('_decoder', '_pos', '_offsets', '_cache')
+
+    __hash__ = None
+
+    def __init__(self, decoder, pos):
+        super(LazyList, self).__init__()
+        self._decoder = decoder
+        self._pos = pos
+        self._offsets = None
+        self._cache = {}
+
+    def _index(self):
+        """ Find the offsets of the items in this list
+        """
+        if self._offsets is None:
+            decoder = self._decoder
+            count, pos = _read_varint(decoder.buf, self._pos + 5)
+            offsets = []
+            for _ in range(count):
+                offsets.append(pos)
+                pos = decoder.skip(pos)
+            self._offsets = offsets
+        return self._offsets
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        offsets = self._index()
+        if index < 0:
+            index += len(offsets)
+        try:
+            return self._cache[index]
+        except KeyError:
+            value, _ = self._decoder.lazy(offsets[index])
+            self._cache[index] = value
+            return value
+
+    def __len__(self):
+        return len(self._index())
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyList)):
+            return len(self) == len(other) \
+                and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return 'LazyList(length={0})'.format(len(self))
+
+    def materialize(self):
+        """ Decode everything into an ordinary list
+        """
+        return self._decoder.value(self._pos)[0]
+
+
+def materialize(value):
+    """ Turn a lazily-decoded value into ordinary dicts and lists
+
+        Can be used as the `default` argument to json.dump.
+    """
+    if isinstance(value, (LazyDict, LazyList)):
+        return value.materialize()
+    raise TypeError('Object of type {0} is not JSON serializable'.format(
+        type(value).__name__))
+
+
+def decode(data, lazy=False):
+    """ Decode a document from the binary format
+
+        Parameters:
+            data - a bytes-like object (bytes, mmap, memoryview...)
+            lazy - if True, then the body is decoded on demand using
+                LazyDict and LazyList instances, so only the parts of the
+                document which are used are ever decoded. Optional, defaults
+                to False.
+
+        Returns:
+            a tuple (body, context, ident)
+    """
+    if bytes(data[:4]) != MAGIC:
+        raise BinaryFormatError('Not an XJson binary document')
+
+    # Read the string table
+    count, pos = _read_varint(data, 4)
+    length, pos = _read_varint(data, pos)
+    strings = [None]
+    if count:
+        strings.extend(bytes(data[pos:pos + length]).decode('utf-8')
+                       .split('\x00'))
+    if len(strings) != count + 1:
+        raise BinaryFormatError('Corrupt string table')
+    pos += length
+    decoder = _Decoder(data, strings)
+
+    # Header and context
+    ident, pos = _read_varint(data, pos)
+    handling, pos = _read_varint(data, pos)
+    mapping, pos = decoder.value(pos)
+    entries, pos = decoder.value(pos)
+    context = JSONLDContext(namespace_handling=strings[handling],
+                            mapping=mapping)
+    for tag, value in entries.items():
+        context[tag] = value
+
+    # Body
+    body, _ = decoder.lazy(pos) if lazy else decoder.value(pos)
+    return body, context, strings[ident]
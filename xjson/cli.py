@@ -0,0 +1,318 @@
+""" file:   cli.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Command line interface for converting XML files in bulk
+
+    Usage is something like
+
+        python -m xjson --format jsonl --output converted/ data/**/*.xml
+
+    which converts every matching file using a pool of worker processes.
+    Files whose output is already newer than the input are skipped, so
+    rerunning a conversion over a directory only touches what has changed.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+FORMATS = {
+    'json': '.json',
+    'jsonl': '.jsonl',
+    'yaml': '.yaml'
+}
+LAYOUTS = ('mirror', 'flat')
+NAMESPACE_HANDLING = ('none', 'remove', 'shorten', 'identify')
+
+
+def render(xjson, fmt):
+    """ Render an XJson instance in the given output format
+
+        Parameters:
+            xjson - the XJson instance to render
+            fmt - one of 'json', 'jsonl' or 'yaml'
+
+        Returns:
+            a string containing the rendered document
+    """
+    if fmt == 'json':
+        return str(xjson)
+    elif fmt == 'jsonl':
+        # One document per line, context first like the JSON rendering
+        record = [('@context', dict(xjson.context.items()))]
+        record.extend(xjson.body.items())
+        return json.dumps(dict(record), separators=(',', ':'))
+    elif fmt == 'yaml':
+        return xjson.yaml()
+    else:
+        raise ValueError('Unknown output format {0}, allowed values '
+                         'are {1}'.format(fmt, tuple(FORMATS.keys())))
+
+
+def find_inputs(paths, pattern='*.xml'):
+    """ Expand a list of files, directories and globs into input files
+
+        Directories are searched recursively for files matching pattern.
+
+        Parameters:
+            paths - a list of file paths, directories or glob patterns
+            pattern - the filename pattern to use when searching directories
+
+        Returns:
+            a list of (path, root) tuples, where root is the directory
+            relative to which the output layout is mirrored
+    """
+    found, seen = [], set()
+    for path in paths:
+        if os.path.isdir(path):
+            root = path
+            matches = glob.glob(os.path.join(path, '**', pattern),
+                                recursive=True)
+        elif os.path.isfile(path):
+            root = os.path.dirname(path)
+            matches = [path]
+        else:
+            # Treat as a glob, mirroring from the non-magic part of the path
+            root = path.split('*')[0].split('?')[0].split('[')[0]
+            root = root if os.path.isdir(root) else os.path.dirname(root)
+            matches = glob.glob(path, recursive=True)
+
+        for match in sorted(matches):
+            if os.path.isfile(match) and match not in seen:
+                seen.add(match)
+                found.append((match, root))
+    return found
+
+
+def output_path(path, root, output_dir=None, fmt='json', layout='mirror'):
+    """ Work out where the converted version of a file should go
+
+        Parameters:
+            path - the input file path
+            root - the root directory for the input (see `find_inputs`)
+            output_dir - the directory to write into. Optional, if None
+                then outputs are written next to their inputs.
+            fmt - the output format, used to set the file extension
+            layout - either 'mirror' to recreate the input directory tree
+                under output_dir, or 'flat' to put all outputs directly in
+                output_dir. Inputs with the same name in different
+                directories clash in a flat layout (see `main`).
+
+        Returns:
+            the output file path
+    """
+    stem = os.path.splitext(path)[0] + FORMATS[fmt]
+    if output_dir is None:
+        return stem
+    if layout == 'flat':
+        return os.path.join(output_dir, os.path.basename(stem))
+    elif layout == 'mirror':
+        return os.path.join(output_dir, os.path.relpath(stem, root or '.'))
+    else:
+        raise ValueError('Unknown output layout {0}, allowed values '
+                         'are {1}'.format(layout, LAYOUTS))
+
+
+def is_up_to_date(path, outpath):
+    """ Check whether the output for a file is newer than the file itself
+    """
+    try:
+        return os.path.getmtime(outpath) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+
+def convert_file(task):
+    """ Convert a single file
+
+        This is the unit of work handed to each worker process, so it takes
+        a single tuple argument and never raises.
+
+        Parameters:
+            task - a tuple of (path, outpath, fmt, namespace_handling)
+
+        Returns:
+            a tuple of (path, nbytes, error), where error is None if the
+            conversion succeeded
+    """
+    path, outpath, fmt, namespace_handling = task
+    try:
+        with open(path, 'rb') as fhandle:
+            xjson = XJson.from_xml(fhandle,
+                                   namespace_handling=namespace_handling)
+        outdir = os.path.dirname(outpath)
+        if outdir:
+            os.makedirs(outdir, exist_ok=True)
+        with open(outpath, 'w') as fhandle:
+            fhandle.write(render(xjson, fmt))
+            fhandle.write('\n')
+        return path, os.path.getsize(path), None
+    except Exception as err:
+        return path, 0, '{0}: {1}'.format(type(err).__name__, err)
+
+
+class Progress(object):
+
+    """ Progress and throughput reporting for a batch of conversions
+
+        Parameters:
+            total - the total number of files to be converted
+            stream - the stream to write progress to. Optional, if None
+                then nothing is reported.
+    """
+
+    def __init__(self, total, stream=None):
+        super(Progress, self).__init__()
+        self.total = total
+        self.stream = stream
+        self.done = self.failed = self.nbytes = 0
+        self.started = time.time()
+
+    def update(self, path, nbytes, error=None):
+        """ Record a finished conversion
+        """
+        self.done += 1
+        self.nbytes += nbytes
+        if error is not None:
+            self.failed += 1
+        if self.stream is not None:
+            elapsed = max(time.time() - self.started, 1e-9)
+            line = '[{0}/{1}] {2:.1f} files/s, {3:.2f} MB/s {4}'.format(
+                self.done, self.total, self.done / elapsed,
+                self.nbytes / elapsed / 1e6, path)
+            if error is not None:
+                line += ' FAILED ({0})'.format(error)
+            print(line, file=self.stream)
+
+    def summary(self):
+        """ Return a one-line summary of the batch
+        """
+        elapsed = max(time.time() - self.started, 1e-9)
+        return ('Converted {0} of {1} files ({2} failed) in {3:.2f}s, '
+                '{4:.2f} MB/s').format(self.done - self.failed, self.total,
+                                       self.failed, elapsed,
+                                       self.nbytes / elapsed / 1e6)
+
+
+def convert_all(tasks, jobs=None, progress=None):
+    """ Convert a list of tasks, using a pool of worker processes
+
+        Parameters:
+            tasks - a list of task tuples (see `convert_file`)
+            jobs - the number of worker processes. Optional, defaults to
+                the number of CPUs. If jobs is 1 then everything is run in
+                this process.
+            progress - a Progress instance to report to. Optional.
+
+        Returns:
+            a list of (path, error) tuples for the failed conversions
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(tasks)))
+
+    failures = []
+    if jobs == 1:
+        results = map(convert_file, tasks)
+        pool = None
+    else:
+        # Small chunks keep the workers busy without starving progress
+        chunksize = max(1, len(tasks) // (jobs * 8))
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap_unordered(convert_file, tasks, chunksize)
+    try:
+        for path, nbytes, error in results:
+            if error is not None:
+                failures.append((path, error))
+            if progress is not None:
+                progress.update(path, nbytes, error)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return failures
+
+
+def make_parser():
+    """ Make the argument parser for the command line interface
+    """
+    parser = argparse.ArgumentParser(
+        prog='xjson',
+        description='Convert XML files to JSON-LD, JSONL or YAML')
+    parser.add_argument(
+        'inputs', nargs='+',
+        help='XML files, directories or glob patterns to convert')
+    parser.add_argument(
+        '-o', '--output', default=None,
+        help='output directory (default: next to each input file)')
+    parser.add_argument(
+        '-f', '--format', choices=tuple(FORMATS.keys()), default='json',
+        help='output format (default: json)')
+    parser.add_argument(
+        '-n', '--namespace-handling', choices=NAMESPACE_HANDLING,
+        default='shorten',
+        help='how to handle XML namespaces (default: shorten)')
+    parser.add_argument(
+        '-l', '--layout', choices=LAYOUTS, default='mirror',
+        help='output layout under the output directory (default: mirror)')
+    parser.add_argument(
+        '-p', '--pattern', default='*.xml',
+        help='filename pattern used when searching directories '
+             '(default: *.xml)')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument(
+        '--force', action='store_true',
+        help='convert files even if their output is up to date')
+    parser.add_argument(
+        '-q', '--quiet', action='store_true',
+        help="don't report progress")
+    return parser
+
+
+def main(argv=None):
+    """ Entry point for the command line interface
+
+        Returns:
+            the exit status, 0 if everything converted ok
+    """
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    stream = None if args.quiet else sys.stderr
+
+    # Work out what needs doing
+    tasks, skipped, outputs = [], 0, {}
+    for path, root in find_inputs(args.inputs, pattern=args.pattern):
+        outpath = output_path(path, root, output_dir=args.output,
+                              fmt=args.format, layout=args.layout)
+        clash = outputs.setdefault(os.path.normpath(outpath), path)
+        if clash != path:
+            # Don't let one output overwrite another
+            parser.error('{0} and {1} would both be written to {2}, use '
+                         'the mirror layout or rename one of them'.format(
+                             clash, path, outpath))
+        if not args.force and is_up_to_date(path, outpath):
+            skipped += 1
+            continue
+        tasks.append((path, outpath, args.format, args.namespace_handling))
+    if stream is not None and skipped:
+        print('Skipping {0} up-to-date files'.format(skipped), file=stream)
+    if not tasks:
+        return 0
+
+    # Convert everything
+    progress = Progress(len(tasks), stream=stream)
+    failures = convert_all(tasks, jobs=args.jobs, progress=progress)
+    if stream is not None:
+        print(progress.summary(), file=stream)
+    return 1 if failures else 0
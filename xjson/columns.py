@@ -0,0 +1,323 @@
+""" file:   columns.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Columnar flattening of feature collections
+
+    Rather than building a JSON tree for every feature and then walking it,
+    ColumnarTarget flattens features as the parser streams through them.
+    Each value in a feature (text or attribute) goes into a column named
+    by its path from the feature element, e.g.
+
+        gsml:MappedFeature/gsml:specification/@xlink:href
+
+    and each feature becomes one row. Anything outside the features (the
+    collection's bounding box etc) is converted as usual and kept in the
+    `header` attribute of the resulting ColumnStore.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+from .json_target import JSONLDTarget
+from .gml import is_feature_parent
+
+from lxml.etree import XML, XMLParser
+import csv
+import io
+import math
+
+# Types which can be inferred for columns, in order of preference
+COLUMN_TYPES = ('int', 'float', 'bool', 'str', 'object')
+_BOOLEANS = {'true': True, 'false': False}
+
+
+def _infer_type(values):
+    """ Infer the narrowest type which holds all the given (string) values
+    """
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        elif isinstance(value, list):
+            return 'object'
+        elif value.lower() in _BOOLEANS:
+            kinds.add('bool')
+            continue
+        try:
+            int(value)
+            kinds.add('int')
+            continue
+        except ValueError:
+            pass
+        try:
+            float(value)
+            kinds.add('float')
+        except ValueError:
+            return 'str'
+    if not kinds:
+        return 'str'
+    elif len(kinds) == 1:
+        return kinds.pop()
+    elif kinds == {'int', 'float'}:
+        return 'float'
+    else:
+        return 'str'
+
+
+def _convert(value, kind):
+    """ Convert a single value to the given column type
+    """
+    if value is None or kind in ('str', 'object'):
+        return value
+    elif kind == 'int':
+        return int(value)
+    elif kind == 'float':
+        return float(value)
+    elif kind == 'bool':
+        return _BOOLEANS[value.lower()]
+
+
+class ColumnStore(object):
+
+    """ A set of columns holding flattened features
+
+        Values are stored as strings while features are being added. Column
+        types are inferred when the columns are exported.
+
+        Attributes:
+            columns - a dictionary mapping paths to lists of raw values,
+                with None for features which don't have that path. Paths
+                which occur more than once in a feature hold a list.
+            nrows - the number of features
+            header - an XJson instance holding everything outside the
+                features. Only set by `from_xml`.
+    """
+
+    def __init__(self):
+        super(ColumnStore, self).__init__()
+        self.columns = {}
+        self.nrows = 0
+        self.header = None
+        self._dtypes = None
+
+    def __len__(self):
+        return self.nrows
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'ColumnStore(nrows={0}, columns={1})'.format(
+            self.nrows, list(self.columns.keys()))
+
+    def append_row(self, row):
+        """ Add a row to the store
+
+            Parameters:
+                row - a dictionary mapping paths to values
+        """
+        for path, value in row.items():
+            try:
+                self.columns[path].append(value)
+            except KeyError:
+                self.columns[path] = [None] * self.nrows + [value]
+        self.nrows += 1
+        if len(row) < len(self.columns):
+            for column in self.columns.values():
+                if len(column) < self.nrows:
+                    column.append(None)
+        self._dtypes = None
+
+    @property
+    def dtypes(self):
+        """ The inferred type of each column, one of 'int', 'float',
+            'bool', 'str' or 'object'
+        """
+        if self._dtypes is None:
+            self._dtypes = {path: _infer_type(column)
+                            for path, column in self.columns.items()}
+        return self._dtypes
+
+    def to_dict(self):
+        """ Return the columns as a dictionary of typed lists
+
+            Missing values are None.
+        """
+        dtypes = self.dtypes
+        return {path: [_convert(v, dtypes[path]) for v in column]
+                for path, column in self.columns.items()}
+
+    def to_numpy(self):
+        """ Return the columns as a NumPy structured array
+
+            Integer and boolean columns with missing values are stored as
+            floats (with NaN for missing values) and objects respectively.
+            String columns are stored as objects. Requires NumPy.
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('NumPy is required to export columns to a '
+                              'structured array')
+
+        fields, data = [], []
+        for path, column in self.to_dict().items():
+            kind = self.dtypes[path]
+            missing = any(v is None for v in column)
+            if kind == 'int' and not missing:
+                dtype = numpy.int64
+            elif kind in ('int', 'float'):
+                dtype = numpy.float64
+                column = [math.nan if v is None else v for v in column]
+            elif kind == 'bool' and not missing:
+                dtype = numpy.bool_
+            else:
+                dtype = object
+            fields.append((path, dtype))
+            data.append(column)
+        result = numpy.empty(self.nrows, dtype=fields)
+        for (path, _), column in zip(fields, data):
+            result[path] = column
+        return result
+
+    def to_csv(self, handle=None):
+        """ Write the columns out as CSV, with paths as the header row
+
+            Parameters:
+                handle - an open text file to write to. Optional, if None
+                    then the CSV is returned as a string.
+        """
+        output = handle if handle is not None else io.StringIO()
+        writer = csv.writer(output)
+        paths = list(self.columns.keys())
+        writer.writerow(paths)
+        columns = self.to_dict()
+        for idx in range(self.nrows):
+            row = []
+            for path in paths:
+                value = columns[path][idx]
+                if value is None:
+                    value = ''
+                elif isinstance(value, list):
+                    value = ' '.join(str(v) for v in value)
+                row.append(value)
+            writer.writerow(row)
+        if handle is None:
+            return output.getvalue()
+
+    @classmethod
+    def from_xml(cls, xml, namespace_handling=None, limits=None):
+        """ Flatten the features in some XML into columns
+
+            Parameters:
+                xml - either a handle to an open xml file, or a string of XML
+                namespace_handling - how to handle XML namespaces. Optional,
+                    defaults to 'shorten'.
+                limits - a ConversionLimits instance, as for
+                    `XJson.from_xml`. Optional.
+
+            Returns:
+                a new ColumnStore instance
+        """
+        if namespace_handling is None:
+            namespace_handling = 'shorten'
+        if isinstance(xml, io.IOBase):
+            xml = xml.read()
+        elif isinstance(xml, str):
+            xml = xml.encode('utf-8')
+        target = ColumnarTarget(namespace_handling=namespace_handling,
+                                limits=limits)
+        options = limits.parser_options() if limits is not None else {}
+        return XML(xml, XMLParser(target=target, **options))
+
+
+class ColumnarTarget(JSONLDTarget):
+
+    """ Target parser for lxml which flattens features into columns
+
+        Features are the children of member elements (see
+        `xjson.gml.FEATURE_PARENT_TAGS`) under the root element. Member
+        elements themselves are dropped, everything else is converted as
+        in JSONLDTarget.
+
+        Parameters:
+            namespace_handling - how XML namespaces should be handled, see
+                JSONLDTarget.
+            limits - a ConversionLimits instance, see JSONLDTarget. Limits
+                are only applied outside features.
+    """
+
+    def __init__(self, namespace_handling=None, limits=None):
+        super(ColumnarTarget, self).__init__(
+            namespace_handling=namespace_handling, limits=limits)
+        self.store = ColumnStore()
+        self._in_member = 0
+        self._path = self._row = None
+
+    def start(self, tag, attrib):
+        """ Start a new element
+        """
+        if self._path is None:
+            if len(self.stack) == 1 and not self._skip \
+                    and is_feature_parent(tag):
+                # Member element, so features come next
+                self._in_member += 1
+                return
+            elif not self._in_member:
+                return super(ColumnarTarget, self).start(tag, attrib)
+            self._path, self._row = [], {}
+
+        # We're inside a feature so add any attributes to the row
+        process = self.context.process
+        self._path.append(process(tag))
+        if attrib:
+            path = '/'.join(self._path) + '/@'
+            for key, value in attrib.items():
+                self._add(path + process(key), value)
+
+    def data(self, data):
+        """ Add text to the current row
+        """
+        if self._path is None:
+            if not self._in_member:
+                super(ColumnarTarget, self).data(data)
+            return
+        data = data.strip()
+        if data:
+            self._add('/'.join(self._path), data)
+
+    def _add(self, path, value):
+        """ Add a value to the current row
+        """
+        try:
+            current = self._row[path]
+        except KeyError:
+            self._row[path] = value
+            return
+        if isinstance(current, list):
+            current.append(value)
+        else:
+            self._row[path] = [current, value]
+
+    def end(self, tag):
+        """ Finish the current element, storing the row if it's a feature
+        """
+        if self._path is None:
+            if self._in_member:
+                self._in_member -= 1
+                return
+            return super(ColumnarTarget, self).end(tag)
+        self._path.pop()
+        if not self._path:
+            self.store.append_row(self._row)
+            self._path = self._row = None
+
+    def close(self):
+        """ Return the finished column store
+        """
+        body, context = super(ColumnarTarget, self).close()
+        store, self.store = self.store, ColumnStore()
+        self._in_member = 0
+        self._path = self._row = None
+        store.header = XJson(body=body, context=context)
+        return store
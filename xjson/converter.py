@@ -0,0 +1,91 @@
+""" file:   converter.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Conversion sessions for many documents
+
+    `XJson.from_xml` builds a new parser and target for every call, and
+    every document starts with empty tag caches. For lots of small
+    documents from the same source that setup is a noticeable share of the
+    cost. An XJsonConverter keeps one parser and target for the whole
+    session, and shares processed tags between documents which declare the
+    same namespaces, while still giving each document its own context.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+from .json_target import JSONLDTarget
+
+from lxml.etree import XML, XMLParser
+import io
+
+
+class XJsonConverter(object):
+
+    """ A session for converting many documents with the same options
+
+        Converters aren't thread-safe (lxml parsers can't be shared between
+        threads), so use one converter per thread.
+
+        Parameters:
+            namespace_handling, limits, plan, interner - as for
+                `XJson.from_xml`
+
+        Attributes:
+            documents - the number of documents converted in this session
+    """
+
+    def __init__(self, namespace_handling=None, limits=None, plan=None,
+                 interner=None):
+        super(XJsonConverter, self).__init__()
+        if namespace_handling is None:
+            namespace_handling = 'shorten'
+        self.namespace_handling = namespace_handling
+        self.limits = limits
+        self.target = JSONLDTarget(namespace_handling=namespace_handling,
+                                   limits=limits, plan=plan,
+                                   interner=interner, tag_caches={})
+        options = limits.parser_options() if limits is not None else {}
+        self.parser = XMLParser(target=self.target, **options)
+        self.documents = 0
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'XJsonConverter(namespace_handling={0}, documents={1})'.format(
+            self.namespace_handling, self.documents)
+
+    def convert(self, xml):
+        """ Convert a document
+
+            Parameters:
+                xml - either a handle to an open xml file, or a string of XML
+
+            Returns:
+                the new XJson instance containing the record
+        """
+        if isinstance(xml, io.IOBase):
+            xml = xml.read()
+        elif isinstance(xml, str):
+            xml = xml.encode('utf-8')
+        body, context = XML(xml, self.parser)
+        self.documents += 1
+        result = XJson(body=body, context=context)
+        if self.target.truncated:
+            result.truncated = True
+        return result
+
+    __call__ = convert
+
+    def convert_many(self, documents):
+        """ Convert a sequence of documents
+
+            Parameters:
+                documents - an iterable of XML strings or open file handles
+
+            Returns:
+                an iterator over the converted XJson instances
+        """
+        for xml in documents:
+            yield self.convert(xml)
@@ -5,15 +5,257 @@
     date:   Wednesday May 1, 2013
 
     description: Some basic metaclasses etc for defining pysiss classes
+
+    The metadata for a decorated class is compiled once into a frozen
+    template which every instance shares. Instances only get their own copy
+    of the root element when they change it, so creating lots of instances
+    costs nothing for the metadata until it is used.
 """
 
 from __future__ import print_function, division
 
 from .xjson import XJson, XJSON_NAMESPACE
+from .json_context import JSONLDContext
+from .hashcons import FrozenDict
 
 from uuid import uuid5 as uuid
 from uuid import NAMESPACE_DNS
-import types
+
+
+def freeze(value):
+    """ Make an immutable copy of a converted tree
+
+        Dictionaries become FrozenDicts and lists become tuples.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def _qualify(tag):
+    """ Put a tag in the xjson namespace, unless it already has one
+    """
+    return tag if tag.startswith('{') else XJSON_NAMESPACE + tag
+
+
+def _element(context, text=None, attrib=None, subelements=None):
+    """ Build the converted body of an element, in the same shape as
+        JSONLDTarget would give for the equivalent XML
+    """
+    elem = {}
+    if attrib:
+        elem['#attributes'] = {context.process(_qualify(k)):
+                               context.process_value(v)
+                               for k, v in attrib.items()}
+    for subelement in subelements or ():
+        subelement = dict(subelement)
+        key = context.process(_qualify(subelement.pop('tag')))
+        value = _element(context, **subelement)
+        if key in elem:
+            # Repeated elements become lists
+            if not isinstance(elem[key], list):
+                elem[key] = [elem[key]]
+            elem[key].append(value)
+        else:
+            elem[key] = value
+    if text is not None:
+        if not elem:
+            return text
+        elem['#data'] = text
+    return elem
+
+
+class MetadataTemplate(object):
+
+    """ The frozen metadata shared by every instance of a class
+
+        Parameters:
+            tag - the tag for the root element
+            ident - the identifier for the metadata
+            subelements - a list of dictionaries, defining subelements of
+                the root element. Each has a 'tag', and optionally 'text',
+                'attrib' (a dictionary of attributes) and 'subelements' (a
+                list of nested subelements). Tags without a namespace are
+                put in the xjson namespace.
+
+        Attributes:
+            key - the key for the root element
+            xjson - an XJson instance holding the frozen metadata
+    """
+
+    def __init__(self, tag, ident=None, subelements=None):
+        super(MetadataTemplate, self).__init__()
+        context = JSONLDContext(namespace_handling='remove')
+        self.key = context.process(_qualify(tag))
+        body = {self.key: _element(context, subelements=subelements)}
+        self.xjson = XJson(body=freeze(body), ident=ident, context=context)
+        self._str = self._bytes = None
+
+    def __str__(self):
+        if self._str is None:
+            self._str = str(self.xjson)
+        return self._str
+
+    def to_bytes(self):
+        """ Serialize the template to the compact binary format
+        """
+        if self._bytes is None:
+            self._bytes = self.xjson.to_bytes()
+        return self._bytes
+
+
+class MetadataView(object):
+
+    """ An instance's view of its class's metadata
+
+        Reads go straight to the shared template until the instance sets
+        something, at which point it gets its own (shallow) copy of the
+        root element - subtrees are still shared with the template.
+        Serializations are cached until the metadata next changes.
+
+        Keys are the local names of subelements of the root element, e.g.
+        `obj.xjson['name'] = 'Granite'`. New keys are put in the xjson
+        namespace unless they have one already (e.g. '{ns}tag'), and the
+        instance gets its own copy of the JSON-LD context to define them in.
+
+        Parameters:
+            template - the MetadataTemplate for the class
+    """
+
+    __slots__ = ('template', '_root', '_context', '_str', '_bytes')
+
+    def __init__(self, template):
+        super(MetadataView, self).__init__()
+        self.template = template
+        self._root = self._context = None
+        self._str = self._bytes = None
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'MetadataView(ident={0}, body={1})'.format(self.ident,
+                                                          self.body)
+
+    @property
+    def ident(self):
+        """ The identifier for the metadata
+        """
+        return self.template.xjson.ident
+
+    @property
+    def context(self):
+        """ The JSON-LD context for the metadata
+        """
+        if self._context is None:
+            return self.template.xjson.context
+        return self._context
+
+    @property
+    def root(self):
+        """ The body of the root element
+        """
+        if self._root is None:
+            return self.template.xjson.body[self.template.key]
+        return self._root
+
+    @property
+    def body(self):
+        """ The metadata body
+        """
+        if self._root is None:
+            return self.template.xjson.body
+        return {self.template.key: self._root}
+
+    @property
+    def modified(self):
+        """ Whether this instance has its own copy of the metadata
+        """
+        return self._root is not None
+
+    def _copy(self):
+        """ Copy the root element before changing it
+        """
+        if self._root is None:
+            root = self.template.xjson.body[self.template.key]
+            self._root = dict(root) if isinstance(root, dict) else {}
+        self._str = self._bytes = None
+        return self._root
+
+    def __getitem__(self, key):
+        return self.root[key]
+
+    def get(self, key, default=None):
+        """ Return the value for a key, or default if it isn't set
+        """
+        root = self.root
+        return root.get(key, default) if isinstance(root, dict) else default
+
+    def __contains__(self, key):
+        root = self.root
+        return isinstance(root, dict) and key in root
+
+    def __setitem__(self, key, value):
+        root = self._copy()
+        if key not in root and key not in self.context.keys():
+            # Define new keys in the instance's own copy of the context
+            if self._context is None:
+                self._context = self.template.xjson.context.copy()
+            key = self._context.process(_qualify(key))
+        root[key] = value
+
+    def __delitem__(self, key):
+        del self._copy()[key]
+
+    def reset(self):
+        """ Go back to the class's metadata
+        """
+        self._root = self._context = self._str = self._bytes = None
+
+    def to_xjson(self):
+        """ Return an XJson instance holding the metadata
+        """
+        if self._root is None:
+            return self.template.xjson
+        return XJson(body=self.body, ident=self.ident, context=self.context)
+
+    def __str__(self):
+        if self._root is None:
+            return str(self.template)
+        if self._str is None:
+            self._str = str(self.to_xjson())
+        return self._str
+
+    def to_bytes(self):
+        """ Serialize the metadata to the compact binary format
+        """
+        if self._root is None:
+            return self.template.to_bytes()
+        if self._bytes is None:
+            self._bytes = self.to_xjson().to_bytes()
+        return self._bytes
+
+
+class _MetadataDescriptor(object):
+
+    """ Gives the class its XJson template, and instances their own view
+
+        Views are only made when an instance first asks for one, and are
+        then stored in the instance's __dict__ (which takes precedence over
+        this descriptor from then on).
+    """
+
+    def __init__(self, template):
+        super(_MetadataDescriptor, self).__init__()
+        self.template = template
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self.template.xjson
+        view = MetadataView(self.template)
+        instance.__dict__['xjson'] = view
+        return view
 
 
 def with_xjson(tag, subelements=None):
@@ -22,13 +264,13 @@ def with_xjson(tag, subelements=None):
         This decorator generates a UUID for a class at initialization,
         and defines the class __eq__ method to use this UUID.
 
-        This decorator generates a.xjson record for a class at
-        initialization, and defines a set of methods for serializing and
-        deserializing that.xjson
+        The xjson record for the class is compiled once into a frozen
+        template, available as `cls.xjson`. Each instance's `xjson`
+        attribute is a MetadataView of the template, which only copies the
+        metadata if the instance changes it.
 
         The optional subelements parameter allows classes to define an initial
-        structure for their.xjson tree. Subelements should be a dictionary 
-        defining keyword arguments which can be passed to `XJson.add_subelement` 
+        structure for their.xjson tree (see `MetadataTemplate`).
 
         Parameters:
             tag - the tag for the.xjson tree
@@ -42,13 +284,9 @@ def with_xjson(tag, subelements=None):
         cls.uuid = uuid(NAMESPACE_DNS, tag)
         if not hasattr(cls, 'ident') or cls.ident is None:
             cls.ident = str(cls.uuid)
-        cls.xjson = XJson(tag=XJSON_NAMESPACE + tag,
-                                ident=cls.ident)
-
-        # Add subelements if required
-        if subelements:
-            for subelement in subelements:
-                cls.xjson.add_subelement(**subelement)
+        cls.xjson_template = MetadataTemplate(tag, ident=cls.ident,
+                                              subelements=subelements)
+        cls.xjson = _MetadataDescriptor(cls.xjson_template)
 
         # Add equality test to match instances if their uuids match
         setattr(cls, '__eq__', lambda self, other: self.uuid == other.uuid)
@@ -58,5 +296,5 @@ def with_xjson(tag, subelements=None):
                 Class instances are equal if their UUIDs match
             """
 
-        return cls  
+        return cls
     return _md_wrapper
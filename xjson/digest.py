@@ -0,0 +1,67 @@
+""" file:   digest.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Content digests for XJson documents
+
+    The digest is taken over a canonical serialization of the namespace
+    handling, context and body - keys are sorted (so attribute order doesn't
+    matter) while list order is kept. Lazily decoded bodies are materialized
+    first, so a document has the same digest however it was loaded.
+
+    Idents are UUIDs derived from the digest in a fixed namespace, so the
+    same content gets the same ident in every version of the package.
+"""
+
+from __future__ import print_function, division
+
+from .binary import materialize
+
+import hashlib
+import json
+import uuid
+
+DIGEST_SIZE = 16
+
+# Namespace for content idents - this must never change, otherwise idents
+# which have already been stored stop matching
+IDENT_NAMESPACE = uuid.UUID('1313ceea-bdf8-5f21-a416-537011562ac7')
+
+
+def canonical(body, context):
+    """ Return the canonical serialization of a document as bytes
+
+        Parameters:
+            body - the document body
+            context - the JSONLDContext for the document
+    """
+    return json.dumps(
+        [context.namespace_handling, dict(context.items()), body],
+        sort_keys=True, separators=(',', ':'),
+        default=materialize).encode('utf-8')
+
+
+def digest(body, context):
+    """ Compute the content digest of a document
+
+        Parameters:
+            body - the document body
+            context - the JSONLDContext for the document
+
+        Returns:
+            the digest as a hex string
+    """
+    return hashlib.blake2b(canonical(body, context),
+                           digest_size=DIGEST_SIZE).hexdigest()
+
+
+def content_ident(digest):
+    """ Return the ident for a document with the given digest
+
+        Parameters:
+            digest - the content digest, as a hex string
+
+        Returns:
+            a uuid.UUID
+    """
+    return uuid.uuid5(IDENT_NAMESPACE, digest)
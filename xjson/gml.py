@@ -0,0 +1,211 @@
+""" file:   gml.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Helpers for dealing with GML feature collections
+
+    WFS responses wrap each feature in a member element (gml:featureMember
+    in WFS 1.x, wfs:member in WFS 2.0) under the root FeatureCollection.
+    These helpers find members and features in converted documents,
+    whatever namespace handling was used for the conversion.
+"""
+
+from __future__ import print_function, division
+
+from .json_target import JSONLDTarget
+
+# Local names of the elements which wrap a single feature
+MEMBER_TAGS = ('featureMember', 'member')
+
+# Local names of the elements which wrap one or more features
+FEATURE_PARENT_TAGS = MEMBER_TAGS + ('featureMembers',)
+
+
+def localname(tag):
+    """ Return the local part of a tag
+
+        Works with lxml '{namespace}local' tags as well as the keys
+        generated by any of the namespace handling options (e.g.
+        'gml:featureMember', 'featureMember',
+        'http://www.opengis.net/gml/featureMember').
+    """
+    for seperator in ('}', '/', ':'):
+        tag = tag.rpartition(seperator)[2]
+    return tag
+
+
+def is_member_tag(tag):
+    """ Check whether a tag denotes a feature member
+    """
+    return localname(tag) in MEMBER_TAGS
+
+
+def is_feature_parent(tag):
+    """ Check whether a tag denotes an element whose children are features
+    """
+    return localname(tag) in FEATURE_PARENT_TAGS
+
+
+def member_key(root):
+    """ Find the key holding feature members in a root element
+
+        Parameters:
+            root - the converted body of a FeatureCollection element
+
+        Returns:
+            the member key, or None if there are no members
+    """
+    if isinstance(root, dict):
+        for key in root.keys():
+            if not key.startswith('#') and is_member_tag(key):
+                return key
+    return None
+
+
+def members(root, key=None):
+    """ Return the list of members from a converted FeatureCollection
+
+        Parameters:
+            root - the converted body of a FeatureCollection element.
+                If this is a list then the collection has been converted to
+                a container and the list is the members.
+            key - the member key. Optional, found using `member_key` if not
+                given.
+
+        Returns:
+            a list of converted members
+    """
+    if isinstance(root, list):
+        return root
+    key = key or member_key(root)
+    if key is None:
+        return []
+    value = root[key]
+    return value if isinstance(value, list) else [value]
+
+
+def feature_id(attributes):
+    """ Find the identifier of a feature from its attributes
+
+        Looks for a gml:id attribute (or a WFS 1.0 fid), in any namespace
+        handling.
+
+        Parameters:
+            attributes - a dictionary of attributes, either raw from lxml
+                or from a converted '#attributes' entry
+
+        Returns:
+            the identifier, or None if the feature doesn't have one
+    """
+    if not attributes:
+        return None
+    for key, value in attributes.items():
+        if localname(key) in ('id', 'fid'):
+            return value
+    return None
+
+
+class FeatureTarget(JSONLDTarget):
+
+    """ A JSONLDTarget which calls hooks for each feature in a collection
+
+        Features are the children of member elements (see
+        `FEATURE_PARENT_TAGS`) under the root element. Subclasses override
+        `start_feature` and `end_feature`.
+
+        Parameters:
+            limit - the maximum number of features to convert. Conversion
+                stops after this many features (see `JSONLDTarget.stop`).
+                Optional, if None then every feature is converted.
+            others are as for JSONLDTarget
+
+        Attributes:
+            feature_count - the number of features converted so far
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.limit = kwargs.pop('limit', None)
+        super(FeatureTarget, self).__init__(*args, **kwargs)
+        self._in_feature = self._closing_feature = False
+        self._dropped = False
+
+    def _reset_counters(self):
+        """ Reset the counters used to enforce limits
+        """
+        super(FeatureTarget, self)._reset_counters()
+        self.feature_count = 0
+
+    def start(self, tag, attrib):
+        """ Start generating a new object
+        """
+        depth = len(self.stack)
+        super(FeatureTarget, self).start(tag, attrib)
+        if depth == 2 and len(self.stack) == 3 \
+                and is_feature_parent(self.stack[1][0]):
+            self._in_feature = True
+            self.start_feature(tag, attrib)
+
+    def end(self, tag):
+        """ Finish generating the currently building object
+        """
+        self._closing_feature = self._in_feature and not self._skip \
+            and len(self.stack) == 3
+        super(FeatureTarget, self).end(tag)
+
+    def _attach(self, tag, elem):
+        """ Store a finished element, passing features to `end_feature`
+        """
+        if self._closing_feature:
+            self._in_feature = self._closing_feature = False
+            elem = self.end_feature(tag, elem)
+            self.feature_count += 1
+            if self.limit is not None and self.feature_count >= self.limit:
+                self.stop()
+            if elem is None:
+                # Leave it out, and its member too if nothing else is in it
+                self._dropped = True
+                return
+        elif self._dropped and len(self.stack) == 1:
+            self._dropped = False
+            if not elem:
+                return
+        super(FeatureTarget, self)._attach(tag, elem)
+
+    def finish(self):
+        """ Finish the document early, dropping any partial feature
+        """
+        if self._in_feature:
+            self.truncated = True
+            self._skip = 0
+            del self.stack[3:]
+            self.stack.pop()
+            self._in_feature = False
+
+            # Drop the member too if that was all that was in it
+            if not self.stack[-1][1].keys():
+                self.stack.pop()
+        return super(FeatureTarget, self).finish()
+
+    def start_feature(self, tag, attrib):
+        """ Called when a feature starts
+
+            Parameters:
+                tag - the raw lxml tag of the feature
+                attrib - the raw attributes of the feature
+        """
+        pass
+
+    def end_feature(self, tag, elem):
+        """ Called when a feature has been converted
+
+            Parameters:
+                tag - the processed tag of the feature
+                elem - the converted feature
+
+            Returns:
+                the converted feature to store in the document, which can
+                be replaced by subclasses, or None to leave the feature (and
+                its member element, if that is then empty) out of the
+                document
+        """
+        return elem
@@ -0,0 +1,364 @@
+""" file:   harvest.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Paging through WFS GetFeature endpoints
+
+    Fetching a large WFS layer one page at a time is latency bound - most
+    of the time is spent waiting for the server. WFSHarvester keeps several
+    pages in flight at once over a pool of keep-alive HTTP connections, and
+    feeds each response into the converter as it arrives rather than
+    buffering it first.
+
+    Pages are requested lazily: at most `max_in_flight` pages are fetched
+    ahead of the consumer, so if whatever is using the pages is slow then
+    the harvester waits for it rather than piling up converted pages in
+    memory. With a feature limit, no pages are requested past the limit and
+    the last page is only parsed as far as it is needed.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+from .json_target import feed_parser
+from .gml import FeatureTarget, localname, members
+
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+import collections
+import http.client
+import logging
+import queue
+import urllib.parse
+
+LOGGER = logging.getLogger('pysiss')
+
+# Size of the chunks read from responses and fed to the parser
+CHUNK_SIZE = 64 * 1024
+
+# Attributes on the FeatureCollection giving the number of features
+NUMBER_ATTRIBUTES = ('numberReturned', 'numberOfFeatures')
+
+
+class HarvestError(IOError):
+
+    """ Raised when a WFS request fails or returns an exception report
+    """
+
+    pass
+
+
+def page_params(version, start, count):
+    """ Return the paging parameters for a GetFeature request
+
+        WFS 2.0 pages with startIndex and count. WFS 1.x only has
+        maxFeatures, but most servers (GeoServer, MapServer, deegree)
+        accept startIndex as a vendor parameter.
+
+        Parameters:
+            version - the WFS version string, e.g. '2.0.0' or '1.1.0'
+            start - the index of the first feature in the page
+            count - the number of features in the page
+
+        Returns:
+            a dictionary of query parameters
+    """
+    if version.startswith('1.'):
+        return {'startIndex': start, 'maxFeatures': count}
+    return {'startIndex': start, 'count': count}
+
+
+def count_features(xjson):
+    """ Count the features in a converted feature collection page
+
+        Uses the numberReturned (WFS 2.0) or numberOfFeatures (WFS 1.1)
+        attribute if the server gave one, and counts members otherwise.
+    """
+    for root in xjson.body.values():
+        if isinstance(root, dict):
+            for key, value in (root.get('#attributes') or {}).items():
+                if localname(key) in NUMBER_ATTRIBUTES:
+                    try:
+                        return int(value)
+                    except ValueError:
+                        pass
+            for key, value in root.items():
+                if localname(key) == 'featureMembers' \
+                        and isinstance(value, dict):
+                    return sum(len(v) if isinstance(v, list) else 1
+                               for k, v in value.items()
+                               if not k.startswith('#'))
+        return len(members(root))
+    return 0
+
+
+class ConnectionPool(object):
+
+    """ A pool of keep-alive HTTP connections to a single host
+
+        Parameters:
+            scheme - 'http' or 'https'
+            netloc - the host (and optional port) to connect to
+            size - the maximum number of idle connections to keep
+            timeout - the socket timeout in seconds
+    """
+
+    def __init__(self, scheme, netloc, size=4, timeout=30):
+        super(ConnectionPool, self).__init__()
+        if scheme == 'https':
+            self._factory = http.client.HTTPSConnection
+        elif scheme == 'http':
+            self._factory = http.client.HTTPConnection
+        else:
+            raise ValueError('Invalid scheme {0}, allowed values are '
+                             "('http', 'https')".format(scheme))
+        self.netloc = netloc
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.connections_made = 0
+
+    def _get(self):
+        """ Get an idle connection, or make a new one
+        """
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            self.connections_made += 1
+            return self._factory(self.netloc, timeout=self.timeout), False
+
+    def _put(self, connection):
+        """ Return a connection to the pool
+        """
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def get(self, path, handler):
+        """ Make a GET request, passing the response to handler
+
+            The response has to be read by handler before the connection
+            can be reused, so connections are closed if the handler stops
+            reading part way through. If an idle connection turns out to have been
+            closed by the server, the request is retried on a fresh one.
+
+            Parameters:
+                path - the path and query string to request
+                handler - a function taking an http.client.HTTPResponse
+
+            Returns:
+                the value returned by handler
+        """
+        while True:
+            connection, reused = self._get()
+            try:
+                connection.request('GET', path,
+                                   headers={'Accept-Encoding': 'identity'})
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                if reused:
+                    continue
+                raise
+            try:
+                result = handler(response)
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close or not response.isclosed():
+                connection.close()
+            else:
+                self._put(connection)
+            return result
+
+    def close(self):
+        """ Close all the idle connections
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class WFSHarvester(object):
+
+    """ Pages through a WFS GetFeature endpoint
+
+        Iterating over the harvester gives an XJson instance for each page,
+        in order. Harvesting stops at the first page with fewer features
+        than the page size.
+
+        Parameters:
+            url - the WFS endpoint URL. Any query parameters in the URL are
+                kept.
+            typename - the feature type to request
+            version - the WFS version. Optional, defaults to '2.0.0'.
+            page_size - the number of features per page. Optional, defaults
+                to 100.
+            max_in_flight - the maximum number of pages to fetch ahead of
+                the consumer. This is also the number of connections used.
+                Optional, defaults to 4.
+            max_pages - stop after this many pages. Optional, defaults to
+                None (i.e. get everything).
+            limit - stop after this many features. Pages past the limit
+                aren't requested, and the last page only asks for (and
+                parses) the features that are needed. Optional, defaults
+                to None (i.e. get everything).
+            max_bytes - the maximum number of bytes of XML to parse from
+                each page. A page which is cut short is marked as
+                truncated, and harvesting stops after it. Optional.
+            namespace_handling, limits - as for `XJson.from_xml`
+            params - a dictionary of extra query parameters (e.g. a filter
+                or srsName). Optional.
+            timeout - the socket timeout in seconds. Optional, defaults to
+                30.
+    """
+
+    def __init__(self, url, typename, version='2.0.0', page_size=100,
+                 max_in_flight=4, max_pages=None, limit=None, max_bytes=None,
+                 namespace_handling=None, limits=None, params=None,
+                 timeout=30):
+        super(WFSHarvester, self).__init__()
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+        parts = urllib.parse.urlsplit(url)
+        self.pool = ConnectionPool(parts.scheme, parts.netloc,
+                                   size=max_in_flight, timeout=timeout)
+        self.path = parts.path or '/'
+        self.typename = typename
+        self.version = version
+        self.page_size = page_size
+        self.max_in_flight = max_in_flight
+        self.max_pages = max_pages
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.namespace_handling = namespace_handling or 'shorten'
+        self.limits = limits
+
+        # Base query parameters
+        self.params = collections.OrderedDict(
+            urllib.parse.parse_qsl(parts.query))
+        type_key = 'typeName' if version.startswith('1.') else 'typeNames'
+        self.params.update([('service', 'WFS'), ('version', version),
+                            ('request', 'GetFeature'), (type_key, typename)])
+        if params:
+            self.params.update(params)
+
+    def page_count(self, page):
+        """ Return the number of features to ask for in a page
+
+            This is the page size, except for the last page before the
+            feature limit. Pages past the limit get 0.
+        """
+        if self.limit is None:
+            return self.page_size
+        return max(min(self.page_size, self.limit - page * self.page_size),
+                   0)
+
+    def page_path(self, page):
+        """ Return the path and query for a page
+        """
+        params = collections.OrderedDict(self.params)
+        params.update(page_params(self.version, page * self.page_size,
+                                  self.page_count(page)))
+        return self.path + '?' + urllib.parse.urlencode(params)
+
+    def _convert(self, response, limit=None):
+        """ Convert a response, feeding the parser as data arrives
+
+            Parsing stops after limit features or max_bytes bytes, in
+            which case the rest of the response isn't read.
+        """
+        if response.status != 200:
+            response.read()
+            raise HarvestError('WFS request failed with HTTP {0} {1}'.format(
+                response.status, response.reason))
+        target = FeatureTarget(namespace_handling=self.namespace_handling,
+                               limits=self.limits, limit=limit)
+        options = self.limits.parser_options() \
+            if self.limits is not None else {}
+        parser = etree.XMLParser(target=target, **options)
+        body, context = feed_parser(parser, target, response,
+                                    max_bytes=self.max_bytes,
+                                    chunk_size=CHUNK_SIZE)
+        if body is None:
+            raise HarvestError('No elements found in the first {0} bytes '
+                               'of the response'.format(self.max_bytes))
+        result = XJson(body=body, context=context)
+        if target.truncated:
+            result.truncated = True
+        return result
+
+    def fetch(self, page):
+        """ Fetch and convert a single page
+
+            Parameters:
+                page - the page number, starting from 0
+
+            Returns:
+                the XJson instance for the page
+        """
+        # Only cut the page short if it's the last one we need, since a
+        # feature limit of a whole page would mark full pages as truncated
+        count = self.page_count(page)
+        limit = count if count < self.page_size else None
+        result = self.pool.get(self.page_path(page),
+                               lambda response: self._convert(response,
+                                                              limit))
+        for tag, root in result.body.items():
+            if localname(tag) == 'ExceptionReport':
+                raise HarvestError('WFS returned an exception: {0}'.format(
+                    root))
+        return result
+
+    def __iter__(self):
+        """ Iterate over the converted pages
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        pending = collections.deque()
+        next_page = harvested = 0
+        try:
+            while True:
+                # Keep the window full
+                while len(pending) < self.max_in_flight and \
+                        (self.max_pages is None
+                         or next_page < self.max_pages) and \
+                        self.page_count(next_page) > 0:
+                    pending.append(executor.submit(self.fetch, next_page))
+                    next_page += 1
+                if not pending:
+                    return
+
+                # Hand over the next page, this is where we block if the
+                # consumer is slow
+                page = pending.popleft().result()
+                nfeatures = count_features(page)
+                if nfeatures:
+                    yield page
+                harvested += nfeatures
+                if nfeatures < self.page_size or (
+                        self.limit is not None and harvested >= self.limit) \
+                        or (self.max_bytes is not None and page.truncated):
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self.pool.close()
+
+    def features(self):
+        """ Iterate over the features in every page
+
+            Returns:
+                an iterator over the converted members of each page, up to
+                the feature limit
+        """
+        count = 0
+        for page in self:
+            for root in page.body.values():
+                for member in members(root):
+                    if self.limit is not None and count >= self.limit:
+                        return
+                    count += 1
+                    yield member
@@ -0,0 +1,188 @@
+""" file:   hashcons.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Sharing of repeated identical subtrees
+
+    WFS and GeoSciML documents repeat the same small structures (vocabulary
+    references, CRS blocks, CGI_TermValues...) thousands of times. Since
+    JSONLDTarget builds documents bottom-up, each subtree is finished before
+    its parent, so we can look up every finished subtree in a table and
+    reuse a single shared instance for identical ones (hash-consing).
+
+    Shared subtrees are FrozenDicts, which serialize like ordinary dicts but
+    can't be modified, since a change to one would show up everywhere it is
+    shared.
+
+    Only small subtrees are worth sharing: whole features are almost never
+    repeated, so the interner skips subtrees with more than `max_size`
+    leaves, and drops the least recently used entries once a table holds
+    `max_entries` of them.
+"""
+
+from __future__ import print_function, division
+
+import collections
+import threading
+
+
+class FrozenDict(dict):
+
+    """ A dictionary which can't be modified after it is created
+
+        Raises a TypeError on any attempt to modify it.
+    """
+
+    __slots__ = ('_hash', '_size')
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('FrozenDict instances are shared and can not be '
+                        'modified, copy with dict(...) first')
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(tuple(self.items()))
+            return self._hash
+
+    def __eq__(self, other):
+        """ Equality test
+
+            Two FrozenDicts are only equal if their keys are in the same
+            order too, since they are shared in place of each other.
+        """
+        if isinstance(other, FrozenDict):
+            return self is other or (
+                len(self) == len(other)
+                and tuple(self.items()) == tuple(other.items()))
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def __repr__(self):
+        return 'FrozenDict({0})'.format(dict.__repr__(self))
+
+
+class SubtreeInterner(object):
+
+    """ A table of shared strings and subtrees
+
+        One interner can be shared between many conversions (and threads),
+        so that documents in a registry share structure with each other as
+        well. Subtrees holding lists (i.e. repeated elements) are never
+        shared themselves, since lists are mutable, but their children are.
+        Neither are subtrees holding more than max_size leaves (strings and
+        Nones), nor the subtrees containing them.
+
+        Parameters:
+            max_size - the largest subtree to share, as a number of leaves.
+                Defaults to 16.
+            max_entries - the number of strings and of subtrees to keep,
+                discarding the least recently used ones beyond that. Values
+                already shared stay shared, later copies just don't join
+                them. Defaults to 65536.
+
+        Attributes:
+            hits - the number of subtrees which were replaced with a shared
+                instance
+    """
+
+    def __init__(self, max_size=16, max_entries=65536):
+        super(SubtreeInterner, self).__init__()
+        if max_size < 1 or max_entries < 1:
+            raise ValueError('Invalid interner bounds {0}, {1}: both must '
+                             'be at least 1'.format(max_size, max_entries))
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self._strings = collections.OrderedDict()
+        self._subtrees = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._subtrees)
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'SubtreeInterner(strings={0}, subtrees={1}, hits={2})'.format(
+            len(self._strings), len(self._subtrees), self.hits)
+
+    def _share(self, table, value):
+        """ Return the shared instance of value from a table, adding it if
+            it isn't there yet. Callers must hold the lock.
+        """
+        shared = table.get(value)
+        if shared is None:
+            table[value] = value
+            if len(table) > self.max_entries:
+                table.popitem(last=False)
+            return value
+        table.move_to_end(value)
+        return shared
+
+    def intern_string(self, string):
+        """ Return the shared instance of a string
+        """
+        with self._lock:
+            return self._share(self._strings, string)
+
+    def intern(self, value):
+        """ Return the shared instance of a finished subtree
+
+            The values in the subtree should already have been interned
+            (which happens automatically when building bottom-up), except
+            for plain dictionaries of attributes.
+
+            Parameters:
+                value - a string, None, list or dict
+
+            Returns:
+                the shared instance of value, or value itself if it can't
+                be shared
+        """
+        if isinstance(value, str):
+            return self.intern_string(value)
+        elif type(value) is not dict:
+            return value
+        with self._lock:
+            return self._intern(value)
+
+    def _intern(self, value):
+        """ Intern a dictionary, with the lock held
+        """
+        # Intern keys and values. Children should already be shared, so
+        # comparing candidates in the table is cheap (identity first)
+        share, strings = self._share, self._strings
+        items, size = [], 0
+        for tag, child in value.items():
+            tag = share(strings, tag)
+            if isinstance(child, str):
+                child = share(strings, child)
+                size += 1
+            elif child is None:
+                size += 1
+            else:
+                if type(child) is dict:
+                    child = self._intern(child)
+                # Lists, large subtrees and anything holding them are
+                # never shared
+                size += getattr(child, '_size', self.max_size + 1)
+            items.append((tag, child))
+
+        if size > self.max_size:
+            return dict(items)
+        candidate = FrozenDict(items)
+        candidate._size = size
+        shared = self._share(self._subtrees, candidate)
+        if shared is not candidate:
+            self.hits += 1
+        return shared
@@ -0,0 +1,379 @@
+""" file:   incremental.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Incremental re-conversion of repeatedly polled documents
+
+    When the same WFS endpoint is polled over and over, only a few features
+    change between polls. Here each feature is fingerprinted from its parse
+    events before it is converted. If a feature with the same key had the
+    same fingerprint in the previous version then the previous converted
+    instance is reused and the feature is never converted. Only new or
+    changed features are converted, and we get a change set for free rather
+    than diffing the whole document afterwards.
+
+    Fingerprints cover the keys that the feature's tags and attributes get
+    in the document's context rather than the raw tags, so a namespace
+    which is bound to a different prefix in a new poll counts as a change.
+
+    Features are keyed by their gml:id, or by their position in the
+    collection (e.g. '#3') if they don't have one.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+from .gml import FeatureTarget, feature_id, members, is_feature_parent
+from .json_target import feed_parser
+
+from lxml.etree import XML, XMLParser
+import hashlib
+import io
+
+# Raw parse events buffered for a feature
+_START, _DATA, _END = 0, 1, 2
+
+
+def event_digest(events, context):
+    """ Compute a fingerprint for a feature from its parse events
+
+        Parameters:
+            events - the buffered events for the feature, as tuples of
+                (_START, tag, attrib), (_DATA, text) or (_END, tag)
+            context - the JSONLDContext for the document, used to work
+                out the keys for the tags and attributes
+
+        Returns:
+            a hex digest string
+    """
+    # Control characters can't appear in XML, so they mark each part
+    process, process_value = context.process, context.process_value
+    parts = []
+    for event in events:
+        if event[0] == _START:
+            parts.append('\x02' + process(event[1]))
+            for key, value in event[2].items():
+                parts.append('\x01' + process(key))
+                parts.append(process_value(value))
+        elif event[0] == _DATA:
+            parts.append('\x03' + event[1])
+        else:
+            parts.append('\x04')
+    return hashlib.blake2b('\x00'.join(parts).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+
+def position_key(position):
+    """ Return the key for a feature without an id
+    """
+    return '#{0}'.format(position)
+
+
+def index_features(xjson):
+    """ Build a feature index for a converted document
+
+        Parameters:
+            xjson - an XJson instance containing a feature collection
+
+        Returns:
+            a dictionary mapping feature keys to (digest, feature) tuples.
+            Features are keyed by id, or by position if they don't have
+            one. Documents which weren't converted incrementally don't have
+            fingerprints, so their digests are None and their features are
+            compared by content instead.
+    """
+    index = getattr(xjson, 'features', None)
+    if index is not None:
+        return index
+
+    # Not converted incrementally, so we need to work it out
+    index = {}
+    position = 0
+    for root in xjson.body.values():
+        for member in members(root):
+            if not isinstance(member, dict):
+                continue
+            for tag, feature in member.items():
+                if tag.startswith('#'):
+                    continue
+                ident = None
+                if isinstance(feature, dict):
+                    ident = feature_id(feature.get('#attributes'))
+                if ident is None:
+                    ident = position_key(position)
+                index[ident] = (None, feature)
+                position += 1
+    return index
+
+
+class ChangeSet(object):
+
+    """ The changes between two versions of a feature collection
+
+        Attributes:
+            added - a list of ids of features which are new
+            removed - a list of ids of features which have gone
+            modified - a list of ids of features whose content has changed
+            unchanged - a list of ids of features which are the same
+    """
+
+    def __init__(self, added=None, removed=None, modified=None,
+                 unchanged=None):
+        super(ChangeSet, self).__init__()
+        self.added = added or []
+        self.removed = removed or []
+        self.modified = modified or []
+        self.unchanged = unchanged or []
+
+    def __bool__(self):
+        """ A change set is True if there are any changes
+        """
+        return bool(self.added or self.removed or self.modified)
+
+    def __repr__(self):
+        """ String representation
+        """
+        tmpl = 'ChangeSet(added={0}, removed={1}, modified={2}, unchanged={3})'
+        return tmpl.format(len(self.added), len(self.removed),
+                           len(self.modified), len(self.unchanged))
+
+
+class IncrementalTarget(FeatureTarget):
+
+    """ A target which fingerprints features and reuses unchanged ones
+
+        The parse events for each feature with a previous version are
+        buffered, and hashed when the feature ends. Then the feature is
+        either swapped for the previous version (if the fingerprints match)
+        or the events are replayed to convert it. Other features are
+        converted as they are parsed. Features are always converted when
+        there are limits, so that the limits are applied, but unchanged
+        features still reuse the previous instance.
+
+        Parameters:
+            previous - a feature index from the previous version of the
+                document (see `index_features`)
+            previous_context - the JSONLDContext of the previous version,
+                used to copy the container and hyperlink definitions for
+                reused features. Optional.
+            namespace_handling, limits, plan, interner - as for JSONLDTarget
+
+        Attributes:
+            features - the feature index for this document
+            changes - a ChangeSet against the previous version
+            converted - the number of features which were converted rather
+                than reused
+    """
+
+    def __init__(self, previous=None, previous_context=None, **kwargs):
+        super(IncrementalTarget, self).__init__(**kwargs)
+        self.previous = previous or {}
+        self.previous_context = previous_context
+        self.features = {}
+        self.changes = ChangeSet()
+        self.converted = 0
+        self._events = self._pending = None
+        self._direct = False
+        self._depth = self._position = 0
+        self._noted = set()
+
+    def start(self, tag, attrib):
+        """ Start an element, buffering it if it's part of a feature
+        """
+        events = self._events
+        if events is None:
+            if len(self.stack) != 2 or self._skip or self._stopped \
+                    or not is_feature_parent(self.stack[1][0]):
+                super(IncrementalTarget, self).start(tag, attrib)
+                return
+
+            # A new feature. If there's a previous version then hold on to
+            # it until we know if it's changed, otherwise convert it as we
+            # go and just keep the events for the fingerprint
+            key = feature_id(attrib)
+            if key is None:
+                key = position_key(self._position)
+            self._position += 1
+            previous = self.previous.get(key)
+            self._pending = (key, None, previous)
+            self._direct = previous is None or previous[0] is None \
+                or self.limits is not None
+            events = self._events = []
+            self._depth = 0
+        events.append((_START, tag, attrib))
+        self._depth += 1
+        if self._direct:
+            super(IncrementalTarget, self).start(tag, attrib)
+
+    def data(self, data):
+        """ Handle text, buffering it if it's part of a feature
+        """
+        if self._events is None:
+            super(IncrementalTarget, self).data(data)
+            return
+        if self._direct:
+            super(IncrementalTarget, self).data(data)
+        data = data.strip()
+        if data:
+            self._events.append((_DATA, data))
+
+    def end(self, tag):
+        """ End an element, finishing the feature if it was the last one
+        """
+        events = self._events
+        if events is None:
+            super(IncrementalTarget, self).end(tag)
+            return
+        events.append((_END, tag))
+        self._depth -= 1
+        if self._depth == 0:
+            # Work out the fingerprint before the feature is finished
+            self._events = None
+            key, _, previous = self._pending
+            self._pending = (key, event_digest(events, self.context),
+                             previous)
+            if not self._direct:
+                self._end_buffered(events)
+                return
+            self.converted += 1
+        if self._direct:
+            super(IncrementalTarget, self).end(tag)
+
+    def _end_buffered(self, events):
+        """ Reuse or convert a buffered feature
+        """
+        _, digest, previous = self._pending
+        if previous[0] == digest:
+            # Unchanged so skip the conversion
+            tag = self._note_tags(events)
+            self._closing_feature = True
+            self._attach(tag, previous[1])
+            return
+
+        # Changed, so convert it
+        self.converted += 1
+        start = super(IncrementalTarget, self).start
+        data = super(IncrementalTarget, self).data
+        end = super(IncrementalTarget, self).end
+        for event in events:
+            if event[0] == _START:
+                start(event[1], event[2])
+            elif event[0] == _DATA:
+                data(event[1])
+            else:
+                end(event[1])
+
+    def _note_tags(self, events):
+        """ Add the context entries for a feature which isn't converted
+
+            Returns:
+                the processed tag of the feature
+        """
+        context, previous = self.context, self.previous_context
+        noted = self._noted
+        for event in events:
+            if event[0] != _START:
+                continue
+            for key, value in event[2].items():
+                if value[:1] == '{':
+                    context.process_value(value)
+                if key not in noted:
+                    noted.add(key)
+                    context.process(key)
+            if event[1] in noted:
+                continue
+            noted.add(event[1])
+            tag = context.process(event[1])
+            if previous is not None and context.definition(tag) is None:
+                definition = previous.definition(tag)
+                if definition is not None:
+                    context[tag] = definition
+        return context.process(events[0][1])
+
+    def end_feature(self, tag, elem):
+        """ Compare a feature to the previous version
+        """
+        key, digest, previous = self._pending
+        if previous is None:
+            self.changes.added.append(key)
+        elif previous[0] == digest or \
+                (previous[0] is None and previous[1] == elem):
+            self.changes.unchanged.append(key)
+            elem = previous[1]
+        else:
+            self.changes.modified.append(key)
+        self.features[key] = (digest, elem)
+        return elem
+
+    def close(self):
+        """ Finish the document, working out which features were removed
+        """
+        self.changes.removed = [
+            key for key in self.previous if key not in self.features]
+        return super(IncrementalTarget, self).close()
+
+
+def from_xml_incremental(xml, previous=None, namespace_handling=None,
+                         limit=None, max_bytes=None, **kwargs):
+    """ Convert a new version of a document, reusing unchanged features
+
+        Parameters:
+            xml - either a handle to an open xml file, or a string of XML
+            previous - the XJson instance for the previous version. Optional,
+                if None then every feature is reported as added.
+            namespace_handling - how to handle XML namespaces. Optional,
+                defaults to the handling used for previous, or 'shorten'.
+                Features can only be reused if this matches the previous
+                version.
+            limit, max_bytes - stop parsing after this many features or
+                bytes, as for `XJson.from_xml`. The rest of the document
+                isn't read, and removed features aren't worked out for a
+                truncated document. Optional.
+            **kwargs - other keyword arguments (limits, plan, interner)
+                are passed to the target, as for `XJson.from_xml`
+
+        Returns:
+            a tuple (xjson, changes) containing the new XJson instance and
+            a ChangeSet. The new instance has a `features` attribute
+            holding its feature index, so it can be passed as previous next
+            time.
+    """
+    if namespace_handling is None:
+        if previous is not None:
+            namespace_handling = previous.context.namespace_handling
+        else:
+            namespace_handling = 'shorten'
+    index = previous_context = None
+    if previous is not None:
+        index = index_features(previous)
+        previous_context = previous.context
+        if previous_context.namespace_handling != namespace_handling:
+            # Fingerprints don't tell us anything about the converted shape
+            index = {k: (None, f) for k, (_, f) in index.items()}
+    if isinstance(xml, str):
+        xml = xml.encode('utf-8')
+
+    limits = kwargs.get('limits')
+    target = IncrementalTarget(previous=index,
+                               previous_context=previous_context,
+                               namespace_handling=namespace_handling,
+                               limit=limit, **kwargs)
+    options = limits.parser_options() if limits is not None else {}
+    parser = XMLParser(target=target, **options)
+    if limit is None and max_bytes is None:
+        if isinstance(xml, io.IOBase):
+            xml = xml.read()
+        body, context = XML(xml, parser)
+    else:
+        # Feed the parser a bit at a time so we can stop early
+        if not isinstance(xml, io.IOBase):
+            xml = io.BytesIO(xml)
+        body, context = feed_parser(parser, target, xml, max_bytes=max_bytes)
+        if body is None:
+            raise ValueError('No elements found in the first {0} bytes '
+                             'of the document'.format(max_bytes))
+    result = XJson(body=body, context=context)
+    result.features = target.features
+    if target.truncated:
+        result.truncated = True
+    return result, target.changes
@@ -0,0 +1,440 @@
+""" file:   index.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Sidecar offset indexes for converted feature streams
+
+    Serving single features out of a very large converted file means either
+    scanning it or loading it whole. Here features are written one record
+    at a time (as JSON lines, or as the items of a JSON list), and a sidecar
+    index maps each record's key - its gml:id by default, or any key path -
+    to the byte offset and length of the record. IndexedReader memory-maps
+    both files, and only decodes the records that are asked for.
+
+    The index is laid out as a hash table so that it can be used straight
+    from the mmap without loading it:
+
+        magic (4 bytes), header (record count, bucket count, metadata size),
+        metadata (JSON: key path, format, data file size, context),
+        bucket table (nbuckets + 1 entry indexes),
+        entries (64-bit key hash, offset, length), grouped by bucket
+
+    Entries are collected in a temporary file while writing and scattered
+    into their buckets when the writer is closed, so building an index
+    doesn't need memory in proportion to the number of records.
+"""
+
+from __future__ import print_function, division
+
+from .gml import FeatureTarget, feature_id
+from .json_target import feed_parser
+from .binary import materialize
+
+from array import array
+from lxml import etree
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+MAGIC = b'XJI\x01'
+
+# Record count, bucket count, metadata size
+_HEADER = struct.Struct('<QQQ')
+
+# Key hash, record offset, record length
+_ENTRY = struct.Struct('<QQQ')
+
+_BUCKET = struct.Struct('<Q')
+
+# Average number of entries per bucket
+BUCKET_SIZE = 16
+
+# Size of the chunks fed to the parser by `index_xml`
+CHUNK_SIZE = 1024 * 1024
+
+FORMATS = ('jsonl', 'json')
+
+
+def key_hash(key):
+    """ Hash a record key for the index
+    """
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def record_key(record, path=None):
+    """ Find the key for a record
+
+        Parameters:
+            record - the converted record, usually a single feature of the
+                form {tag: feature}
+            path - a key path, given as a '/'-separated string of keys
+                (e.g. '*/gml:name'), where '*' matches the first key which
+                isn't an attribute or data key. Optional, if None then the
+                feature's gml:id (or fid) is used.
+
+        Returns:
+            the key as a string, or None if the record doesn't have one
+    """
+    if path is None:
+        for value in record.values():
+            if isinstance(value, dict):
+                return feature_id(value.get('#attributes'))
+        return None
+
+    value = record
+    for part in path.split('/'):
+        if not isinstance(value, dict):
+            return None
+        if part == '*':
+            part = next((k for k in value if not k.startswith('#')), None)
+        value = value.get(part)
+        if value is None:
+            return None
+    if isinstance(value, (dict, list)):
+        return None
+    return str(value)
+
+
+class IndexedWriter(object):
+
+    """ Writes records to a file, with a sidecar index of their offsets
+
+        Parameters:
+            path - the path of the file to write
+            key - the key path used to index records (see `record_key`).
+                Optional, defaults to the feature's gml:id. Records without
+                a key are written but not indexed.
+            index_path - the path of the index file. Optional, defaults to
+                path + '.idx'.
+            fmt - either 'jsonl' to write one record per line, or 'json'
+                to write a JSON list of records. Optional, defaults to
+                'jsonl'.
+
+        Attributes:
+            context - a JSON-LD context (as a dictionary) to store in the
+                index for the records. Can be set any time before the
+                writer is closed.
+            records - the number of records written
+            indexed - the number of records in the index
+    """
+
+    def __init__(self, path, key=None, index_path=None, fmt='jsonl'):
+        super(IndexedWriter, self).__init__()
+        if fmt not in FORMATS:
+            raise ValueError('Invalid format {0}, allowed values are '
+                             '{1}'.format(fmt, FORMATS))
+        self.path = path
+        self.index_path = index_path or path + '.idx'
+        self.key = key
+        self.fmt = fmt
+        self.context = None
+        self.records = self.indexed = 0
+        self._output = open(path, 'wb')
+        self._entries = tempfile.TemporaryFile()
+        self._offset = 0
+        if fmt == 'json':
+            self._write(b'[')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self, data):
+        """ Write some bytes to the output, keeping track of the offset
+        """
+        self._output.write(data)
+        self._offset += len(data)
+
+    def write(self, record):
+        """ Write a record
+
+            Parameters:
+                record - the record to write
+        """
+        data = json.dumps(record, separators=(',', ':'),
+                          default=materialize).encode('utf-8')
+        if self.fmt == 'json':
+            self._write(b',\n' if self.records else b'\n')
+        offset = self._offset
+        self._write(data)
+        if self.fmt == 'jsonl':
+            self._write(b'\n')
+        self.records += 1
+
+        key = record_key(record, self.key)
+        if key is not None:
+            self._entries.write(_ENTRY.pack(key_hash(key), offset, len(data)))
+            self.indexed += 1
+
+    def close(self):
+        """ Finish the output and write the index
+        """
+        if self._output.closed:
+            return
+        if self.fmt == 'json':
+            self._write(b'\n]\n')
+        self._output.close()
+        try:
+            self._write_index()
+        finally:
+            self._entries.close()
+
+    def _read_entries(self):
+        """ Iterate over the entries collected while writing
+        """
+        self._entries.seek(0)
+        block = _ENTRY.size * 4096
+        while True:
+            data = self._entries.read(block)
+            if not data:
+                return
+            for entry in _ENTRY.iter_unpack(data):
+                yield entry
+
+    def _write_index(self):
+        """ Scatter the collected entries into a hash table
+        """
+        nbuckets = 1
+        while nbuckets * BUCKET_SIZE < self.indexed:
+            nbuckets *= 2
+        mask = nbuckets - 1
+
+        # Count the entries in each bucket to find where they go
+        counts = array('Q', [0]) * nbuckets
+        for entry in self._read_entries():
+            counts[entry[0] & mask] += 1
+        table = array('Q', [0]) * (nbuckets + 1)
+        for idx in range(nbuckets):
+            table[idx + 1] = table[idx] + counts[idx]
+
+        metadata = json.dumps({
+            'key': self.key,
+            'format': self.fmt,
+            'size': self._offset,
+            'records': self.records,
+            'context': self.context
+        }).encode('utf-8')
+        header = MAGIC + _HEADER.pack(self.indexed, nbuckets, len(metadata)) \
+            + metadata
+        entries_start = len(header) + _BUCKET.size * (nbuckets + 1)
+        size = entries_start + _ENTRY.size * self.indexed
+
+        with open(self.index_path, 'wb+') as fhandle:
+            fhandle.write(header)
+            encoded = array('Q', table)
+            if sys.byteorder != 'little':
+                encoded.byteswap()
+            fhandle.write(encoded.tobytes())
+            fhandle.truncate(size)
+            if not self.indexed:
+                return
+            fhandle.flush()
+            index = mmap.mmap(fhandle.fileno(), size)
+            try:
+                filled = array('Q', table[:-1])
+                for entry in self._read_entries():
+                    bucket = entry[0] & mask
+                    _ENTRY.pack_into(index, entries_start
+                                     + _ENTRY.size * filled[bucket], *entry)
+                    filled[bucket] += 1
+                index.flush()
+            finally:
+                index.close()
+
+
+class IndexedReader(object):
+
+    """ Random access to the records in an indexed file
+
+        Records are looked up with the key they were indexed with, e.g.
+        `reader['mf.1']`.
+
+        Parameters:
+            path - the path of the data file
+            index_path - the path of the index file. Optional, defaults to
+                path + '.idx'.
+
+        Attributes:
+            key - the key path the records were indexed with
+            context - the context stored with the index, if any
+    """
+
+    def __init__(self, path, index_path=None):
+        super(IndexedReader, self).__init__()
+        self.path = path
+        self.index_path = index_path or path + '.idx'
+        self._handles, self._maps = [], []
+        try:
+            self._index = self._map(self.index_path)
+            self._data = self._map(path)
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _map(self, path):
+        """ Memory-map a file for reading
+        """
+        fhandle = open(path, 'rb')
+        self._handles.append(fhandle)
+        if os.fstat(fhandle.fileno()).st_size == 0:
+            return b''
+        mapped = mmap.mmap(fhandle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def _read_header(self):
+        """ Read the index header and metadata
+        """
+        if self._index[:len(MAGIC)] != MAGIC:
+            raise ValueError('{0} is not an xjson index'.format(
+                self.index_path))
+        offset = len(MAGIC)
+        self._count, self._nbuckets, nmeta = \
+            _HEADER.unpack_from(self._index, offset)
+        offset += _HEADER.size
+        metadata = json.loads(
+            bytes(self._index[offset:offset + nmeta]).decode('utf-8'))
+        self.key = metadata['key']
+        self.context = metadata.get('context')
+        self.records = metadata.get('records')
+        if metadata['size'] != len(self._data):
+            raise ValueError('Index {0} is out of date, it was written for a '
+                             '{1} byte file but {2} is {3} bytes'.format(
+                                 self.index_path, metadata['size'], self.path,
+                                 len(self._data)))
+        self._table = offset + nmeta
+        self._entries = self._table + _BUCKET.size * (self._nbuckets + 1)
+
+    def __len__(self):
+        """ The number of indexed records
+        """
+        return self._count
+
+    def _candidates(self, key):
+        """ Return the (offset, length) of records whose key hash matches
+        """
+        khash = key_hash(key)
+        position = self._table + _BUCKET.size * (khash & (self._nbuckets - 1))
+        start, end = struct.unpack_from('<QQ', self._index, position)
+        for idx in range(start, end):
+            ehash, offset, length = _ENTRY.unpack_from(
+                self._index, self._entries + _ENTRY.size * idx)
+            if ehash == khash:
+                yield offset, length
+
+    def _matches(self, key):
+        """ Iterate over (raw, record) for the records with the given key
+        """
+        for offset, length in self._candidates(key):
+            raw = self._data[offset:offset + length]
+            record = json.loads(raw.decode('utf-8'))
+            # Check the key itself, in case of a hash collision
+            if record_key(record, self.key) == key:
+                yield raw, record
+
+    def get_all(self, key):
+        """ Return all the records with the given key, in file order
+        """
+        return [record for _, record in self._matches(key)]
+
+    def get(self, key, default=None):
+        """ Return the first record with the given key, or default
+        """
+        for _, record in self._matches(key):
+            return record
+        return default
+
+    def __getitem__(self, key):
+        for _, record in self._matches(key):
+            return record
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return any(True for _ in self._matches(key))
+
+    def raw(self, key):
+        """ Return the encoded JSON for the first record with the given
+            key, e.g. to pass straight on to a client
+
+            Raises:
+                KeyError if there's no record with that key
+        """
+        for raw, _ in self._matches(key):
+            return raw
+        raise KeyError(key)
+
+    def close(self):
+        """ Close the underlying files
+        """
+        for mapped in self._maps:
+            mapped.close()
+        for fhandle in self._handles:
+            fhandle.close()
+        self._maps, self._handles = [], []
+
+
+class _IndexingTarget(FeatureTarget):
+
+    """ Writes each feature out as it is converted
+    """
+
+    def __init__(self, writer, **kwargs):
+        super(_IndexingTarget, self).__init__(**kwargs)
+        self.writer = writer
+
+    def end_feature(self, tag, elem):
+        """ Write the feature, and drop it from the document
+        """
+        self.writer.write({tag: elem})
+
+
+def index_xml(source, path, key=None, index_path=None, fmt='jsonl',
+              namespace_handling=None, limits=None, limit=None,
+              max_bytes=None):
+    """ Convert the features in a collection straight to an indexed file
+
+        The document is parsed in chunks and each feature is written out
+        as soon as it has been converted, so the whole collection is never
+        held in memory.
+
+        Parameters:
+            source - the path of an XML file, or an open binary file handle
+            path, key, index_path, fmt - as for `IndexedWriter`
+            namespace_handling, limits, limit, max_bytes - as for
+                `XJson.from_xml`. If max_bytes cuts a feature short then
+                it isn't written.
+
+        Returns:
+            the number of features written
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as fhandle:
+            return index_xml(fhandle, path, key=key, index_path=index_path,
+                             fmt=fmt, namespace_handling=namespace_handling,
+                             limits=limits, limit=limit, max_bytes=max_bytes)
+
+    with IndexedWriter(path, key=key, index_path=index_path,
+                       fmt=fmt) as writer:
+        target = _IndexingTarget(
+            writer, namespace_handling=namespace_handling or 'shorten',
+            limits=limits, limit=limit)
+        options = limits.parser_options() if limits is not None else {}
+        parser = etree.XMLParser(target=target, **options)
+        _, context = feed_parser(parser, target, source, max_bytes=max_bytes,
+                                 chunk_size=CHUNK_SIZE)
+        writer.context = dict(context.items())
+        return writer.records
@@ -9,6 +9,7 @@
 from .namespaces import NamespaceMap
 
 from lxml.etree import QName
+import json
 
 def merge_namespace_and_tag(tag):
     """ Merge a tag with its namespace
@@ -53,7 +54,9 @@ class JSONLDContext(object):
                 container items. Keys retain their full strings.
             if namespace_handling == 'remove', then namespaces are removed from
                 the keys (although each key is aliased back to the namespace in
-                the JSON-LD context) and only the localname is preserved.
+                the JSON-LD context) and only the localname is preserved. The
+                aliases are stored compactly, as a prefix for each namespace
+                and 'prefix:localname' references, and expanded on lookup.
             if namespace_handling == 'shorten', then short namespaces are
                 created for each key, of the form <ns>:<local> (like an XML
                 QName). The full namespace is still recoverable from the
@@ -80,6 +83,10 @@ class JSONLDContext(object):
         else:
             self.mapping = NamespaceMap()
         self._context = {}
+        self._tags = {}
+        self._shared_tags = self._updates = None
+        self._rendered = None
+        self._resolved, self._compacted, self._prefixes = {}, {}, None
         for attr in ('values', 'keys', 'items'):
             setattr(self, attr, getattr(self._context, attr))
 
@@ -98,16 +105,22 @@ class JSONLDContext(object):
 
     def __str__(self):
         """ Representation for use in a JSON-LD document
+
+            The rendering is cached until the context changes.
         """
-        # Declare as a context
-        rep = '"@context": {\n'
+        if self._rendered is None:
+            # Declare as a context
+            rep = '"@context": {\n'
 
-        # We sort to make sure that namespace declarations occur first
-        # so 'ns' key comes before 'ns:foo'
-        rep += ',\n'.join('    "{0}": "{1}"'.format(k, self._context[k])
-                          for k in sorted(self._context.keys()))
-        rep += '\n}'
-        return rep
+            # We sort to make sure that namespace declarations occur first
+            # so 'ns' key comes before 'ns:foo'
+            rep += ',\n'.join(
+                '    {0}: {1}'.format(json.dumps(k),
+                                      json.dumps(self._context[k]))
+                for k in sorted(self._context.keys()))
+            rep += '\n}'
+            self._rendered = rep
+        return self._rendered
 
     def __repr__(self):
         """ Representation of JSONLDContext
@@ -119,7 +132,7 @@ class JSONLDContext(object):
         """ Get the context associated with a given tag
         """
         try:
-            return self._context[tag]
+            value = self._context[tag]
         except KeyError as err:
             # We may have a QName, so handle this
             if is_qname(tag):
@@ -130,10 +143,35 @@ class JSONLDContext(object):
             else:
                 raise err
 
+        # Expand compact references in 'remove' mode
+        if self.namespace_handling == 'remove' and isinstance(value, str) \
+                and is_qname(value):
+            prefix, localname = value.split(':')
+            namespace = self._context.get(prefix)
+            if isinstance(namespace, str):
+                return merge_namespace_and_tag(
+                    '{{{0}}}{1}'.format(namespace, localname))
+        return value
+
     def __setitem__(self, tag, context):
         """ Set the context associated with a tag
         """
         self._context[tag] = context
+        self._rendered = None
+        if self._updates is not None:
+            self._updates.append((tag, context))
+        if self._resolved or self._compacted:
+            self._resolved, self._compacted, self._prefixes = {}, {}, None
+
+    def copy(self):
+        """ Return a copy of the context, which can be changed without
+            affecting this one
+        """
+        result = JSONLDContext(namespace_handling=self.namespace_handling,
+                               mapping=dict(self.mapping))
+        for tag, value in self._context.items():
+            result[tag] = value
+        return result
 
     def get(self, tag):
         """ Try to get a tag, returning None if not found
@@ -143,10 +181,161 @@ class JSONLDContext(object):
         except KeyError:
             return None
 
+    def resolve(self, term):
+        """ Resolve a key to a full IRI
+
+            Results are memoized until the context changes. Keys which can't
+            be resolved are returned as is.
+
+            Parameters:
+                term - a key from a converted body
+
+            Returns:
+                the full IRI for the key
+        """
+        try:
+            return self._resolved[term]
+        except KeyError:
+            pass
+        try:
+            iri = self[term]
+        except KeyError:
+            iri = term
+        if isinstance(iri, dict):
+            # Container or hyperlink definition
+            iri = iri.get('@id', term)
+            if iri == term and is_qname(term):
+                try:
+                    namespace, localname = term.split(':')
+                    iri = merge_namespace_and_tag(
+                        '{{{0}}}{1}'.format(self._context[namespace],
+                                            localname))
+                except KeyError:
+                    pass
+        self._resolved[term] = iri
+        return iri
+
+    def definition(self, term):
+        """ Return the container or hyperlink definition for a key, or
+            None if the key doesn't have one
+        """
+        value = self._context.get(term)
+        return value if isinstance(value, dict) else None
+
+    def compact_iri(self, iri):
+        """ Compact a full IRI to a key using this context
+
+            Uses a key which resolves to the IRI if there is one, otherwise
+            a 'prefix:localname' QName if a prefix matches, otherwise the
+            IRI is returned as is. Results are memoized until the context
+            changes.
+
+            Parameters:
+                iri - the full IRI
+
+            Returns:
+                the compacted key
+        """
+        try:
+            return self._compacted[iri]
+        except KeyError:
+            pass
+        if self._prefixes is None:
+            # Build the inverse context, first definition wins
+            for term in sorted(self._context.keys()):
+                self._compacted.setdefault(self.resolve(term), term)
+            self._prefixes = sorted(
+                ((value, prefix) for prefix, value in self._context.items()
+                 if isinstance(value, str) and ':' not in prefix
+                 and ':' in value and not is_qname(value)),
+                key=lambda item: -len(item[0]))
+            try:
+                return self._compacted[iri]
+            except KeyError:
+                pass
+
+        term = iri
+        for namespace, prefix in self._prefixes:
+            if iri.startswith(namespace) and len(iri) > len(namespace) + 1 \
+                    and iri[len(namespace)] in '/:':
+                localname = iri[len(namespace) + 1:]
+                if not any(c in localname for c in '/:'):
+                    term = prefix + ':' + localname
+                    break
+        self._compacted[iri] = term
+        return term
+
+    def share_tags(self, shared):
+        """ Share processed tags with other contexts
+
+            The namespace mapping must be in the same state as it was for
+            the other contexts sharing the tags (e.g. after the same
+            namespace declarations). Processed tags (and the context entries
+            they add) are only shared while no other namespaces have been
+            added to the mapping. Tags aren't shared in 'remove' mode, since
+            the result depends on the other tags in the document.
+
+            Parameters:
+                shared - a dictionary shared between the contexts
+        """
+        if self.namespace_handling != 'remove':
+            self._shared_tags = shared
+            self._shared_size = len(self.mapping)
+
     def process(self, tag):
         """ Process a tag, handling the namespace in the correct way
+
+            Processed tags are cached, so each distinct tag is only worked
+            out once per context (or once per set of contexts, see
+            `share_tags`).
         """
-        return self._process(tag)
+        try:
+            return self._tags[tag]
+        except KeyError:
+            pass
+
+        shared = self._shared_tags
+        if shared is None:
+            result = self._tags[tag] = self._process(tag)
+            return result
+
+        try:
+            result, updates = shared[tag]
+        except KeyError:
+            # Work it out, recording the context entries added
+            self._updates = updates = []
+            try:
+                result = self._process(tag)
+            finally:
+                self._updates = None
+            if len(self.mapping) == self._shared_size:
+                shared[tag] = (result, tuple(updates))
+        else:
+            for key, value in updates:
+                self[key] = value
+        self._tags[tag] = result
+        return result
+
+    def process_value(self, value):
+        """ Process an attribute value
+
+            Values are only processed if they are namespaced tags (i.e.
+            '{ns}tag'), everything else is returned as is.
+        """
+        if value[:1] == '{':
+            return self._process(value)
+        return value
+
+    def declare(self, prefix, namespace_uri):
+        """ Register a namespace declared in a document
+
+            Parameters:
+                prefix - the prefix used in the declaration, '' or None for
+                    the default namespace
+                namespace_uri - the namespace URI
+        """
+        if self.namespace_handling != 'none':
+            self.mapping.add_declared(prefix, namespace_uri)
 
     def _process_identify(self, tag):
         """ Process a tag, identifying any namespaces
@@ -164,7 +353,7 @@ class JSONLDContext(object):
             leaving a shortened version of the namespace in the tag
         """
         short_tag = self.mapping.shorten(tag)
-        if is_qname(short_tag):
+        if short_tag != tag and is_qname(short_tag):
             namespace, _ = short_tag.split(':')
             self[namespace] = self.mapping[namespace]
         return short_tag
@@ -175,8 +364,32 @@ class JSONLDContext(object):
         self.mapping.add_from_tag(tag)
         try:
             qname = QName(tag)
-            self[qname.localname] = merge_namespace_and_tag(tag)
-            tag = qname.localname
+            localname = qname.localname
+            if self.mapping.get(localname) is None \
+                    or self._context.get(localname) != self.mapping[localname]:
+                # Don't clobber prefixes which have the same name
+                self[localname] = self._compact_reference(qname, tag)
+            tag = localname
         except ValueError:
             pass
         return tag
+
+    def _compact_reference(self, qname, tag):
+        """ Return a 'prefix:localname' reference for a tag, adding the
+            prefix to the context if required
+
+            Falls back to the full IRI if the namespace doesn't have a usable
+            prefix, or if the prefix is the same as the local name (since
+            the prefix entry and the alias would need the same key).
+        """
+        namespace = qname.namespace
+        if namespace:
+            prefix = self.mapping.inverse.get(namespace)
+            if prefix is not None and ':' not in prefix \
+                    and prefix != qname.localname:
+                current = self._context.get(prefix)
+                if current is None:
+                    self[prefix] = current = namespace
+                if current == namespace:
+                    return prefix + ':' + qname.localname
+        return merge_namespace_and_tag(tag)
@@ -9,7 +9,47 @@
 from .json_context import JSONLDContext
 from .accumulator import accumulator
 
-from lxml import etree
+# Attribute keys that mark an element as a hyperlink
+HREF_KEYS = ('href', 'xlink:href', 'http://www.w3.org/1999/xlink/href')
+
+# Size of the chunks fed to the parser by `feed_parser`
+CHUNK_SIZE = 64 * 1024
+
+
+def feed_parser(parser, target, source, max_bytes=None,
+                chunk_size=CHUNK_SIZE):
+    """ Feed a document to a parser in chunks, stopping early if asked
+
+        Parsing stops once max_bytes have been fed, or as soon as the
+        target is stopped (see `JSONLDTarget.stop`), without reading the
+        rest of the document. In that case any open elements are closed
+        off, so the result is still well-formed.
+
+        Parameters:
+            parser - an lxml XMLParser using target
+            target - a JSONLDTarget
+            source - a binary file handle to read the document from
+            max_bytes - the maximum number of bytes to parse. Optional, if
+                None then the whole document is parsed.
+            chunk_size - the size of the chunks read from source
+
+        Returns:
+            a tuple (body, context)
+    """
+    fed = 0
+    while not target.stopped:
+        size = chunk_size
+        if max_bytes is not None:
+            size = min(size, max_bytes - fed)
+            if size <= 0:
+                break
+        chunk = source.read(size)
+        if not chunk:
+            return parser.close()
+        parser.feed(chunk)
+        fed += len(chunk)
+    return target.finish()
+
 
 class JSONLDTarget(object):
 
@@ -40,13 +80,52 @@ class JSONLDTarget(object):
             namespace_handling - how XMl namespaces should be handled. Must be
                 one of 'remove', 'short' or 'full', otherwise a ValueError is
                 raised.
+            limits - a ConversionLimits instance bounding the resources used
+                by a single document. Optional, if None then documents are
+                unbounded. If the limits truncate a document then the
+                `truncated` attribute is set to True.
+            plan - a ConversionPlan instance giving the expected shape of
+                each tag, used to skip the general conversion checks.
+                Optional, if None then every element is converted in full.
+            interner - a SubtreeInterner instance used to share identical
+                subtrees. Optional, if None then nothing is shared.
+            tag_caches - a dictionary used to share processed tags between
+                documents converted with this target (see
+                `JSONLDContext.process`). Documents only share tags with
+                other documents which declare the same namespaces before
+                the root element. Optional, if None then nothing is shared.
     """
 
-    def __init__(self, namespace_handling=None):
+    def __init__(self, namespace_handling=None, limits=None, plan=None,
+                 interner=None, tag_caches=None):
         self._first = True
         self.stack = []
         self.result = None
         self.context = JSONLDContext(namespace_handling=namespace_handling)
+        self.limits = limits
+        self.plan = plan
+        self.interner = interner
+        self.tag_caches = tag_caches
+        self._declared = []
+        self._reset_counters()
+
+    def _reset_counters(self):
+        """ Reset the counters used to enforce limits
+        """
+        self.truncated = False
+        self._elements = self._text_bytes = 0
+        self._skip = 0
+        self._stopped = False
+        self._planned = set()
+
+    def _check(self, limit, value):
+        """ Check a value against the limits, returning False and marking
+            the result as truncated if the value doesn't fit
+        """
+        if self.limits.check(limit, value):
+            return True
+        self.truncated = True
+        return False
 
     @property
     def current_element(self):
@@ -60,94 +139,275 @@ class JSONLDTarget(object):
     def start(self, tag, attrib):
         """ Start generating a new object
         """
+        if self._first:
+            self._reset_counters()
+            self._first = False
+            if self.tag_caches is not None:
+                self.context.share_tags(self.tag_caches.setdefault(
+                    tuple(self._declared), {}))
+
+        # Skip elements which are past the limits
+        if self._skip or self._stopped:
+            if self._stopped:
+                self.truncated = True
+            self._skip += 1
+            return
+        if self.limits is not None:
+            self._elements += 1
+            if not (self._check('max_elements', self._elements)
+                    and self._check('max_context_size',
+                                    len(self.context.keys()))):
+                # Drop this and everything after it
+                self._stopped = True
+                self._skip += 1
+                return
+            if not self._check('max_depth', len(self.stack) + 1):
+                # Drop this subtree only
+                self._skip += 1
+                return
+
         # Push element onto stack to wait for children to be read
         self.stack.append((self.context.process(tag), accumulator()))
 
         # Add attributes to body
         if attrib:
+            process = self.context.process
+            process_value = self.context.process_value
             self.current_element['#attributes'] = \
-                {self.context.process(k): self.context.process(v)
-                 for k, v in attrib.items()}
+                {process(k): process_value(v) for k, v in attrib.items()}
+
+    def start_ns(self, prefix, uri):
+        """ Register a namespace declaration
+
+            Namespaces are registered with their declared prefix (unless
+            they are well-known), before any tags which use them.
+        """
+        if self._first:
+            self._declared.append((prefix, uri))
+        self.context.declare(prefix, uri)
+
+    def end_ns(self, prefix):
+        """ Namespaces stay registered for the whole document
+        """
+        pass
 
     def data(self, data):
         """ Convert text to objects
 
             Data gets pushed to the current element
         """
+        if self._skip:
+            return
         data = data.strip()
+        if data != '' and self.limits is not None:
+            data = self._limit_data(data)
         if data != '':
             self.current_element['#data'] = data
 
+    def _limit_data(self, data):
+        """ Apply the text limits to some data, truncating if required
+        """
+        encoded = data.encode('utf-8')
+        nbytes = len(encoded)
+        allowed = nbytes
+        if not self._check('max_data_bytes', nbytes):
+            allowed = self.limits.max_data_bytes
+        if not self._check('max_text_bytes', self._text_bytes + allowed):
+            allowed = max(self.limits.max_text_bytes - self._text_bytes, 0)
+        self._text_bytes += allowed
+        if allowed < nbytes:
+            data = encoded[:allowed].decode('utf-8', 'ignore')
+        return data
+
     def end(self, tag):
         """ Finish generating the currently building object
         """
+        if self._skip:
+            self._skip -= 1
+            return
+
         # Pop off currently building element
-        tag, elem = self.stack.pop()
+        name, elem = self.stack.pop()
+        if self.plan is not None:
+            kind = self.plan.get(tag)
+            if kind is not None:
+                elem = self._finalize_planned(name, elem, kind)
+            else:
+                elem, _ = self._finalize(name, elem)
+        else:
+            elem, _ = self._finalize(name, elem)
+        if self.interner is not None:
+            elem = self.interner.intern(elem)
+        self._attach(name, elem)
+
+    def _attach(self, tag, elem):
+        """ Store a finished element in its parent
+        """
+        if self.current_element:  # Append to next element as child
+            self.current_element[tag] = elem
+        else:                     # We're at the root element so stash it away
+            self.result = {tag: elem}
+
+    def _finalize(self, tag, elem):
+        """ Convert a finished element from an accumulator to JSON
+
+            Parameters:
+                tag - the (processed) tag for the element
+                elem - the accumulator holding the element's contents
+
+            Returns:
+                a tuple (elem, kind) where elem is the finished JSON and
+                kind is one of 'data', 'href', 'container', 'empty' or
+                'dict', describing how the element was converted.
+        """
+        kind = 'dict'
         if '#data' in elem.keys():
             # Clean up text by concatenating everything together
             if isinstance(elem['#data'], list):
-                elem['#data'] = ' '.join(*elem['#data'])
+                elem.replace('#data', ' '.join(elem['#data']))
 
             # If we've got no attributes, only text then we can move the data
             # up to the top level
             if list(elem.keys()) == ['#data']:
-                elem = elem['#data']
+                return elem['#data'], 'data'
             else:
                 elem = dict(elem)
 
-        elif not elem:
-            # If element is empty, replace with None
-            elem = None
+        elif not elem.keys():
+            # Empty elements become empty dicts
+            return {}, 'empty'
 
         else:
             # For everything else, convert to dict
             elem = dict(elem)
 
         # Refactor containers and hyperlinks to be more JSONeque
-        if isinstance(elem, dict):
-            # XML container classes end up looking something like tag:
-            # {tag2: [stuff]}, which we can reshape to be tag: [stuff], with a
-            # note in the context of tag: {@id: tag2, @container: @list}
-            subelem_keys = [k for k in elem.keys() if not k.startswith('#')]
-            if len(subelem_keys) == 1 and \
-                isinstance(elem[subelem_keys[0]], list):
-                # Replace current body with container
-                container_type = tag
-                contained_type = subelem_keys[0]
-                elem = elem[contained_type]
-
-                # Move container out to context (if it hasn't already)
-                if self.context.get(tag) is None:
-                    self.context[tag] = {'@id': container_type,
-                                         '@type': contained_type,
-                                         '@container': '@set'}
-
-            # We can also check whether we have a URL as an attribute
-            # We move this out an make a note in the context
-            else:
-                try:
-                    # Identify the href link
-                    attr_keys = list(elem['#attributes'].keys())
-                    href_keys = ['href', 'xlink:href',
-                                 'http://www.w3.org/1999/xlink/href']
-                    if (list(elem.keys()) == ['#attributes']) \
-                        and len(attr_keys) == 1 \
-                        and (attr_keys[0] in href_keys):
-                        elem = elem['#attributes'][attr_keys[0]]
-
-                    # Move container out to context (if it hasn't already)
-                    if self.context.get(tag) is None:
-                        self.context[tag] = {'@id': self.context[tag],
-                                             '@type': '@id'}
-                except KeyError:
-                    # There's no '#attributes' key
-                    pass
-
-        # Store result
-        if self.current_element:  # Append to next element as child
-            self.current_element[tag] = elem
-        else:                     # We're at the root element so stash it away
-            self.result = {tag: elem}
+        # XML container classes end up looking something like tag:
+        # {tag2: [stuff]}, which we can reshape to be tag: [stuff], with a
+        # note in the context of tag: {@id: tag2, @container: @list}
+        subelem_keys = [k for k in elem.keys() if not k.startswith('#')]
+        if len(subelem_keys) == 1 and \
+            isinstance(elem[subelem_keys[0]], list):
+            # Replace current body with container
+            contained_type = subelem_keys[0]
+            elem = elem[contained_type]
+            kind = 'container'
+            self._note_container(tag, contained_type)
+
+        # We can also check whether we have a URL as an attribute
+        # We move this out an make a note in the context
+        elif '#attributes' in elem:
+            # Identify the href link
+            attr_keys = list(elem['#attributes'].keys())
+            if (list(elem.keys()) == ['#attributes']) \
+                and len(attr_keys) == 1 \
+                and (attr_keys[0] in HREF_KEYS):
+                elem = elem['#attributes'][attr_keys[0]]
+                kind = 'href'
+            self._note_href(tag)
+
+        return elem, kind
+
+    def _note_container(self, tag, contained_type):
+        """ Move a container out to the context (if it hasn't already)
+        """
+        if self.context.get(tag) is None:
+            self.context[tag] = {'@id': tag,
+                                 '@type': contained_type,
+                                 '@container': '@set'}
+
+    def _note_href(self, tag):
+        """ Note an element with attributes in the context (if it isn't
+            already)
+        """
+        try:
+            if self.context.get(tag) is None:
+                self.context[tag] = {'@id': self.context[tag],
+                                     '@type': '@id'}
+        except KeyError:
+            pass
+
+    def _finalize_planned(self, tag, elem, kind):
+        """ Convert a finished element using a conversion plan
+
+            This skips most of the checks in `_finalize` by going straight
+            to the expected shape for the element. If the element doesn't
+            match its plan then we fall back to `_finalize`.
+
+            Parameters:
+                tag - the (processed) tag for the element
+                elem - the accumulator holding the element's contents
+                kind - the planned kind of the element (see `_finalize`)
+
+            Returns:
+                the finished JSON for the element
+        """
+        # pylint: disable=W0212
+        contents = elem._dict
+        if kind == 'data':
+            if len(contents) == 1:
+                data = contents.get('#data')
+                if data is not None and len(data) == 1:
+                    return data[0]
+
+        elif kind == 'empty':
+            if not contents:
+                return {}
+
+        elif kind == 'href':
+            if len(contents) == 1:
+                attribs = contents.get('#attributes')
+                if attribs is not None and len(attribs) == 1 \
+                        and len(attribs[0]) == 1:
+                    key, value = next(iter(attribs[0].items()))
+                    if key in HREF_KEYS:
+                        if tag not in self._planned:
+                            self._planned.add(tag)
+                            self._note_href(tag)
+                        return value
+
+        elif kind == 'container':
+            if len(contents) == 1:
+                key, values = next(iter(contents.items()))
+                if len(values) > 1 and not key.startswith('#'):
+                    if tag not in self._planned:
+                        self._planned.add(tag)
+                        self._note_container(tag, key)
+                    return values
+
+        # Doesn't match the plan so do it the long way
+        return self._finalize(tag, elem)[0]
+
+    @property
+    def stopped(self):
+        """ Whether the conversion has been stopped
+        """
+        return self._stopped
+
+    def stop(self):
+        """ Stop converting the document
+
+            Everything after this point is dropped (and the result is
+            marked as truncated if there is anything to drop).
+        """
+        self._stopped = True
+
+    def finish(self):
+        """ Finish the document early, closing any open elements
+
+            This is used when parsing is abandoned part way through a
+            document. The result is marked as truncated if any elements
+            had to be closed.
+
+            Returns:
+                a tuple (body, context), as for `close`
+        """
+        if self.stack:
+            self.truncated = True
+        self._skip = 0
+        while self.stack:
+            self.end(None)
+        return self.close()
 
     def comment(self, text):
         """ Comments are ignored
@@ -158,7 +418,9 @@ class JSONLDTarget(object):
         """ Clean up parser for next file
         """
         result, self.result = self.result, None
-        context, self.context = self.context, JSONLDContext()
+        context, self.context = self.context, JSONLDContext(
+            namespace_handling=self.context.namespace_handling)
         self._first = True
+        self._declared = []
         self.stack = []
         return result, context
@@ -0,0 +1,236 @@
+""" file:   jsonld.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Expanding converted documents to full IRIs and back
+
+    `expand` rewrites every key in a body as a full IRI using the document's
+    JSONLDContext, and `compact` rewrites full IRIs as keys for some other
+    context. Terms are resolved through the context's memoized `resolve`
+    and `compact_iri` methods, so each distinct key is only worked out once
+    however many times it appears.
+
+    The container and hyperlink definitions which JSONLDTarget writes to
+    the context are undone on expansion - container lists become lists of
+    {type: item} objects again, and hyperlinks become {'@id': href}
+    objects - and redone on compaction, so that
+    `compact(expand(body, context), context) == body`.
+
+    Both can be written out as a stream, in which case the big lists in a
+    body (i.e. feature members) are expanded and serialized one item at a
+    time, so the expanded document is never held in memory.
+"""
+
+from __future__ import print_function, division
+
+from .json_context import JSONLDContext
+
+from collections.abc import Mapping, Sequence
+import json
+
+
+def _is_list(value):
+    """ Check whether a value is a list (or a lazily-decoded one)
+    """
+    return isinstance(value, Sequence) and not isinstance(value, str)
+
+
+class _Expander(object):
+
+    """ Expands keys using a context
+    """
+
+    def __init__(self, context):
+        super(_Expander, self).__init__()
+        self.context = context
+
+    def key(self, key):
+        """ Expand a key
+        """
+        if key[:1] in ('#', '@'):
+            return key
+        return self.context.resolve(key)
+
+    def value(self, key, value):
+        """ Expand the value stored under key
+        """
+        definition = self.context.definition(key)
+        if definition is not None:
+            if '@container' in definition and _is_list(value):
+                contained = definition.get('@type')
+                return [self.wrap(contained, item) for item in value]
+            elif definition.get('@type') == '@id' and isinstance(value, str):
+                return {'@id': value}
+        return self.item(value)
+
+    def wrap(self, key, value):
+        """ Expand a single-key object
+        """
+        return {self.key(key): self.value(key, value)}
+
+    def item(self, value):
+        """ Expand a value with no definition
+        """
+        if isinstance(value, Mapping):
+            result = {}
+            for key, child in value.items():
+                if key == '#attributes':
+                    result[key] = {self.key(k): v for k, v in child.items()}
+                else:
+                    result[self.key(key)] = self.value(key, child)
+            return result
+        elif _is_list(value):
+            return [self.item(item) for item in value]
+        return value
+
+    def items(self, key, value):
+        """ Return the expanded items of a list stored under key, one at a
+            time
+        """
+        definition = self.context.definition(key)
+        if definition is not None and '@container' in definition:
+            contained = definition.get('@type')
+            return (self.wrap(contained, item) for item in value)
+        return (self.item(item) for item in value)
+
+
+class _Compacter(object):
+
+    """ Compacts full IRIs using a context
+    """
+
+    def __init__(self, context):
+        super(_Compacter, self).__init__()
+        self.context = context
+
+    def key(self, key):
+        """ Compact a key
+        """
+        if key[:1] in ('#', '@'):
+            return key
+        return self.context.compact_iri(key)
+
+    def value(self, key, value):
+        """ Compact the value stored under the (compacted) key
+        """
+        definition = self.context.definition(key)
+        if definition is not None:
+            if '@container' in definition and _is_list(value):
+                return [self.unwrap(item) for item in value]
+            elif definition.get('@type') == '@id' \
+                    and isinstance(value, Mapping) and list(value) == ['@id']:
+                return value['@id']
+        return self.item(value)
+
+    def unwrap(self, value):
+        """ Compact an item from a container list
+        """
+        if isinstance(value, Mapping) and len(value) == 1:
+            key, item = next(iter(value.items()))
+            key = self.key(key)
+            return self.value(key, item)
+        return self.item(value)
+
+    def item(self, value):
+        """ Compact a value with no definition
+        """
+        if isinstance(value, Mapping):
+            result = {}
+            for key, child in value.items():
+                if key == '#attributes':
+                    result[key] = {self.key(k): v for k, v in child.items()}
+                else:
+                    key = self.key(key)
+                    result[key] = self.value(key, child)
+            return result
+        elif _is_list(value):
+            return [self.item(item) for item in value]
+        return value
+
+    def items(self, key, value):
+        """ Return the compacted items of a list stored under key, one at a
+            time
+        """
+        definition = self.context.definition(key)
+        if definition is not None and '@container' in definition:
+            return (self.unwrap(item) for item in value)
+        return (self.item(item) for item in value)
+
+
+def _stream(transform, body, fhandle):
+    """ Write a transformed body to a file handle
+
+        Dicts are walked down to the first list, and then each item in the
+        list is transformed and serialized in turn.
+    """
+    write = fhandle.write
+
+    # Expansion looks up definitions by the original key, and compaction
+    # by the new one
+    by_new_key = isinstance(transform, _Compacter)
+
+    def _write(key, value):
+        if isinstance(value, Mapping) and '#attributes' not in value \
+                and transform.context.definition(key) is None:
+            write('{')
+            for idx, (child_key, child) in enumerate(value.items()):
+                new_key = transform.key(child_key)
+                if idx:
+                    write(',')
+                write(json.dumps(new_key) + ':')
+                _write(new_key if by_new_key else child_key, child)
+            write('}')
+        elif _is_list(value):
+            write('[')
+            for idx, item in enumerate(transform.items(key, value)):
+                if idx:
+                    write(',')
+                write(json.dumps(item))
+            write(']')
+        else:
+            write(json.dumps(transform.value(key, value)))
+
+    _write(None, body)
+
+
+def expand(body, context, fhandle=None):
+    """ Expand every key in a body to a full IRI
+
+        Parameters:
+            body - the converted body
+            context - the JSONLDContext for the body
+            fhandle - a file handle (opened for text) to stream the output
+                to. Optional, if None then the expanded body is returned.
+
+        Returns:
+            the expanded body, or None if it was written to fhandle
+    """
+    expander = _Expander(context)
+    if fhandle is not None:
+        _stream(expander, body, fhandle)
+        return None
+    return expander.item(body)
+
+
+def compact(body, context, fhandle=None):
+    """ Compact an expanded body using a context
+
+        Parameters:
+            body - an expanded body (see `expand`)
+            context - the JSONLDContext to compact with, or a dictionary
+                mapping terms and prefixes to IRIs
+            fhandle - a file handle (opened for text) to stream the output
+                to. Optional, if None then the compacted body is returned.
+
+        Returns:
+            the compacted body, or None if it was written to fhandle
+    """
+    if not isinstance(context, JSONLDContext):
+        definitions, context = context, JSONLDContext()
+        for term, value in definitions.items():
+            context[term] = value
+    compacter = _Compacter(context)
+    if fhandle is not None:
+        _stream(compacter, body, fhandle)
+        return None
+    return compacter.item(body)
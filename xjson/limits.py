@@ -0,0 +1,129 @@
+""" file:   limits.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Resource limits for converting untrusted or huge documents
+
+    A ConversionLimits instance can be passed to `XJson.from_xml` (or to a
+    JSONLDTarget directly) to bound the amount of work and memory that a
+    single document can consume.
+"""
+
+from __future__ import print_function, division
+
+
+class ConversionLimitError(ValueError):
+
+    """ Raised when a document exceeds one of the conversion limits
+
+        Parameters:
+            limit - the name of the limit which was exceeded
+            maximum - the value of the limit
+            value - the value which exceeded it
+    """
+
+    def __init__(self, limit, maximum, value):
+        msg = 'Document exceeds {0}: got {1}, maximum is {2}'
+        super(ConversionLimitError, self).__init__(
+            msg.format(limit, value, maximum))
+        self.limit = limit
+        self.maximum = maximum
+        self.value = value
+
+
+class ConversionLimits(object):
+
+    """ Limits on the resources used by a single conversion
+
+        Any limit which is None is not checked. When a limit is hit,
+        what happens depends on the policy:
+
+            if policy == 'raise', then a ConversionLimitError is raised and
+                the conversion is abandoned.
+            if policy == 'truncate', then the converter drops whatever
+                doesn't fit (elements which are too deep, text past the
+                limits, or everything after the element or context limits
+                are hit) and returns a well-formed partial result.
+
+        Parameters:
+            max_depth - the maximum element nesting depth
+            max_elements - the maximum number of elements
+            max_text_bytes - the maximum total size of text, in bytes
+            max_data_bytes - the maximum size of a single '#data' value, in
+                bytes
+            max_context_size - the maximum number of entries in the JSON-LD
+                context, checked as each element starts
+            policy - either 'raise' or 'truncate'. Optional, defaults to
+                'raise'.
+            huge_tree - whether to switch off lxml's own security
+                restrictions on very deep trees and very long text nodes.
+                Only use this for trusted inputs. Optional, defaults to
+                False.
+            max_input_bytes - the maximum size of an XML document, in
+                bytes. This is checked up front (whatever the policy) by
+                callers which know the size before reading the document,
+                such as the conversion service. Optional.
+    """
+
+    policies = ('raise', 'truncate')
+
+    def __init__(self, max_depth=None, max_elements=None,
+                 max_text_bytes=None, max_data_bytes=None,
+                 max_context_size=None, policy='raise', huge_tree=False,
+                 max_input_bytes=None):
+        super(ConversionLimits, self).__init__()
+        if policy not in self.policies:
+            msg = ("Invalid limit policy {0}, allowed values are {1}")
+            raise ValueError(msg.format(policy, self.policies))
+        self.max_depth = max_depth
+        self.max_elements = max_elements
+        self.max_text_bytes = max_text_bytes
+        self.max_data_bytes = max_data_bytes
+        self.max_context_size = max_context_size
+        self.max_input_bytes = max_input_bytes
+        self.policy = policy
+        self.huge_tree = huge_tree
+
+    def __repr__(self):
+        """ String representation
+        """
+        attrs = ('max_depth', 'max_elements', 'max_text_bytes',
+                 'max_data_bytes', 'max_context_size', 'max_input_bytes',
+                 'policy', 'huge_tree')
+        return 'ConversionLimits({0})'.format(', '.join(
+            '{0}={1!r}'.format(a, getattr(self, a)) for a in attrs))
+
+    def parser_options(self):
+        """ Return keyword arguments for lxml.etree.XMLParser
+
+            External entities are never resolved when limits are in force,
+            since they are the classic way of blowing up a parser.
+        """
+        return {
+            'huge_tree': self.huge_tree,
+            'resolve_entities': False,
+            'no_network': True
+        }
+
+    def check(self, limit, value):
+        """ Check a value against one of the limits
+
+            Parameters:
+                limit - the name of the limit (e.g. 'max_depth')
+                value - the value to check
+
+            Returns:
+                True if the value is within the limit, False if the value
+                exceeds the limit and the policy is to truncate
+
+            Raises:
+                ConversionLimitError if the value exceeds the limit and the
+                policy is to raise
+        """
+        maximum = getattr(self, limit)
+        if maximum is None or value <= maximum:
+            return True
+        elif self.policy == 'raise':
+            raise ConversionLimitError(limit, maximum, value)
+        else:
+            return False
@@ -0,0 +1,174 @@
+""" file:   merge.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Merging converted documents into a single collection
+
+    Paging through a WFS or splitting a big file gives lots of partial
+    feature collections, each converted with its own context. Merging them
+    means unioning their contexts and namespace maps, and fixing up any
+    keys whose prefix means something different in the merged document
+    (e.g. 'geosciml' for GeoSciML 2.0 in one page and 2.2 in another).
+
+    Everything is done in one pass over the documents. A document's
+    members are only copied if one of its prefixes had to be renamed -
+    otherwise they go into the merged collection as they are.
+"""
+
+from __future__ import print_function, division
+
+from .json_context import JSONLDContext
+from .gml import member_key, members
+
+from collections.abc import Mapping, Sequence
+
+
+def rename_key(key, renamed):
+    """ Rename the prefix of a 'prefix:localname' key (or a bare prefix)
+
+        Prefixes can themselves contain a ':' (e.g. 'geo:1.0', see
+        `NamespaceMap.add_from_uri`) so the key is split at the last ':'.
+
+        Parameters:
+            key - the key to rename
+            renamed - a dictionary mapping old prefixes to new ones
+
+        Returns:
+            the renamed key, or key if its prefix hasn't changed
+    """
+    try:
+        return renamed[key]
+    except KeyError:
+        pass
+    prefix, seperator, localname = key.rpartition(':')
+    try:
+        return renamed[prefix] + seperator + localname
+    except KeyError:
+        return key
+
+
+def rename_keys(value, renamed):
+    """ Rename the prefixes of all the keys in a converted subtree
+
+        Only keys are renamed - text and attribute values are left alone,
+        since there's no way to tell a prefixed value from ordinary text.
+
+        Parameters:
+            value - the converted subtree
+            renamed - a dictionary mapping old prefixes to new ones
+
+        Returns:
+            the renamed subtree (a copy if anything changed)
+    """
+    if not renamed:
+        return value
+    if isinstance(value, Mapping):
+        return {rename_key(k, renamed): rename_keys(v, renamed)
+                for k, v in value.items()}
+    elif isinstance(value, Sequence) and not isinstance(value, str):
+        return [rename_keys(item, renamed) for item in value]
+    return value
+
+
+def _rename_definition(value, renamed, namespace_handling):
+    """ Rename the prefixes used in a context entry
+    """
+    if isinstance(value, dict):
+        return {k: rename_key(v, renamed)
+                if k in ('@id', '@type') and isinstance(v, str) else v
+                for k, v in value.items()}
+    elif namespace_handling == 'remove' and isinstance(value, str) \
+            and value.count(':') == 1 and '//' not in value:
+        # Compact 'prefix:localname' reference
+        return rename_key(value, renamed)
+    return value
+
+
+def merge_documents(documents, namespace_handling=None):
+    """ Merge converted feature collections into one collection
+
+        The root element (and anything in it other than the members)
+        comes from the first document, members are concatenated in order,
+        and context entries are taken from the first document which
+        defines them. Namespaces keep the prefix they were first given; a
+        namespace whose prefix is already taken by another namespace gets
+        a new one (see `NamespaceMap.merge`), and the keys in its documents
+        are rewritten to match.
+
+        Parameters:
+            documents - an iterable of (body, context) tuples
+            namespace_handling - the namespace handling used for the
+                documents. Optional, taken from the first document if not
+                given. Documents converted with different namespace
+                handling can't be merged.
+
+        Returns:
+            a tuple (body, context) for the merged collection
+    """
+    context = None
+    root_tag, root, key, collected = None, None, None, []
+    for body, doc_context in documents:
+        if context is None:
+            namespace_handling = namespace_handling \
+                or doc_context.namespace_handling
+            context = JSONLDContext(namespace_handling=namespace_handling)
+        elif doc_context.namespace_handling != namespace_handling:
+            raise ValueError(
+                "Can't merge documents with namespace handling {0} and "
+                "{1}".format(namespace_handling,
+                             doc_context.namespace_handling))
+
+        # Work out which prefixes need renaming
+        renamed = context.mapping.merge(doc_context.mapping)
+        (doc_root_tag, doc_root), = body.items()
+
+        # Containers only have their member key in the context
+        doc_key = member_key(doc_root)
+        if doc_key is None and isinstance(doc_root, list):
+            definition = doc_context.definition(doc_root_tag) or {}
+            doc_key = definition.get('@type')
+        doc_root_tag = rename_key(doc_root_tag, renamed)
+        if root_tag is None:
+            root_tag, root = doc_root_tag, {}
+
+        # Merge contexts, first definition wins. Whether the root is a
+        # container depends on the whole collection so we leave that to last
+        for tag, value in doc_context.items():
+            tag = rename_key(tag, renamed)
+            if tag == root_tag and isinstance(value, dict):
+                continue
+            if tag not in context.keys():
+                context[tag] = _rename_definition(value, renamed,
+                                                  namespace_handling)
+
+        # Pull out members, and any other content around them
+        if key is None and doc_key is not None:
+            key = rename_key(doc_key, renamed)
+        doc_members = members(doc_root, doc_key)
+        if renamed:
+            doc_members = [rename_keys(m, renamed) for m in doc_members]
+        collected.extend(doc_members)
+        if isinstance(doc_root, Mapping):
+            for tag, value in doc_root.items():
+                if tag == doc_key:
+                    # Members go in later but keep their position
+                    root.setdefault(key, None)
+                    continue
+                tag = rename_key(tag, renamed)
+                if tag not in root:
+                    root[tag] = rename_keys(value, renamed)
+    if root_tag is None:
+        raise ValueError('No documents to merge')
+
+    # Put the members back into the root element
+    others = [k for k in root.keys() if k not in ('#attributes', key)]
+    if not others and len(collected) > 1:
+        # Only members, so make a container in the same way as JSONLDTarget
+        root = collected
+        if context.get(root_tag) is None:
+            context[root_tag] = {'@id': root_tag,
+                                 '@type': key,
+                                 '@container': '@set'}
+    elif collected:
+        root[key] = collected if len(collected) > 1 else collected[0]
+    return {root_tag: root}, context
@@ -10,9 +10,50 @@
 
 from __future__ import print_function, division
 
+from . import well_known
+
 from lxml import etree
 
 
+def split_uri(namespace_uri):
+    """ Split a namespace URI into a short name and a version
+
+        See `NamespaceMap.add_from_uri` for the heuristics used. If the URI
+        doesn't end in a version number, the version is the token before
+        the short name.
+
+        Parameters:
+            namespace_uri - a URI denoting a namespace
+
+        Returns:
+            a tuple (short_namespace, version)
+    """
+    # Get tokens from namespace
+    if '://' in namespace_uri:
+        # We have a namespace of the form protocol://root/ns/ns/ns/tag
+        _, namespace = namespace_uri.replace('://', '@').split('@')
+        tokens = namespace.split('/')
+    elif ':' in namespace_uri:
+        # We have a URN namespace of the form ns:ns:ns:ns:tag
+        tokens = namespace_uri.split(':')
+    else:
+        raise ValueError("Can't shorten namespace "
+                         "URI {0}".format(namespace_uri))
+
+    # Find the shortened namespace - last token can often be a version number,
+    # (e.g. maj.min.build*) so we just split on periods and look for that.
+    last = tokens.pop()
+    last_is_version = len(last.split('.')) > 1 and \
+                      all([tk.isdigit() for tk in last.split('.')[:-1]])
+    if last_is_version:
+        version = last
+        short_namespace = tokens.pop().lower()
+    else:
+        short_namespace = last.lower()
+        version = tokens.pop()
+    return short_namespace, version
+
+
 class NamespaceMap(dict):
 
     """ Two-way dictionary to store shortened XML namespace keys
@@ -31,6 +72,10 @@ class NamespaceMap(dict):
         super(NamespaceMap, self).__init__()
         self.inverse = dict(reversed(item) for item in self.items())
 
+        # Init internal variables
+        self._cached = False
+        self._stored_uris, self._stored_namespaces = set(), set()
+
         # Init with namespace dictionaries
         for namespace in namespaces:
             try:
@@ -48,16 +93,20 @@ class NamespaceMap(dict):
         if kwargs:
             self.update(kwargs)
 
-        # Init internal variables
-        self._cached = False
-        self._stored_uris, self._stored_namespaces = set(), set()
-
     def __str__(self):
         return super(NamespaceMap, self).__str__()
 
     def __repr__(self):
         return super(NamespaceMap, self).__repr__()
 
+    def __reduce__(self):
+        """ Pickle support
+
+            The default dict pickling sets items before restoring instance
+            attributes, which breaks __setitem__, so we initialize first.
+        """
+        return (self.__class__, (), self.__dict__, None, iter(self.items()))
+
     def __setitem__(self, key, value):
         """ Associate the given shortened namespace with the given
             namespace URI.
@@ -205,6 +254,67 @@ class NamespaceMap(dict):
         except ValueError:
             pass
 
+    def merge(self, other):
+        """ Add the namespaces from another map
+
+            Namespaces which are already here keep the prefix they have
+            here. If a prefix from other is already used for a different
+            namespace, then the namespace gets a new prefix qualified with
+            its version (e.g. 'geosciml_2.2'). Unlike `add_from_uri` the new
+            prefix never contains a ':', so it can still be used in
+            'prefix:localname' keys.
+
+            Parameters:
+                other - the NamespaceMap (or dictionary) to merge
+
+            Returns:
+                a dictionary mapping prefixes in other to their prefixes
+                here, for the ones which are different
+        """
+        renamed = {}
+        for prefix, namespace_uri in other.items():
+            current = self.inverse.get(namespace_uri)
+            if current is None:
+                current = prefix
+                if current in self:
+                    try:
+                        short_namespace, version = split_uri(namespace_uri)
+                    except (ValueError, IndexError):
+                        short_namespace, version = prefix, ''
+                    current = '_'.join(
+                        t for t in (short_namespace.replace(':', '_'),
+                                    version.replace(':', '_')) if t)
+                    base, count = current, 2
+                    while current in self:
+                        current = '{0}_{1}'.format(base, count)
+                        count += 1
+                self[current] = namespace_uri
+            if current != prefix:
+                renamed[prefix] = current
+        return renamed
+
+    def add_declared(self, prefix, namespace_uri):
+        """ Add a namespace declared with a prefix in a document
+
+            Well-known namespaces get their canonical prefix. Otherwise the
+            declared prefix is used (lowercased) if it's free, and if not
+            we fall back to the heuristics in `add_from_uri`.
+
+            Parameters:
+                prefix - the declared prefix, or '' or None for the default
+                    namespace
+                namespace_uri - a URI denoting a namespace
+        """
+        if namespace_uri in self.stored_namespace_uris:
+            return
+        if prefix and well_known.prefix_for(namespace_uri) is None:
+            prefix = prefix.lower()
+            if prefix not in self \
+                    and not well_known.is_reserved(prefix, namespace_uri):
+                self[prefix] = namespace_uri
+                return
+        self.add_from_uri(namespace_uri)
+
     def add_from_uri(self, namespace_uri):
         """ Shorten a namespace URI using some heuristics
 
@@ -242,6 +352,10 @@ class NamespaceMap(dict):
                 "http://www.opengis.net/sampling/1.0.1alpha"
                     -> "sampling:1.0.1alpha",
 
+            Well-known namespaces (see `xjson.well_known`) skip all this
+            and get their canonical prefix, as long as it isn't already
+            in use. Other namespaces aren't given canonical prefixes.
+
             Parameters:
                 namespace_uri - a URI denoting a namespace
         """
@@ -249,29 +363,13 @@ class NamespaceMap(dict):
         if namespace_uri in self.stored_namespace_uris:
             return
 
-        # Get tokens from namespace
-        if '://' in namespace_uri:
-            # We have a namespace of the form protocol://root/ns/ns/ns/tag
-            _, namespace = namespace_uri.replace('://', '@').split('@')
-            tokens = namespace.split('/')
-        elif ':' in namespace_uri:
-            # We have a URN namespace of the form ns:ns:ns:ns:tag
-            tokens = namespace_uri.split(':')
-        else:
-            raise ValueError("Can't shorten namespace "
-                             "URI {0}".format(namespace_uri))
-
-        # Find the shortened namespace - last token can often be a version number,
-        # (e.g. maj.min.build*) so we just split on periods and look for that.
-        last = tokens.pop()
-        last_is_version = len(last.split('.')) > 1 and \
-                          all([tk.isdigit() for tk in last.split('.')[:-1]])
-        if last_is_version:
-            version = last
-            short_namespace = tokens.pop().lower()
-        else:
-            short_namespace = last.lower()
-            version = tokens.pop()
+        # Or if it's well-known
+        prefix = well_known.prefix_for(namespace_uri)
+        if prefix is not None and prefix not in self:
+            self[prefix] = namespace_uri
+            return
+
+        short_namespace, version = split_uri(namespace_uri)
 
         # Check that we don't already have this namespace/url combination
         # We need to qualify our namespace with another version
@@ -279,6 +377,8 @@ class NamespaceMap(dict):
         if short_namespace in nspaces:
             if namespace_uri not in uris:
                 short_namespace = short_namespace + ':' + version
+        elif well_known.is_reserved(short_namespace, namespace_uri):
+            short_namespace = short_namespace + ':' + version
 
         # Add the latest mapping
         self[short_namespace] = namespace_uri
@@ -0,0 +1,242 @@
+""" file:   plans.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Precompiled per-tag conversion plans
+
+    When JSONLDTarget finishes an element it works out what shape the
+    element has - whether it is just text, just a hyperlink, a container
+    for a list of children, or a general object. For a given feature type
+    these answers hardly ever change, so a ConversionPlan records the
+    expected answer for each tag (learned from sample documents or read
+    from an XML schema) and lets the target go straight to the right
+    conversion. Elements which don't match their plan are converted the
+    long way, so a plan can only change the speed of a conversion, not
+    the result.
+"""
+
+from __future__ import print_function, division
+
+from .json_target import JSONLDTarget
+
+from collections import defaultdict, Counter
+from lxml import etree
+import io
+import json
+
+XSD_NAMESPACE = 'http://www.w3.org/2001/XMLSchema'
+GML_REFERENCE_TYPES = ('ReferenceType',)
+GML_ASSOCIATION_GROUPS = ('AssociationAttributeGroup',)
+
+# The kinds of element that a plan can short-cut, see
+# JSONLDTarget._finalize for what these mean
+PLANNED_KINDS = ('data', 'href', 'container', 'empty')
+
+
+class _PlanLearner(JSONLDTarget):
+
+    """ A JSONLDTarget which records how each tag was converted
+    """
+
+    def __init__(self, namespace_handling=None):
+        super(_PlanLearner, self).__init__(
+            namespace_handling=namespace_handling)
+        self.observed = defaultdict(Counter)
+
+    def end(self, tag):
+        """ Finish the current element, recording its kind
+        """
+        name, elem = self.stack.pop()
+        elem, kind = self._finalize(name, elem)
+        self.observed[tag][kind] += 1
+        self._attach(name, elem)
+
+
+class ConversionPlan(object):
+
+    """ A mapping from XML tags to the expected kind of each element
+
+        Tags are given in lxml's '{namespace}localname' form, so a plan
+        doesn't depend on the namespace handling used for a conversion.
+
+        Parameters:
+            entries - a dictionary mapping tags to kinds. Kinds must be one
+                of 'data', 'href', 'container' or 'empty'.
+    """
+
+    def __init__(self, entries=None):
+        super(ConversionPlan, self).__init__()
+        self.entries = {}
+        if entries:
+            self.update(entries)
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'ConversionPlan({0})'.format(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, tag):
+        return tag in self.entries
+
+    def __getitem__(self, tag):
+        return self.entries[tag]
+
+    def __setitem__(self, tag, kind):
+        """ Set the expected kind for a tag
+        """
+        if kind not in PLANNED_KINDS:
+            msg = 'Invalid plan kind {0} for {1}, allowed values are {2}'
+            raise ValueError(msg.format(kind, tag, PLANNED_KINDS))
+        self.entries[tag] = kind
+
+    def get(self, tag):
+        """ Get the kind for a tag, returning None if not planned
+        """
+        return self.entries.get(tag)
+
+    def update(self, entries):
+        """ Add entries from a dictionary or another plan
+        """
+        if isinstance(entries, ConversionPlan):
+            entries = entries.entries
+        for tag, kind in entries.items():
+            self[tag] = kind
+
+    def dumps(self):
+        """ Serialize the plan to a JSON string
+        """
+        return json.dumps(self.entries, indent=4, sort_keys=True)
+
+    @classmethod
+    def loads(cls, string):
+        """ Load a plan from a JSON string created by `dumps`
+        """
+        return cls(json.loads(string))
+
+    @classmethod
+    def learn(cls, *documents, **kwargs):
+        """ Learn a plan from some sample documents
+
+            Each tag is planned as the kind it most often converts to in
+            the samples. Tags which mostly convert to general objects
+            aren't planned.
+
+            Parameters:
+                *documents - strings of XML, or handles to open XML files
+                namespace_handling - the namespace handling to use when
+                    converting the samples. Optional, the learned plan
+                    doesn't depend on this.
+
+            Returns:
+                a new ConversionPlan instance
+        """
+        learner = _PlanLearner(
+            namespace_handling=kwargs.get('namespace_handling'))
+        parser = etree.XMLParser(target=learner)
+        for document in documents:
+            if isinstance(document, io.IOBase):
+                document = document.read()
+            elif not isinstance(document, bytes):
+                document = document.encode('utf-8')
+            etree.XML(document, parser)
+
+        plan = cls()
+        for tag, kinds in learner.observed.items():
+            kind, _ = kinds.most_common(1)[0]
+            if kind in PLANNED_KINDS:
+                plan[tag] = kind
+        return plan
+
+    @classmethod
+    def from_xsd(cls, xsd):
+        """ Compile a plan from an XML schema
+
+            This is meant for the output of a WFS DescribeFeatureType
+            request. Elements with simple types are planned as text, GML
+            reference properties as hyperlinks, and elements whose type is
+            a sequence of a single repeated element as containers.
+            Everything else is left to the general conversion.
+
+            Parameters:
+                xsd - a string containing the schema, a handle to an open
+                    schema file, or an lxml Element containing the schema
+
+            Returns:
+                a new ConversionPlan instance
+        """
+        if isinstance(xsd, io.IOBase):
+            xsd = xsd.read()
+        if isinstance(xsd, str):
+            xsd = xsd.encode('utf-8')
+        if isinstance(xsd, bytes):
+            xsd = etree.XML(xsd)
+
+        xs = '{{{0}}}'.format(XSD_NAMESPACE)
+        target_ns = xsd.get('targetNamespace')
+        qualified = xsd.get('elementFormDefault') == 'qualified'
+        named_types = {
+            t.get('name'): t for t in xsd.iter(xs + 'complexType')
+            if t.get('name')}
+
+        def _local(name):
+            """ Strip the prefix from a QName in an attribute value
+            """
+            return name.split(':')[-1] if name else name
+
+        def _kind_of(element):
+            """ Work out the planned kind of an xs:element
+            """
+            type_name = element.get('type')
+            if type_name is not None:
+                local_type = _local(type_name)
+                prefix = type_name.split(':')[0] if ':' in type_name else None
+                if element.nsmap.get(prefix) == XSD_NAMESPACE:
+                    return 'data'
+                elif local_type in GML_REFERENCE_TYPES:
+                    return 'href'
+                complex_type = named_types.get(local_type)
+            else:
+                if element.find(xs + 'simpleType') is not None:
+                    return 'data'
+                complex_type = element.find(xs + 'complexType')
+            if complex_type is None:
+                return None
+
+            # Hyperlink-only properties just carry the association attributes
+            children = [c for c in complex_type
+                        if isinstance(c.tag, str)
+                        and c.tag != xs + 'annotation']
+            if len(children) == 1 \
+                    and children[0].tag == xs + 'attributeGroup' \
+                    and _local(children[0].get('ref')) \
+                    in GML_ASSOCIATION_GROUPS:
+                return 'href'
+
+            # Containers are a sequence of one repeated element
+            if len(children) == 1 and children[0].tag == xs + 'sequence':
+                items = [c for c in children[0]
+                         if isinstance(c.tag, str)
+                         and c.tag != xs + 'annotation']
+                if len(items) == 1 and items[0].tag == xs + 'element' \
+                        and items[0].get('maxOccurs', '1') not in ('0', '1'):
+                    return 'container'
+            return None
+
+        plan = cls()
+        for element in xsd.iter(xs + 'element'):
+            name = element.get('name')
+            if name is None:
+                continue
+            is_global = element.getparent() is xsd
+            if target_ns and (is_global or qualified
+                              or element.get('form') == 'qualified'):
+                tag = '{{{0}}}{1}'.format(target_ns, name)
+            else:
+                tag = name
+            kind = _kind_of(element)
+            if kind is not None:
+                plan[tag] = kind
+        return plan
@@ -7,6 +7,13 @@
 
     XJson descriptions can be shared by many different objects, so it makes
     sense to seperate these out into a seperate registry.
+
+    The registry can be used from many threads at once. Lookups go straight
+    to the underlying dictionary without taking a lock (single dictionary
+    operations are atomic, both with the GIL and in free-threaded builds),
+    while registration and deregistration take one of a set of striped
+    locks, chosen by ident, so that writers for different idents don't
+    contend with each other.
 """
 
 from __future__ import print_function, division
@@ -14,9 +21,13 @@ from __future__ import print_function, division
 from .singleton import singleton
 
 import logging
+import threading
 
 LOGGER = logging.getLogger('pysiss')
 
+# Number of locks shared between idents for writes
+STRIPES = 16
+
 
 class XJsonRegistry(dict, metaclass=singleton):
 
@@ -25,24 +36,40 @@ class XJsonRegistry(dict, metaclass=singleton):
         Since GeoSciML allows.xjson reuse, we need to have a central
         repository of.xjson which stores the actual etrees, and objects can
         refer to keys within this repository.
+
+        Attributes:
+            registered_ids - the set of registered idents
     """
 
-    registered_ids = set()
+    def __init__(self, *args, **kwargs):
+        super(XJsonRegistry, self).__init__(*args, **kwargs)
+        self.registered_ids = set(self)
+        self._locks = [threading.Lock() for _ in range(STRIPES)]
+
+    def _lock(self, ident):
+        """ Return the write lock for an ident
+        """
+        return self._locks[hash(ident) % STRIPES]
 
     def register(self, xjson, replace_existing=False, verbose=False):
         """ Register a.xjson item in the registry
         """
-        # Check to see whether the item already exists
-        if not replace_existing:
-            if xjson.ident in self.registered_ids and verbose:
-                LOGGER.warn(('XJson ID {0} already exists, skipping'
-                             ' registration').format(xjson.ident))
-            return
+        ident = xjson.ident
+        with self._lock(ident):
+            # Check to see whether the item already exists
+            if not replace_existing and ident in self:
+                if verbose:
+                    LOGGER.warning(('XJson ID {0} already exists, skipping'
+                                    ' registration').format(ident))
+                return
 
-        # If it doesn't already exist
-        self[xjson.ident] = xjson
+            # If it doesn't already exist
+            self[ident] = xjson
+            self.registered_ids.add(ident)
 
     def deregister(self, ident):
         """ Deregister the given xjson item given by the key
         """
-        del self[ident]
+        with self._lock(ident):
+            del self[ident]
+            self.registered_ids.discard(ident)
@@ -0,0 +1,713 @@
+""" file:   service.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: A long-running local conversion service
+
+    Every process that converts a document pays for interpreter startup,
+    imports and cold caches before it gets to any real work. A
+    ConversionService keeps all of that warm: each worker thread holds an
+    XJsonConverter session (so processed tags carry over between
+    documents), and rendered outputs are kept in a small cache keyed on the
+    content of the request.
+
+    Requests are coalesced - while all the workers are busy, a dispatcher
+    thread collects whatever arrives (up to `max_batch` documents) and hands
+    the lot to the next free worker as one job, so lots of concurrent small
+    requests don't each pay for a trip through the pool, and a request that
+    arrives when a worker is free doesn't wait at all.
+
+    The service can be used directly from Python, or over HTTP on localhost
+    or a Unix socket (see `make_server`):
+
+        python -m xjson.service --socket /tmp/xjson.sock
+
+    which takes
+
+        POST /convert?format=json   a single XML document
+        POST /batch?format=jsonl    several documents, framed (see `frame`)
+        GET /metrics                queue depth, latency and batch counters
+
+    and returns 'json', 'jsonl' or 'binary' (see `xjson.binary`) output.
+    Batched binary output is framed in the same way as the input.
+
+    The workers are threads, and conversion runs Python callbacks for every
+    element, so a service only converts one document at a time on a
+    standard (GIL) build - extra workers overlap conversion with I/O and
+    rendering but don't add CPU parallelism. To use more cores, run one
+    service process per core (e.g. on separate sockets) and spread requests
+    between them.
+"""
+
+from __future__ import print_function, division
+
+from .converter import XJsonConverter
+from .cli import render, NAMESPACE_HANDLING
+from . import binary
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import collections
+import hashlib
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+import urllib.parse
+
+LOGGER = logging.getLogger('pysiss')
+
+# Output formats and their content types
+FORMATS = {
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'binary': 'application/octet-stream'
+}
+
+# Frames are a little-endian payload length followed by the payload
+_LENGTH = struct.Struct('<I')
+
+# Number of recent requests used for the latency figures
+LATENCY_WINDOW = 1024
+
+# Largest request body accepted over HTTP, unless the limits say otherwise
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def frame(payloads):
+    """ Pack several payloads into a single byte string
+
+        Parameters:
+            payloads - an iterable of byte strings
+
+        Returns:
+            the framed payloads
+    """
+    parts = []
+    for payload in payloads:
+        parts.append(_LENGTH.pack(len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def unframe(data):
+    """ Split framed data back into its payloads
+
+        Parameters:
+            data - a byte string produced by `frame`
+
+        Returns:
+            a list of byte strings
+
+        Raises:
+            ValueError if the data is truncated
+    """
+    payloads, offset, size = [], 0, len(data)
+    while offset < size:
+        if offset + _LENGTH.size > size:
+            raise ValueError('Truncated frame header at byte {0}'.format(
+                offset))
+        length, = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        if offset + length > size:
+            raise ValueError('Truncated frame at byte {0}, expected {1} '
+                             'bytes'.format(offset, length))
+        payloads.append(data[offset:offset + length])
+        offset += length
+    return payloads
+
+
+def render_output(xjson, fmt):
+    """ Render an XJson instance as bytes in one of the service formats
+
+        Parameters:
+            xjson - the XJson instance to render
+            fmt - one of 'json', 'jsonl' or 'binary'
+
+        Returns:
+            the rendered document
+    """
+    if fmt == 'binary':
+        return xjson.to_bytes()
+    elif fmt in ('json', 'jsonl'):
+        return render(xjson, fmt).encode('utf-8')
+    else:
+        raise ValueError('Unknown output format {0}, allowed values '
+                         'are {1}'.format(fmt, tuple(FORMATS.keys())))
+
+
+def join_outputs(outputs, fmt):
+    """ Join several rendered documents into one response body
+
+        JSON documents become a JSON list, JSONL documents one per line,
+        and binary documents are framed.
+    """
+    if fmt == 'json':
+        return b'[' + b','.join(outputs) + b']'
+    elif fmt == 'jsonl':
+        return b''.join(output + b'\n' for output in outputs)
+    return frame(outputs)
+
+
+def error_output(error, fmt):
+    """ Render a conversion error in place of a document in a batch
+
+        Errors are returned as a document with a single '#error' key, which
+        can't clash with a converted tag.
+    """
+    body = {'#error': '{0}: {1}'.format(type(error).__name__, error)}
+    if fmt == 'binary':
+        return binary.encode(body)
+    return json.dumps(body).encode('utf-8')
+
+
+class ServiceMetrics(object):
+
+    """ Counters and latency figures for a ConversionService
+
+        All the methods are thread-safe.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        super(ServiceMetrics, self).__init__()
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self.started = time.time()
+        self.queue_depth = self.in_flight = 0
+        self.requests = self.batches = self.errors = self.cache_hits = 0
+        self.batched_documents = 0
+
+    def queued(self):
+        """ Note a new request
+        """
+        with self._lock:
+            self.queue_depth += 1
+            self.requests += 1
+
+    def batch(self, size):
+        """ Note a batch starting on a worker
+        """
+        with self._lock:
+            self.queue_depth -= size
+            self.in_flight += size
+            self.batches += 1
+            self.batched_documents += size
+
+    def finished(self, latency, error=False, cached=False):
+        """ Note a finished request, with its latency in seconds
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self._latencies.append(latency)
+            if error:
+                self.errors += 1
+            if cached:
+                self.cache_hits += 1
+
+    def snapshot(self):
+        """ Return the current metrics as a dictionary
+
+            Latencies are in milliseconds, over the most recent requests.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            result = {
+                'uptime': time.time() - self.started,
+                'queue_depth': self.queue_depth,
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': (self.batched_documents / self.batches
+                                    if self.batches else 0),
+                'errors': self.errors,
+                'cache_hits': self.cache_hits,
+            }
+        if latencies:
+            def _percentile(fraction):
+                idx = min(int(fraction * len(latencies)), len(latencies) - 1)
+                return latencies[idx] * 1e3
+            result['latency_ms'] = {
+                'mean': sum(latencies) / len(latencies) * 1e3,
+                'p50': _percentile(0.5),
+                'p95': _percentile(0.95),
+                'p99': _percentile(0.99),
+                'max': latencies[-1] * 1e3
+            }
+        else:
+            result['latency_ms'] = {}
+        return result
+
+
+class ConversionService(object):
+
+    """ Converts documents on a pool of warm worker threads
+
+        Worker threads share the GIL, so they don't convert in parallel
+        (see the module docstring).
+
+        Parameters:
+            namespace_handling, limits, plan, interner - as for
+                `XJson.from_xml`. The interner (if any) is shared between
+                the workers.
+            workers - the number of worker threads. Optional, defaults to
+                the number of CPUs. More workers don't make conversion
+                itself any faster.
+            max_batch - the largest number of documents handed to a worker
+                at once. Optional, defaults to 32.
+            max_wait - how often (in seconds) to check for a free worker
+                while collecting a batch. Optional, defaults to 2ms.
+            cache_size - the number of rendered outputs to keep, keyed on
+                the content of the request. Optional, defaults to 256, use
+                0 to turn caching off.
+            max_request_bytes - the largest HTTP request body accepted,
+                in bytes. Optional, defaults to MAX_REQUEST_BYTES. If the
+                limits have a max_input_bytes then the smaller of the two
+                is used.
+    """
+
+    def __init__(self, namespace_handling=None, limits=None, plan=None,
+                 interner=None, workers=None, max_batch=32, max_wait=0.002,
+                 cache_size=256, max_request_bytes=MAX_REQUEST_BYTES):
+        super(ConversionService, self).__init__()
+        if max_batch < 1:
+            raise ValueError('max_batch must be at least 1')
+        self.namespace_handling = namespace_handling or 'shorten'
+        self.limits = limits
+        self.plan = plan
+        self.interner = interner
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self.max_request_bytes = max_request_bytes
+        if limits is not None and limits.max_input_bytes is not None:
+            self.max_request_bytes = min(max_request_bytes,
+                                         limits.max_input_bytes)
+        self.metrics = ServiceMetrics()
+
+        self._local = threading.local()
+        self._cache = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._idle = threading.Semaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._dispatcher = threading.Thread(target=self._dispatch,
+                                            name='xjson-dispatcher')
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _converter(self):
+        """ Return the converter session for the current worker thread
+        """
+        try:
+            return self._local.converter
+        except AttributeError:
+            converter = self._local.converter = XJsonConverter(
+                namespace_handling=self.namespace_handling,
+                limits=self.limits, plan=self.plan, interner=self.interner)
+            return converter
+
+    def submit(self, xml, fmt=None):
+        """ Queue a document for conversion
+
+            Parameters:
+                xml - a string or bytestring of XML
+                fmt - the output format, one of 'json', 'jsonl' or 'binary'.
+                    Optional, if None then the result is an XJson instance.
+
+            Returns:
+                a concurrent.futures.Future for the result
+        """
+        if fmt is not None and fmt not in FORMATS:
+            raise ValueError('Unknown output format {0}, allowed values '
+                             'are {1}'.format(fmt, tuple(FORMATS.keys())))
+        if isinstance(xml, str):
+            xml = xml.encode('utf-8')
+        future = Future()
+
+        # Check and enqueue together, so nothing lands behind close()'s
+        # sentinel where the dispatcher would never see it
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError('Service has been closed')
+            self.metrics.queued()
+            self._requests.put((xml, fmt, future, time.perf_counter()))
+        return future
+
+    def convert(self, xml, fmt=None):
+        """ Convert a document, waiting for the result
+
+            Parameters:
+                xml, fmt - as for `submit`
+
+            Returns:
+                the converted document
+        """
+        return self.submit(xml, fmt).result()
+
+    def convert_batch(self, documents, fmt=None):
+        """ Convert several documents, waiting for all of the results
+
+            Unlike `convert`, a failed document doesn't raise - the error
+            is returned in its place (as an exception instance, or as an
+            '#error' document if fmt is given).
+
+            Parameters:
+                documents - an iterable of XML strings or bytestrings
+                fmt - as for `submit`
+
+            Returns:
+                a list of results, in the same order as documents
+        """
+        futures = [self.submit(xml, fmt) for xml in documents]
+        results = []
+        for future in futures:
+            error = future.exception()
+            if error is None:
+                results.append(future.result())
+            elif fmt is None:
+                results.append(error)
+            else:
+                results.append(error_output(error, fmt))
+        return results
+
+    def _dispatch(self):
+        """ Collect requests into batches and hand them to the workers
+
+            A batch is handed over as soon as a worker is free, so batching
+            only holds requests back while all the workers are busy.
+        """
+        stopping = False
+        while not stopping:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            while True:
+                # Take whatever else is waiting
+                while len(batch) < self.max_batch:
+                    try:
+                        request = self._requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request is None:
+                        stopping = True
+                        break
+                    batch.append(request)
+                if stopping or len(batch) >= self.max_batch:
+                    self._idle.acquire()
+                    break
+                elif self._idle.acquire(timeout=self.max_wait):
+                    break
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        """ Convert a batch of requests on a worker thread
+        """
+        try:
+            self._convert_batch(batch)
+        finally:
+            self._idle.release()
+
+    def _convert_batch(self, batch):
+        """ Convert the requests in a batch
+        """
+        self.metrics.batch(len(batch))
+        converter = self._converter()
+        for xml, fmt, future, queued in batch:
+            if not future.set_running_or_notify_cancel():
+                self.metrics.finished(time.perf_counter() - queued)
+                continue
+            key, cached = None, None
+            if fmt is not None and self.cache_size:
+                key = (hashlib.blake2b(xml, digest_size=16).digest(), fmt)
+                cached = self._cache_get(key)
+            try:
+                if cached is not None:
+                    result = cached
+                else:
+                    result = converter.convert(xml)
+                    if fmt is not None:
+                        result = render_output(result, fmt)
+                        if key is not None:
+                            self._cache_put(key, result)
+            except Exception as err:
+                self.metrics.finished(time.perf_counter() - queued,
+                                      error=True)
+                future.set_exception(err)
+            else:
+                self.metrics.finished(time.perf_counter() - queued,
+                                      cached=cached is not None)
+                future.set_result(result)
+
+    def _cache_get(self, key):
+        """ Look up a rendered output
+        """
+        with self._cache_lock:
+            try:
+                self._cache.move_to_end(key)
+            except KeyError:
+                return None
+            return self._cache[key]
+
+    def _cache_put(self, key, output):
+        """ Store a rendered output, dropping the oldest if we're full
+        """
+        with self._cache_lock:
+            self._cache[key] = output
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def close(self):
+        """ Stop the service once the queued requests are done
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+
+    """ HTTP interface to a ConversionService (see module docstring)
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, body, content_type='application/json'):
+        """ Send a response
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        """ Send an error response
+        """
+        self._reply(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def do_GET(self):
+        """ Serve the service metrics
+        """
+        if urllib.parse.urlsplit(self.path).path != '/metrics':
+            self._error(404, 'Not found: {0}'.format(self.path))
+            return
+        metrics = self.server.service.metrics.snapshot()
+        self._reply(200, json.dumps(metrics).encode('utf-8'))
+
+    def do_POST(self):
+        """ Convert one document, or a framed batch of documents
+        """
+        parts = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parts.query)
+        fmt = query.get('format', ['json'])[0]
+        service = self.server.service
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > service.max_request_bytes:
+            # Don't read the body, so the connection can't be reused
+            self.close_connection = True
+            if length < 0:
+                self._error(400, 'Invalid Content-Length')
+            else:
+                self._error(413, 'Request of {0} bytes is larger than the '
+                            'maximum of {1} bytes'.format(
+                                length, service.max_request_bytes))
+            return
+        data = self.rfile.read(length)
+        if parts.path not in ('/convert', '/batch'):
+            self._error(404, 'Not found: {0}'.format(parts.path))
+            return
+        if fmt not in FORMATS:
+            self._error(400, 'Unknown output format {0}, allowed values '
+                        'are {1}'.format(fmt, tuple(FORMATS.keys())))
+            return
+
+        if parts.path == '/convert':
+            try:
+                output = service.convert(data, fmt)
+            except Exception as err:
+                self._error(400, '{0}: {1}'.format(type(err).__name__, err))
+                return
+        else:
+            try:
+                documents = unframe(data)
+            except ValueError as err:
+                self._error(400, str(err))
+                return
+            output = join_outputs(service.convert_batch(documents, fmt), fmt)
+        self._reply(200, output, FORMATS[fmt])
+
+    def address_string(self):
+        """ Unix socket clients don't have an address
+        """
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):
+        """ Log requests at debug level rather than to stderr
+        """
+        # pylint: disable=W0622
+        LOGGER.debug('%s - %s', self.address_string(), format % args)
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+
+    """ A threaded HTTP server listening on a Unix socket
+    """
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind wants a host and port, so skip it
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    """ An HTTP client connection over a Unix socket
+
+        Parameters:
+            path - the path to the socket
+            timeout - the socket timeout in seconds
+    """
+
+    def __init__(self, path, timeout=30):
+        super(UnixHTTPConnection, self).__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def make_server(service, host='127.0.0.1', port=0, socket_path=None):
+    """ Make an HTTP server for a ConversionService
+
+        The server isn't started - call its `serve_forever` method (e.g. in
+        a thread) to start it, and `shutdown` to stop it.
+
+        Parameters:
+            service - the ConversionService to use
+            host, port - the address to listen on. Optional, defaults to
+                localhost on an unused port (see the server's
+                `server_address` attribute for the actual port).
+            socket_path - the path of a Unix socket to listen on instead
+                of a TCP port. Optional. An existing socket at this path is
+                replaced, but anything else there raises a ValueError.
+
+        Returns:
+            the server
+    """
+    if socket_path is not None:
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise ValueError('{0} exists and is not a socket, refusing '
+                                 'to replace it'.format(socket_path))
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, ServiceHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def make_parser():
+    """ Make the argument parser for running the service
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m xjson.service',
+        description='Run a local XML conversion service')
+    parser.add_argument(
+        '-s', '--socket', default=None,
+        help='listen on this Unix socket rather than a TCP port')
+    parser.add_argument(
+        '--host', default='127.0.0.1',
+        help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument(
+        '--port', type=int, default=8765,
+        help='port to listen on (default: 8765)')
+    parser.add_argument(
+        '-n', '--namespace-handling', choices=NAMESPACE_HANDLING,
+        default='shorten',
+        help='how to handle XML namespaces (default: shorten)')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=None,
+        help='number of worker threads (default: number of CPUs)')
+    parser.add_argument(
+        '--max-batch', type=int, default=32,
+        help='largest batch handed to a worker (default: 32)')
+    parser.add_argument(
+        '--max-wait', type=float, default=2.0,
+        help='milliseconds between checks for a free worker while '
+             'filling a batch (default: 2)')
+    parser.add_argument(
+        '--cache-size', type=int, default=256,
+        help='number of rendered outputs to cache (default: 256)')
+    parser.add_argument(
+        '--max-request-bytes', type=int, default=MAX_REQUEST_BYTES,
+        help='largest request body accepted (default: {0})'.format(
+            MAX_REQUEST_BYTES))
+    return parser
+
+
+def main(argv=None):
+    """ Run the service until interrupted
+    """
+    args = make_parser().parse_args(argv)
+    service = ConversionService(namespace_handling=args.namespace_handling,
+                                workers=args.workers,
+                                max_batch=args.max_batch,
+                                max_wait=args.max_wait / 1e3,
+                                cache_size=args.cache_size,
+                                max_request_bytes=args.max_request_bytes)
+    server = make_server(service, host=args.host, port=args.port,
+                         socket_path=args.socket)
+    LOGGER.info('Serving on {0}'.format(server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket is not None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+""" file:   shared_registry.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: A registry shared between processes
+
+    XJsonRegistry lives in a single process, so every worker in a pool ends
+    up holding its own copy of the same vocabularies and capability
+    documents. SharedRegistry keeps registered documents once, in the
+    binary encoding (see `xjson.binary`), in a file which every process
+    maps into memory. Lookups decode straight out of the mapping - either
+    into ordinary documents, or lazily (so nothing is decoded until it is
+    used) if the registry is opened with lazy=True. Put the file on a tmpfs
+    (e.g. /dev/shm) to keep it in shared memory.
+
+    The file is an append-only log:
+
+        magic (4 bytes), padding (4 bytes), end of the log (8 bytes),
+        records of (kind, ident length, payload length, ident, payload)
+
+    where kind is either a registration (with the encoded document as its
+    payload) or a deregistration. Writers take an exclusive lock on the
+    file, append a record and then publish the new end of the log, so
+    readers never see a partial record and don't need to lock. Each
+    process keeps its own index of the log, and catches up with records
+    added by other processes whenever it is used. Space used by replaced or
+    deregistered documents isn't reclaimed until the file is recreated.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+
+from collections.abc import Mapping
+import fcntl
+import logging
+import mmap
+import os
+import struct
+
+LOGGER = logging.getLogger('pysiss')
+
+MAGIC = b'XJR\x01'
+
+# Magic and the end of the log
+_HEADER = struct.Struct('<4s4xQ')
+
+# Record kind, ident length, payload length
+_RECORD = struct.Struct('<BIQ')
+
+REGISTER, DEREGISTER = 1, 2
+
+# The file grows by at least this much at a time
+GROW_BYTES = 1024 * 1024
+
+
+class SharedRegistry(Mapping):
+
+    """ A registry for XJson instances, shared between processes
+
+        This has the same register/deregister/lookup interface as
+        XJsonRegistry, and can be used in its place (e.g. by setting
+        `XJson.registry`). Registries opened on the same path share their
+        contents, including registries in other processes. Idents are
+        stored as strings, but can be looked up with either a string or a
+        UUID.
+
+        Parameters:
+            path - the path of the registry file. The file is created if it
+                doesn't exist.
+            lazy - if True, then looked-up documents are decoded lazily
+                (see `XJson.from_bytes`), so only the parts that are used
+                are ever decoded. Their bodies are read-only, and need to
+                be materialized before they are passed to helpers like
+                `XJson.merge` or `spatial.query_registry`. Optional,
+                defaults to False.
+    """
+
+    def __init__(self, path, lazy=False):
+        super(SharedRegistry, self).__init__()
+        self.path = path
+        self.lazy = lazy
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._map = None
+        self._index, self._cache = {}, {}
+        self._scanned = _HEADER.size
+        with self._lock():
+            if os.fstat(self._fd).st_size < _HEADER.size:
+                os.pwrite(self._fd, _HEADER.pack(MAGIC, _HEADER.size), 0)
+        self._remap()
+        if bytes(self._map[:len(MAGIC)]) != MAGIC:
+            self.close()
+            raise ValueError('{0} is not an xjson registry'.format(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'SharedRegistry(path={0!r}, documents={1})'.format(
+            self.path, len(self))
+
+    def _lock(self):
+        """ Return a context manager holding the write lock
+        """
+        return _FileLock(self._fd)
+
+    def _remap(self):
+        """ Map the whole file into memory
+
+            The old mapping is left for the garbage collector, since
+            documents which have been looked up may still be using it.
+        """
+        self._map = mmap.mmap(self._fd, os.fstat(self._fd).st_size,
+                              access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def _end(self):
+        """ Return the published end of the log
+        """
+        return _HEADER.unpack_from(self._map)[1]
+
+    def _refresh(self):
+        """ Catch up with records added since we last looked
+        """
+        end = self._end()
+        if end == self._scanned:
+            return
+        if end > len(self._map):
+            self._remap()
+        pos, view = self._scanned, self._view
+        while pos < end:
+            kind, nident, npayload = _RECORD.unpack_from(view, pos)
+            pos += _RECORD.size
+            ident = bytes(view[pos:pos + nident]).decode('utf-8')
+            pos += nident
+            self._cache.pop(ident, None)
+            if kind == REGISTER:
+                self._index[ident] = (pos, npayload)
+            else:
+                self._index.pop(ident, None)
+            pos += npayload
+        self._scanned = end
+
+    def _append(self, kind, ident, payload=b''):
+        """ Append a record to the log (the write lock must be held)
+        """
+        ident = ident.encode('utf-8')
+        record = _RECORD.pack(kind, len(ident), len(payload)) + ident + payload
+        end = self._end()
+        size = os.fstat(self._fd).st_size
+        if end + len(record) > size:
+            os.ftruncate(self._fd, max(end + len(record),
+                                       size + max(size, GROW_BYTES)))
+        os.pwrite(self._fd, record, end)
+
+        # Only publish once the record is in place
+        os.pwrite(self._fd, struct.pack('<Q', end + len(record)), 8)
+
+    def register(self, xjson, replace_existing=False, verbose=False):
+        """ Register an xjson item in the registry
+
+            Parameters:
+                xjson - the XJson instance to register
+                replace_existing - whether to replace a document which is
+                    already registered with the same ident. Optional,
+                    defaults to False.
+                verbose - whether to log a warning when an existing
+                    document is skipped. Optional, defaults to False.
+        """
+        ident = str(xjson.ident)
+        payload = xjson.to_bytes()
+        with self._lock():
+            self._refresh()
+            if not replace_existing and ident in self._index:
+                if verbose:
+                    LOGGER.warning(('XJson ID {0} already exists, skipping'
+                                    ' registration').format(ident))
+                return
+            self._append(REGISTER, ident, payload)
+            self._refresh()
+
+    def deregister(self, ident):
+        """ Deregister the given xjson item given by the key
+        """
+        ident = str(ident)
+        with self._lock():
+            self._refresh()
+            if ident not in self._index:
+                raise KeyError(ident)
+            self._append(DEREGISTER, ident)
+            self._refresh()
+
+    def __getitem__(self, ident):
+        """ Look up a registered document
+
+            Documents are decoded from the shared mapping the first time
+            they are looked up in this process (lazily if the registry is
+            lazy), and the same instance is returned after that.
+        """
+        ident = str(ident)
+        self._refresh()
+        try:
+            return self._cache[ident]
+        except KeyError:
+            pass
+        offset, length = self._index[ident]
+        document = XJson.from_bytes(self._view[offset:offset + length],
+                                    lazy=self.lazy)
+        self._cache[ident] = document
+        return document
+
+    def __contains__(self, ident):
+        self._refresh()
+        return str(ident) in self._index
+
+    def __iter__(self):
+        self._refresh()
+        return iter(list(self._index))
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index)
+
+    @property
+    def registered_ids(self):
+        """ The set of registered idents
+        """
+        self._refresh()
+        return set(self._index)
+
+    def close(self):
+        """ Close the registry
+
+            Documents which have already been looked up keep the mapping
+            open until they are garbage collected.
+        """
+        if self._fd is None:
+            return
+        self._cache = {}
+        if self._map is not None:
+            self._view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                # Still in use by looked-up documents
+                pass
+            self._map = self._view = None
+        os.close(self._fd)
+        self._fd = None
+
+
+class _FileLock(object):
+
+    """ Holds an exclusive lock on a file while in a with block
+    """
+
+    def __init__(self, fd):
+        super(_FileLock, self).__init__()
+        self.fd = fd
+
+    def __enter__(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
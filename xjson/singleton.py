@@ -9,6 +9,8 @@
 
 from __future__ import print_function, division
 
+import threading
+
 
 class singleton(type):
 
@@ -22,13 +24,21 @@ class singleton(type):
             metaclass=singleton
 
         to your class definition.
+
+        The instance is created under a lock, so threads racing to make the
+        first instance all get the same one. Once it exists no lock is taken.
     """
 
     def __init__(cls, name, bases, dictionary):
         super(singleton, cls).__init__(name, bases, dictionary)
         cls.instance = None
+        cls._instance_lock = threading.Lock()
 
     def __call__(cls, *args, **kwargs):
         if cls.instance is None:
-            cls.instance = super(singleton, cls).__call__(*args, **kwargs)
+            with cls._instance_lock:
+                # Someone else might have got in first
+                if cls.instance is None:
+                    cls.instance = \
+                        super(singleton, cls).__call__(*args, **kwargs)
         return cls.instance
@@ -0,0 +1,581 @@
+""" file:   spatial.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Bounding boxes and a spatial index for GML features
+
+    Filtering features spatially after conversion means digging through
+    each feature's geometry and parsing its coordinate strings every time.
+    Here the bounding box of each feature is worked out as the document is
+    converted - the coordinate text is picked up from gml:pos, gml:posList,
+    gml:lowerCorner/upperCorner, gml:coordinates and gml:X/Y elements as it
+    goes past - and the boxes are put in a grid index which can answer
+    bounding box queries without looking at the features at all.
+
+    Boxes are (minx, miny, maxx, maxy) in the axis order and CRS given in
+    the document; nothing is reprojected.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+from .gml import FeatureTarget, feature_id, localname, members
+from .json_target import feed_parser
+
+from collections import defaultdict
+from lxml.etree import XML, XMLParser
+import io
+import json
+import logging
+import math
+
+LOGGER = logging.getLogger('pysiss')
+
+# GML namespaces whose coordinate elements we read
+GML_NAMESPACES = ('http://www.opengis.net/gml',
+                  'http://www.opengis.net/gml/3.2')
+
+# Local names of elements holding coordinates
+COORDINATE_TAGS = ('pos', 'posList', 'lowerCorner', 'upperCorner',
+                   'coordinates', 'X', 'Y')
+
+# Boxes covering more grid cells than this are checked on every query
+# rather than being added to each cell
+MAX_CELLS = 64
+
+
+def parse_coordinates(text, kind='posList', dimension=2, cs=',', ts=' ',
+                      decimal='.'):
+    """ Parse the text of a GML coordinate element
+
+        Parameters:
+            text - the text of the element
+            kind - the local name of the element (see `COORDINATE_TAGS`)
+            dimension - the number of values per position, for pos,
+                posList and the corners. Optional, defaults to 2.
+            cs, ts, decimal - the coordinate, tuple and decimal separators
+                for gml:coordinates. Optional, default to the GML defaults.
+
+        Returns:
+            a tuple (xs, ys) of lists of x and y values
+    """
+    if kind == 'X':
+        return [float(text)], []
+    elif kind == 'Y':
+        return [], [float(text)]
+    elif kind == 'coordinates':
+        xs, ys = [], []
+        tuples = text.split() if ts.isspace() else text.strip().split(ts)
+        for coords in tuples:
+            values = coords.split(cs)
+            if decimal != '.':
+                values = [v.replace(decimal, '.') for v in values]
+            xs.append(float(values[0]))
+            if len(values) > 1:
+                ys.append(float(values[1]))
+        return xs, ys
+    values = [float(v) for v in text.split()]
+    dimension = max(dimension, 1)
+    return values[0::dimension], values[1::dimension]
+
+
+def expand_bbox(bbox, xs, ys):
+    """ Expand a bounding box to cover some coordinates
+
+        Parameters:
+            bbox - a list [minx, miny, maxx, maxy], or None
+            xs, ys - lists of x and y values
+
+        Returns:
+            the expanded box, or None if there's still nothing in it
+    """
+    if bbox is None:
+        if not xs or not ys:
+            # Half a position (e.g. just a gml:X so far), keep it for later
+            if xs or ys:
+                return [min(xs) if xs else math.inf,
+                        min(ys) if ys else math.inf,
+                        max(xs) if xs else -math.inf,
+                        max(ys) if ys else -math.inf]
+            return None
+        return [min(xs), min(ys), max(xs), max(ys)]
+    if xs:
+        bbox[0], bbox[2] = min(bbox[0], min(xs)), max(bbox[2], max(xs))
+    if ys:
+        bbox[1], bbox[3] = min(bbox[1], min(ys)), max(bbox[3], max(ys))
+    return bbox
+
+
+def _finished_bbox(bbox):
+    """ Return a box as a tuple, or None if it doesn't have both axes
+    """
+    if bbox is None or not all(math.isfinite(v) for v in bbox):
+        return None
+    return tuple(bbox)
+
+
+def intersects(first, second):
+    """ Check whether two bounding boxes overlap (touching counts)
+    """
+    return first[0] <= second[2] and second[0] <= first[2] \
+        and first[1] <= second[3] and second[1] <= first[3]
+
+
+class SpatialIndex(object):
+
+    """ A uniform grid index over bounding boxes
+
+        The grid is built the first time it is queried, so the cell size can
+        be chosen to suit the boxes. Boxes inserted after that go straight
+        into the grid.
+
+        Parameters:
+            cell_size - the width and height of the grid cells. Optional, if
+                None then a size is chosen from the boxes in the index when
+                the grid is built.
+    """
+
+    def __init__(self, cell_size=None):
+        super(SpatialIndex, self).__init__()
+        self.cell_size = cell_size
+        self._boxes = {}
+        self._order = {}
+        self._grid = None
+        self._large = []
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, key):
+        return key in self._boxes
+
+    def __repr__(self):
+        """ String representation
+        """
+        return 'SpatialIndex(boxes={0}, cell_size={1})'.format(
+            len(self), self.cell_size)
+
+    def bbox(self, key):
+        """ Return the bounding box stored for a key
+        """
+        return self._boxes[key]
+
+    @property
+    def bounds(self):
+        """ The bounding box of everything in the index, or None if it's
+            empty
+        """
+        if not self._boxes:
+            return None
+        boxes = self._boxes.values()
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def insert(self, key, bbox):
+        """ Add a bounding box to the index
+
+            Parameters:
+                key - the key to store the box under, e.g. a feature id
+                bbox - the box as (minx, miny, maxx, maxy)
+        """
+        bbox = tuple(float(v) for v in bbox)
+        if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            raise ValueError('Invalid bounding box {0}, expected '
+                             '(minx, miny, maxx, maxy)'.format(bbox))
+        if key in self._boxes:
+            self.remove(key)
+        self._order[key] = len(self._order)
+        self._boxes[key] = bbox
+        if self._grid is not None:
+            self._add(key, bbox)
+
+    def remove(self, key):
+        """ Remove a key from the index
+        """
+        del self._boxes[key]
+        del self._order[key]
+        # The grid will be rebuilt next time it is needed
+        self._grid = None
+
+    def _cells(self, bbox):
+        """ Return the ranges of grid cells covered by a box
+        """
+        size = self.cell_size
+        return (range(math.floor(bbox[0] / size),
+                      math.floor(bbox[2] / size) + 1),
+                range(math.floor(bbox[1] / size),
+                      math.floor(bbox[3] / size) + 1))
+
+    def _add(self, key, bbox):
+        """ Add a box to the grid
+        """
+        columns, rows = self._cells(bbox)
+        if len(columns) * len(rows) > MAX_CELLS:
+            self._large.append(key)
+            return
+        for column in columns:
+            for row in rows:
+                self._grid[column, row].append(key)
+
+    def _choose_cell_size(self):
+        """ Pick a cell size giving a few boxes per cell
+        """
+        bounds = self.bounds
+        if bounds is None:
+            return 1.0
+        extent = max(bounds[2] - bounds[0], bounds[3] - bounds[1])
+        mean_size = sum(max(b[2] - b[0], b[3] - b[1])
+                        for b in self._boxes.values()) / len(self._boxes)
+        size = max(extent / math.sqrt(len(self._boxes)), mean_size)
+        return size if size > 0 else 1.0
+
+    def _build(self):
+        """ Put all the boxes into the grid
+        """
+        if self.cell_size is None:
+            self.cell_size = self._choose_cell_size()
+        self._grid, self._large = defaultdict(list), []
+        for key, bbox in self._boxes.items():
+            self._add(key, bbox)
+
+    def query(self, bbox):
+        """ Find the keys whose boxes intersect a bounding box
+
+            Parameters:
+                bbox - the query box as (minx, miny, maxx, maxy)
+
+            Returns:
+                a list of keys, in the order they were inserted
+        """
+        if self._grid is None:
+            self._build()
+        bbox = tuple(float(v) for v in bbox)
+        columns, rows = self._cells(bbox)
+        if len(columns) * len(rows) > len(self._grid):
+            # Covers more cells than are filled, just check everything
+            candidates = self._boxes.keys()
+        else:
+            candidates = set(self._large)
+            grid = self._grid
+            for column in columns:
+                for row in rows:
+                    cell = grid.get((column, row))
+                    if cell:
+                        candidates.update(cell)
+        boxes = self._boxes
+        found = [key for key in candidates if intersects(boxes[key], bbox)]
+        found.sort(key=self._order.__getitem__)
+        return found
+
+    def save(self, fhandle):
+        """ Save the index to a file
+
+            Parameters:
+                fhandle - a file handle (opened for text) or a path
+        """
+        if isinstance(fhandle, str):
+            with open(fhandle, 'w') as handle:
+                return self.save(handle)
+        json.dump({'cell_size': self.cell_size,
+                   'boxes': [[key] + list(bbox)
+                             for key, bbox in self._boxes.items()]},
+                  fhandle)
+
+    @classmethod
+    def load(cls, fhandle):
+        """ Load an index saved with `save`
+
+            Parameters:
+                fhandle - a file handle (opened for text) or a path
+
+            Returns:
+                the SpatialIndex
+        """
+        if isinstance(fhandle, str):
+            with open(fhandle) as handle:
+                return cls.load(handle)
+        saved = json.load(fhandle)
+        index = cls(cell_size=saved.get('cell_size'))
+        for entry in saved['boxes']:
+            index.insert(entry[0], entry[1:])
+        return index
+
+
+class SpatialTarget(FeatureTarget):
+
+    """ A target which works out the bounding box of each feature
+
+        Features are keyed on their gml:id, or on their position in the
+        collection if they don't have one.
+
+        Parameters:
+            namespace_handling, limits, plan, interner - as for JSONLDTarget
+
+        Attributes:
+            bboxes - a dictionary mapping feature keys to their boxes
+            features - a dictionary mapping feature keys to the converted
+                features (as {tag: feature})
+    """
+
+    def __init__(self, **kwargs):
+        super(SpatialTarget, self).__init__(**kwargs)
+        self.bboxes, self.features = {}, {}
+        self._kinds = {}
+        self._count = 0
+        self._key = self._bbox = None
+        self._text = self._kind = self._separators = None
+        self._depth = 0
+        self._dimensions = []
+
+    def _coordinate_kind(self, tag):
+        """ Return the local name of a coordinate element, or None
+        """
+        try:
+            return self._kinds[tag]
+        except KeyError:
+            namespace, _, local = tag[1:].partition('}')
+            kind = self._kinds[tag] = \
+                local if namespace in GML_NAMESPACES \
+                and local in COORDINATE_TAGS else None
+            return kind
+
+    def start(self, tag, attrib):
+        """ Start generating a new object, noting coordinate elements
+        """
+        super(SpatialTarget, self).start(tag, attrib)
+        if not self._in_feature:
+            return
+        self._depth += 1
+        if 'srsDimension' in attrib:
+            # Only applies to this element and its children
+            try:
+                self._dimensions.append((self._depth,
+                                         int(attrib['srsDimension'])))
+            except ValueError:
+                pass
+        kind = self._coordinate_kind(tag)
+        if kind is not None:
+            self._kind, self._text = kind, []
+            if kind == 'coordinates':
+                self._separators = (attrib.get('cs', ','),
+                                    attrib.get('ts', ' '),
+                                    attrib.get('decimal', '.'))
+
+    def data(self, data):
+        """ Convert text to objects, keeping any coordinate text
+        """
+        if self._text is not None:
+            self._text.append(data)
+        super(SpatialTarget, self).data(data)
+
+    def end(self, tag):
+        """ Finish generating the currently building object, adding any
+            coordinates to the feature's box
+        """
+        if self._text is not None:
+            text, self._text = ''.join(self._text), None
+            cs, ts, decimal = self._separators or (',', ' ', '.')
+            dimension = self._dimensions[-1][1] if self._dimensions else 2
+            try:
+                xs, ys = parse_coordinates(text, self._kind, dimension,
+                                           cs, ts, decimal)
+            except (ValueError, IndexError):
+                LOGGER.debug('Skipping unreadable coordinates {0!r}'.format(
+                    text))
+            else:
+                self._bbox = expand_bbox(self._bbox, xs, ys)
+        if self._in_feature:
+            if self._dimensions and self._dimensions[-1][0] == self._depth:
+                self._dimensions.pop()
+            self._depth -= 1
+        super(SpatialTarget, self).end(tag)
+
+    def start_feature(self, tag, attrib):
+        """ Start a new box for the feature
+        """
+        self._key = feature_id(attrib)
+        self._bbox = None
+        self._depth, self._dimensions = 0, []
+
+    def end_feature(self, tag, elem):
+        """ Store the feature's box
+        """
+        key = self._key if self._key is not None else self._count
+        self._count += 1
+        self.features[key] = {tag: elem}
+        bbox = _finished_bbox(self._bbox)
+        if bbox is not None:
+            self.bboxes[key] = bbox
+        return elem
+
+
+def _walk_coordinates(value, bbox, dimension=2):
+    """ Expand a box to cover the coordinates in a converted subtree
+    """
+    if isinstance(value, list):
+        for item in value:
+            bbox = _walk_coordinates(item, bbox, dimension)
+        return bbox
+    elif not isinstance(value, dict):
+        return bbox
+
+    for key, attribute in (value.get('#attributes') or {}).items():
+        if localname(key) == 'srsDimension':
+            try:
+                dimension = int(attribute)
+            except ValueError:
+                pass
+    for key, child in value.items():
+        if key.startswith('#'):
+            continue
+        kind = localname(key)
+        if kind in COORDINATE_TAGS:
+            text, separators = child, {}
+            if isinstance(child, dict):
+                text = child.get('#data', '')
+                for name, attribute in (child.get('#attributes')
+                                        or {}).items():
+                    name = localname(name)
+                    if name in ('cs', 'ts', 'decimal'):
+                        separators[name] = attribute
+                    elif name == 'srsDimension':
+                        separators['dimension'] = int(attribute)
+            if isinstance(text, list):
+                text = ' '.join(text)
+            if not isinstance(text, str):
+                continue
+            separators.setdefault('dimension', dimension)
+            try:
+                xs, ys = parse_coordinates(text, kind, **separators)
+            except (ValueError, IndexError):
+                continue
+            bbox = expand_bbox(bbox, xs, ys)
+        else:
+            bbox = _walk_coordinates(child, bbox, dimension)
+    return bbox
+
+
+def spatial_index(xjson, cell_size=None):
+    """ Return the spatial index for a converted feature collection
+
+        If the collection wasn't converted with `from_xml_spatial`, the
+        boxes are worked out from the converted features (which is slower)
+        and the index is stored on the instance for next time.
+
+        Parameters:
+            xjson - an XJson instance containing a feature collection
+            cell_size - the grid cell size for a new index. Optional.
+
+        Returns:
+            the SpatialIndex for the collection
+    """
+    index = getattr(xjson, 'spatial_index', None)
+    if index is not None:
+        return index
+
+    # Not converted with boxes, so we need to work them out
+    index, features, count = SpatialIndex(cell_size=cell_size), {}, 0
+    for root in xjson.body.values():
+        for member in members(root):
+            if not isinstance(member, dict):
+                continue
+            for tag, feature in member.items():
+                if tag.startswith('#'):
+                    continue
+                key = feature_id(feature.get('#attributes')) \
+                    if isinstance(feature, dict) else None
+                if key is None:
+                    key = count
+                count += 1
+                features[key] = {tag: feature}
+                bbox = _finished_bbox(_walk_coordinates(feature, None))
+                if bbox is not None:
+                    index.insert(key, bbox)
+    xjson.spatial_index, xjson.spatial_features = index, features
+    return index
+
+
+def query(xjson, bbox):
+    """ Find the features in a collection which intersect a bounding box
+
+        Parameters:
+            xjson - an XJson instance containing a feature collection
+            bbox - the query box as (minx, miny, maxx, maxy)
+
+        Returns:
+            a list of the matching features (as {tag: feature}), in
+            document order
+    """
+    index = spatial_index(xjson)
+    features = xjson.spatial_features
+    return [features[key] for key in index.query(bbox)]
+
+
+def query_registry(registry, bbox):
+    """ Find the features in every registered collection which intersect
+        a bounding box
+
+        Parameters:
+            registry - an XJsonRegistry (or any mapping of XJson instances)
+            bbox - the query box as (minx, miny, maxx, maxy)
+
+        Returns:
+            a list of (xjson, feature) tuples
+    """
+    return [(xjson, feature) for xjson in list(registry.values())
+            for feature in query(xjson, bbox)]
+
+
+def from_xml_spatial(xml, namespace_handling=None, cell_size=None,
+                     limit=None, max_bytes=None, **kwargs):
+    """ Convert a feature collection, indexing the features' boxes
+
+        Parameters:
+            xml - either a handle to an open xml file, or a string of XML
+            namespace_handling - how to handle XML namespaces. Optional,
+                defaults to 'shorten'.
+            cell_size - the grid cell size for the index. Optional, chosen
+                from the features if not given.
+            limit, max_bytes - stop parsing after this many features or
+                bytes, as for `XJson.from_xml`. The rest of the document
+                isn't read. Optional.
+            **kwargs - other keyword arguments (limits, plan, interner)
+                are passed to the target, as for `XJson.from_xml`
+
+        Returns:
+            the new XJson instance. It has a `spatial_index` attribute
+            holding the SpatialIndex, a `bboxes` attribute mapping feature
+            keys to boxes, and a `spatial_features` attribute mapping
+            feature keys to features.
+    """
+    if namespace_handling is None:
+        namespace_handling = 'shorten'
+    if isinstance(xml, str):
+        xml = xml.encode('utf-8')
+
+    limits = kwargs.get('limits')
+    target = SpatialTarget(namespace_handling=namespace_handling,
+                           limit=limit, **kwargs)
+    options = limits.parser_options() if limits is not None else {}
+    parser = XMLParser(target=target, **options)
+    if limit is None and max_bytes is None:
+        if isinstance(xml, io.IOBase):
+            xml = xml.read()
+        body, context = XML(xml, parser)
+    else:
+        # Feed the parser a bit at a time so we can stop early
+        if not isinstance(xml, io.IOBase):
+            xml = io.BytesIO(xml)
+        body, context = feed_parser(parser, target, xml, max_bytes=max_bytes)
+        if body is None:
+            raise ValueError('No elements found in the first {0} bytes '
+                             'of the document'.format(max_bytes))
+    result = XJson(body=body, context=context)
+    result.bboxes = target.bboxes
+    result.spatial_features = target.features
+    result.spatial_index = SpatialIndex(cell_size=cell_size)
+    for key, bbox in target.bboxes.items():
+        result.spatial_index.insert(key, bbox)
+    if target.truncated:
+        result.truncated = True
+    return result
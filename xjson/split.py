@@ -0,0 +1,222 @@
+""" file:   split.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: Parallel conversion of huge feature collections
+
+    A streaming parse of a single huge WFS response still only uses one
+    core. Here we scan the raw bytes for the member elements under the root
+    FeatureCollection, cut the file into chunks on member boundaries, and
+    convert each chunk in a separate process. Each chunk is wrapped in the
+    original root element (so all the namespace declarations are still in
+    scope), and the results are merged back together in file order.
+"""
+
+from __future__ import print_function, division
+
+from .xjson import XJson
+from .gml import MEMBER_TAGS
+
+import mmap
+import multiprocessing
+import os
+import re
+
+# Anything smaller than this is converted in one go
+MIN_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Regular expressions for scanning
+_START_TAG = re.compile(rb'<([^\s/>!?]+)(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+
+
+def _member_regex(qname):
+    """ Build a regular expression matching start tags for the given member
+    """
+    return re.compile(b'<' + re.escape(qname) + rb'[\s/>]')
+
+
+def scan(buf, member_tags=MEMBER_TAGS):
+    """ Scan a document for the structure needed to split it
+
+        Parameters:
+            buf - a bytes-like object (e.g. an mmap) holding the document
+            member_tags - the local names of the member elements
+
+        Returns:
+            a tuple (header, footer, body_start, body_end, member_qname),
+            where header is the prolog and root start tag, footer is the
+            root end tag, body_start and body_end give the offsets of the
+            root element's content, and member_qname is the prefixed name
+            of the member elements (or None if there are no members).
+    """
+    # Find the root element, skipping the prolog, comments and doctype
+    pos = 0
+    while True:
+        pos = buf.find(b'<', pos)
+        if pos < 0:
+            raise ValueError('No root element found in document')
+        lead = bytes(buf[pos:pos + 4])
+        if lead.startswith(b'<?'):
+            pos = buf.find(b'?>', pos) + 2
+        elif lead == b'<!--':
+            pos = buf.find(b'-->', pos) + 3
+        elif lead.startswith(b'<!'):
+            # Doctype, which might have an internal subset
+            close = buf.find(b'>', pos)
+            subset = buf.find(b'[', pos, close)
+            if subset >= 0:
+                close = buf.find(b']', subset)
+                close = buf.find(b'>', close)
+            pos = close + 1
+        else:
+            match = _START_TAG.match(buf, pos)
+            if match is None:
+                raise ValueError('Malformed root element at offset '
+                                 '{0}'.format(pos))
+            break
+    root_qname = match.group(1)
+    header = bytes(buf[:match.end()])
+    body_start = match.end()
+    footer = b'</' + root_qname + b'>'
+    body_end = buf.rfind(footer)
+    if body_end < body_start:
+        raise ValueError('Root element {0} is not closed'.format(
+            root_qname.decode('utf-8')))
+
+    # Work out which member element we're using
+    names = b'|'.join(re.escape(t.encode('utf-8')) for t in member_tags)
+    member_re = re.compile(rb'<((?:[\w.-]+:)?(?:' + names + rb'))[\s/>]')
+    match = member_re.search(buf, body_start, body_end)
+    member_qname = match.group(1) if match else None
+    return header, footer, body_start, body_end, member_qname
+
+
+def find_boundaries(buf, body_start, body_end, member_qname, nchunks):
+    """ Find the offsets at which to cut the document into chunks
+
+        Rather than finding every member we just look for the next member
+        start tag after each ideal cut point.
+
+        Parameters:
+            buf - a bytes-like object holding the document
+            body_start, body_end - the offsets of the root content
+            member_qname - the prefixed name of the member elements
+            nchunks - the number of chunks to aim for
+
+        Returns:
+            a list of offsets, starting with body_start and ending with
+            body_end, such that each consecutive pair gives a chunk
+    """
+    boundaries = [body_start]
+    if member_qname is not None and nchunks > 1:
+        member_re = _member_regex(member_qname)
+        first = member_re.search(buf, body_start, body_end)
+        step = (body_end - body_start) // nchunks
+        for idx in range(1, nchunks):
+            ideal = max(body_start + idx * step, boundaries[-1] + 1,
+                        first.end())
+            match = member_re.search(buf, ideal, body_end)
+            if match is None:
+                break
+            if match.start() > boundaries[-1]:
+                boundaries.append(match.start())
+    boundaries.append(body_end)
+    return boundaries
+
+
+def _convert_chunk(task):
+    """ Convert a single chunk of a document
+
+        Parameters:
+            task - a tuple (path, start, end, header, footer,
+                namespace_handling)
+
+        Returns:
+            a tuple (body, context) for the chunk
+    """
+    path, start, end, header, footer, namespace_handling = task
+    with open(path, 'rb') as fhandle:
+        fhandle.seek(start)
+        chunk = fhandle.read(end - start)
+    result = XJson.from_xml(header + chunk + footer,
+                            namespace_handling=namespace_handling)
+    return result.body, result.context
+
+
+def merge_chunks(chunks, namespace_handling=None):
+    """ Merge converted chunks back into a single document
+
+        See `XJson.merge` for how the chunks are combined.
+
+        Parameters:
+            chunks - an iterable of (body, context) tuples, in file order
+            namespace_handling - the namespace handling used for the chunks
+
+        Returns:
+            a new XJson instance
+    """
+    return XJson.merge((XJson(body=body, context=context)
+                        for body, context in chunks),
+                       namespace_handling=namespace_handling)
+
+
+def from_xml_split(path, namespace_handling=None, processes=None,
+                   chunks=None, min_chunk_bytes=MIN_CHUNK_BYTES,
+                   member_tags=MEMBER_TAGS):
+    """ Convert a huge feature collection in parallel
+
+        The file is cut into chunks on feature member boundaries and each
+        chunk is converted in a seperate process. Member elements must be
+        direct children of the root element, and member start tags must
+        not appear elsewhere (e.g. nested inside features, or in comments
+        or CDATA) - if they do, then the chunks will be malformed and an
+        XMLSyntaxError is raised.
+
+        Parameters:
+            path - the path to the XML file
+            namespace_handling - how to handle XML namespaces. Optional,
+                defaults to 'shorten'.
+            processes - the number of worker processes. Optional, defaults
+                to the number of CPUs.
+            chunks - the number of chunks to cut the file into. Optional,
+                defaults to twice the number of processes, so that slow
+                chunks don't hold up the other workers.
+            min_chunk_bytes - the smallest chunk worth converting in
+                another process. Files smaller than this are converted
+                directly.
+            member_tags - the local names of the member elements
+
+        Returns:
+            a new XJson instance containing the whole collection
+    """
+    if namespace_handling is None:
+        namespace_handling = 'shorten'
+    processes = processes or os.cpu_count() or 1
+    chunks = chunks or 2 * processes
+    size = os.path.getsize(path)
+    chunks = max(1, min(chunks, size // max(min_chunk_bytes, 1)))
+
+    # Work out where to cut
+    with open(path, 'rb') as fhandle:
+        buf = mmap.mmap(fhandle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header, footer, body_start, body_end, member_qname = \
+                scan(buf, member_tags)
+            boundaries = find_boundaries(buf, body_start, body_end,
+                                         member_qname, chunks)
+        finally:
+            buf.close()
+
+    # Convert chunks in order
+    tasks = [(path, start, end, header, footer, namespace_handling)
+             for start, end in zip(boundaries[:-1], boundaries[1:])]
+    if len(tasks) == 1 or processes == 1:
+        return merge_chunks(map(_convert_chunk, tasks),
+                            namespace_handling=namespace_handling)
+    pool = multiprocessing.Pool(min(processes, len(tasks)))
+    try:
+        return merge_chunks(pool.imap(_convert_chunk, tasks),
+                            namespace_handling=namespace_handling)
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,183 @@
+""" file:   well_known.py (xjson)
+    author: xjson developers
+    date:   October 2026
+
+    description: A table of well-known namespace URIs and their prefixes
+
+    NamespaceMap.add_from_uri works out a prefix for a namespace by
+    splitting up the URI, which means the prefix a namespace gets can depend
+    on which other namespaces turned up first in a document. Namespaces in
+    this table always get their canonical prefix (unless a document has
+    already used that prefix for something else), and the heuristics avoid
+    handing out canonical prefixes to other URIs. Different versions of the
+    same schema share a prefix, since documents rarely mix them.
+
+    The built-in table is read-only. Extra namespaces can be added with
+    `add_namespace`, and saved to and loaded from a JSON file with
+    `save_namespaces` and `load_namespaces`.
+"""
+
+from __future__ import print_function, division
+
+from types import MappingProxyType
+import json
+
+WELL_KNOWN_NAMESPACES = MappingProxyType({
+    # OGC
+    'http://www.opengis.net/gml': 'gml',
+    'http://www.opengis.net/gml/3.2': 'gml',
+    'http://www.opengis.net/wfs': 'wfs',
+    'http://www.opengis.net/wfs/2.0': 'wfs',
+    'http://www.opengis.net/ogc': 'ogc',
+    'http://www.opengis.net/fes/2.0': 'fes',
+    'http://www.opengis.net/ows': 'ows',
+    'http://www.opengis.net/ows/1.1': 'ows',
+    'http://www.opengis.net/ows/2.0': 'ows',
+    'http://www.opengis.net/wms': 'wms',
+    'http://www.opengis.net/wcs/1.1': 'wcs',
+    'http://www.opengis.net/sos/1.0': 'sos',
+    'http://www.opengis.net/om/1.0': 'om',
+    'http://www.opengis.net/om/2.0': 'om',
+    'http://www.opengis.net/sampling/1.0': 'sampling',
+    'http://www.opengis.net/sampling/2.0': 'sampling',
+    'http://www.opengis.net/samplingSpatial/2.0': 'samplingspatial',
+    'http://www.opengis.net/swe/1.0.1': 'swe',
+    'http://www.opengis.net/swe/2.0': 'swe',
+    'http://www.opengis.net/sensorML/1.0.1': 'sensorml',
+    'http://www.opengis.net/kml/2.2': 'kml',
+
+    # GeoSciML and friends
+    'urn:cgi:xmlns:CGI:GeoSciML:2.0': 'geosciml',
+    'urn:cgi:xmlns:CGI:DbUtils:1.0': 'dbutils',
+    'http://xmlns.geosciml.org/GeoSciML-Core/3.0': 'geosciml-core',
+    'http://xmlns.geosciml.org/GeoSciML-Core/3.2': 'geosciml-core',
+    'http://xmlns.geosciml.org/GeoSciML-Basic/4.1': 'geosciml-basic',
+    'http://xmlns.geosciml.org/GeoSciML-Portrayal/4.0': 'geosciml-portrayal',
+    'http://xmlns.geosciml.org/GeologicTimescale/4.1': 'geologictimescale',
+    'http://xmlns.earthresourceml.org/EarthResource/2.0': 'earthresource',
+
+    # ISO 19139
+    'http://www.isotc211.org/2005/gmd': 'gmd',
+    'http://www.isotc211.org/2005/gco': 'gco',
+    'http://www.isotc211.org/2005/gmx': 'gmx',
+    'http://www.isotc211.org/2005/gts': 'gts',
+    'http://www.isotc211.org/2005/gsr': 'gsr',
+    'http://www.isotc211.org/2005/gss': 'gss',
+
+    # W3C and others
+    'http://www.w3.org/1999/xlink': 'xlink',
+    'http://www.w3.org/2001/XMLSchema': 'xmlschema',
+    'http://www.w3.org/2001/XMLSchema-instance': 'xmlschema-instance',
+    'http://www.w3.org/XML/1998/namespace': 'xml',
+    'http://www.w3.org/2005/Atom': 'atom',
+    'http://purl.org/dc/elements/1.1/': 'dc',
+    'http://purl.org/dc/terms/': 'dcterms',
+})
+
+# User additions, and the URIs using each prefix in either table
+_added = {}
+_prefixes = {}
+for _uri, _prefix in WELL_KNOWN_NAMESPACES.items():
+    _prefixes.setdefault(_prefix, set()).add(_uri)
+del _uri, _prefix
+
+
+def prefix_for(namespace_uri):
+    """ Return the canonical prefix for a namespace URI
+
+        Parameters:
+            namespace_uri - the namespace URI
+
+        Returns:
+            the prefix, or None if the namespace isn't well-known
+    """
+    prefix = WELL_KNOWN_NAMESPACES.get(namespace_uri)
+    if prefix is None and _added:
+        prefix = _added.get(namespace_uri)
+    return prefix
+
+
+def is_reserved(prefix, namespace_uri):
+    """ Check whether a prefix is the canonical prefix of a different URI
+
+        Parameters:
+            prefix - the prefix to check
+            namespace_uri - the URI we want to use the prefix for
+
+        Returns:
+            True if the prefix belongs to another well-known namespace
+    """
+    owners = _prefixes.get(prefix)
+    return owners is not None and namespace_uri not in owners
+
+
+def add_namespace(namespace_uri, prefix):
+    """ Add a namespace to the table of well-known namespaces
+
+        Parameters:
+            namespace_uri - the namespace URI
+            prefix - the canonical prefix for the namespace. Prefixes are
+                lowercase, like the ones NamespaceMap generates.
+
+        Raises:
+            a ValueError if the namespace already has a different prefix, or
+            the prefix isn't a valid NCName
+    """
+    prefix = prefix.lower()
+    if ':' in prefix or not prefix:
+        raise ValueError('Invalid prefix {0!r} for namespace {1}'.format(
+            prefix, namespace_uri))
+    current = prefix_for(namespace_uri)
+    if current is not None and current != prefix:
+        raise ValueError('Namespace {0} already has prefix {1}'.format(
+            namespace_uri, current))
+    if current is None:
+        _added[namespace_uri] = prefix
+        _prefixes.setdefault(prefix, set()).add(namespace_uri)
+
+
+def remove_namespace(namespace_uri):
+    """ Remove a namespace added with `add_namespace`
+
+        Built-in namespaces can't be removed.
+
+        Parameters:
+            namespace_uri - the namespace URI
+    """
+    prefix = _added.pop(namespace_uri, None)
+    if prefix is not None:
+        _prefixes[prefix].discard(namespace_uri)
+        if not _prefixes[prefix]:
+            del _prefixes[prefix]
+
+
+def added_namespaces():
+    """ Return a read-only view of the namespaces added to the table
+    """
+    return MappingProxyType(_added)
+
+
+def load_namespaces(filename):
+    """ Add the namespaces stored in a JSON file to the table
+
+        Parameters:
+            filename - the path to a JSON file containing a mapping of
+                namespace URIs to prefixes, as written by `save_namespaces`
+    """
+    with open(filename, 'r') as fhandle:
+        namespaces = json.load(fhandle)
+    for namespace_uri, prefix in namespaces.items():
+        add_namespace(namespace_uri, prefix)
+
+
+def save_namespaces(filename):
+    """ Save the namespaces added to the table to a JSON file
+
+        Only namespaces added with `add_namespace` or `load_namespaces` are
+        saved, since the built-in ones are always available.
+
+        Parameters:
+            filename - the path to write to
+    """
+    with open(filename, 'w') as fhandle:
+        json.dump(_added, fhandle, indent=4, sort_keys=True)
@@ -13,14 +13,20 @@ from __future__ import print_function, division
 
 from .registry import XJsonRegistry
 from .xjson_namespace import XJSON_NAMESPACE
-from .json_target import JSONLDTarget
+from .json_target import JSONLDTarget, feed_parser
+from .gml import FeatureTarget
 from .json_context import JSONLDContext
+from .digest import digest as content_digest, content_ident
+from . import binary, jsonld, merge
 
 import json
 from lxml.etree import XML, XMLParser
 import io
+import logging
 import uuid
 
+LOGGER = logging.getLogger('pysiss')
+
 
 def qname_str(qname):
     """ Represent a QName in a namespace:localname string
@@ -103,20 +109,28 @@ class XJson(object):
         Queries (XPath, or ElementPath) are passed through to the underlying
         element, with a few nicities to deal with XML namespaces.
 
+        Instances are identified by the content of the document - unless an
+        ident is given, it is a UUID derived from the digest of the body and
+        context, so identical documents get the same ident. The digest is
+        fixed the first time it is used, so it won't follow changes made to
+        the body afterwards.
+
         Parameters:
-            body - a dict containing the JSON-LD body
+            body - a dict containing the JSON-LD body, or a JSON string
+            ident - an identifier for the document. Optional, defaults to
+                a UUID based on the content digest.
             context - a XJsonContext containing the JSON-LD context
+            digest - the content digest of the body and context, if it has
+                already been computed (see `xjson.digest`). Optional.
     """
 
     registry = XJsonRegistry()
+    truncated = False
 
-    def __init__(self, body, ident=None, context=None):
+    def __init__(self, body, ident=None, context=None, digest=None):
         super(XJson, self).__init__()
-        self.ident = self.uuid = \
-            uuid.uuid5(uuid.NAMESPACE_DNS,
-                       XJSON_NAMESPACE + 'xjson')
         if isinstance(body, str):
-            json.loads(body)
+            self.body = json.loads(body)
         else:
             self.body = body
         if context is not None:
@@ -126,13 +140,35 @@ class XJson(object):
                 self.context = context
         else:
             self.context = JSONLDContext()
+        self._digest = digest
+        self._ident = ident
+
+    @property
+    def digest(self):
+        """ The content digest of the body and context, as a hex string
+
+            This is computed the first time it is needed.
+        """
+        if self._digest is None:
+            self._digest = content_digest(self.body, self.context)
+        return self._digest
+
+    @property
+    def ident(self):
+        """ The identifier for this document
+        """
+        if self._ident is None:
+            self._ident = content_ident(self.digest)
+        return self._ident
+
+    uuid = ident
 
     def __str__(self):
         """ String representation
         """
         template = '{{\n{0},\n{1}\n}}'
         cstr = '\n'.join('    ' + l for l in str(self.context).splitlines())
-        bstr = json.dumps(self.body, indent=4)
+        bstr = json.dumps(self.body, indent=4, default=binary.materialize)
         bstr = '\n'.join(bstr.splitlines()[1:-1])
         return template.format(cstr, bstr)
 
@@ -149,13 +185,35 @@ class XJson(object):
         # return self.query(query)
 
     @classmethod
-    def from_xml(cls, xml, namespace_handling=None):
+    def from_xml(cls, xml, namespace_handling=None, limits=None, plan=None,
+                 interner=None, limit=None, max_bytes=None):
         """ Read some XML containing a xjson record
 
             Parameters:
                 xml - either a handle to an open xml file, or a string of XML
                 namespace_handling - how to handle XML namespaces. Optional,
                 defaults to 'shorten'.
+                limits - a ConversionLimits instance to bound the resources
+                    used by the conversion. Optional, if None then the
+                    document is converted in full. If the limits truncate
+                    the document, then the `truncated` attribute of the
+                    returned instance is True.
+                plan - a ConversionPlan giving the expected shape of each
+                    tag, which speeds up conversion of documents that match
+                    it. Optional.
+                interner - a SubtreeInterner used to share identical
+                    subtrees, within this document and with any other
+                    documents converted with the same interner. Shared
+                    subtrees are immutable. Optional.
+                limit - the maximum number of features to convert from a
+                    feature collection. Parsing stops once this many
+                    features have been converted. Optional.
+                max_bytes - the maximum number of bytes of XML to parse.
+                    Optional.
+
+                If parsing stops early because of limit or max_bytes then
+                the rest of the document is never read, any open elements
+                are closed off and the result is marked as truncated.
 
             Returns:
                 the new XJson instance containing the record
@@ -172,10 +230,137 @@ class XJson(object):
                 xml = io.BytesIO(xml)
 
         # Parse xjson using JSON mapping
-        parser = XMLParser(
-            target=JSONLDTarget(namespace_handling=namespace_handling))
-        body, context = XML(xml.read(), parser)
-        return cls(body=body, context=context)
+        options = limits.parser_options() if limits is not None else {}
+        if limit is None and max_bytes is None:
+            target = JSONLDTarget(namespace_handling=namespace_handling,
+                                  limits=limits, plan=plan, interner=interner)
+            parser = XMLParser(target=target, **options)
+            body, context = XML(xml.read(), parser)
+        else:
+            # Feed the parser a bit at a time so we can stop early
+            target = FeatureTarget(namespace_handling=namespace_handling,
+                                   limits=limits, plan=plan,
+                                   interner=interner, limit=limit)
+            parser = XMLParser(target=target, **options)
+            body, context = feed_parser(parser, target, xml,
+                                        max_bytes=max_bytes)
+            if body is None:
+                raise ValueError('No elements found in the first {0} bytes '
+                                 'of the document'.format(max_bytes))
+        result = cls(body=body, context=context)
+        if target.truncated:
+            # Previews are expected to be cut short, so only warn for limits
+            if limit is None and max_bytes is None:
+                LOGGER.warning('Document exceeded conversion limits {0}, '
+                               'result has been truncated'.format(limits))
+            result.truncated = True
+        return result
+
+    def expand(self, fhandle=None):
+        """ Return the body with every key expanded to a full IRI
+
+            Parameters:
+                fhandle - a file handle (opened for text) to stream the
+                    expanded body to as JSON. Optional, if None then the
+                    expanded body is returned.
+
+            Returns:
+                the expanded body, or None if it was written to fhandle
+        """
+        return jsonld.expand(self.body, self.context, fhandle=fhandle)
+
+    def compact(self, context, fhandle=None):
+        """ Return the body with keys compacted using another context
+
+            The body is expanded in memory first, and then compacted.
+
+            Parameters:
+                context - the JSONLDContext to compact with, or a
+                    dictionary mapping terms and prefixes to IRIs
+                fhandle - a file handle (opened for text) to stream the
+                    compacted body to as JSON. Optional, if None then the
+                    compacted body is returned.
+
+            Returns:
+                the compacted body, or None if it was written to fhandle
+        """
+        return jsonld.compact(self.expand(), context, fhandle=fhandle)
+
+    @classmethod
+    def merge(cls, documents, namespace_handling=None):
+        """ Merge converted feature collections into a single collection
+
+            Members are concatenated in order, and the root element and
+            any other content come from the first document. Contexts and
+            namespace maps are unioned - if a prefix means a different
+            namespace in a later document, that namespace gets a new prefix
+            and the keys in that document are rewritten. Documents which
+            don't need renaming are merged without copying. See
+            `xjson.merge` for details.
+
+            Parameters:
+                documents - an iterable of XJson instances, e.g. pages from
+                    a harvester
+                namespace_handling - the namespace handling used for the
+                    documents. Optional, taken from the first document if
+                    not given.
+
+            Returns:
+                the new XJson instance. It is truncated if any of the
+                documents were.
+        """
+        truncated = []
+
+        def _parts():
+            for document in documents:
+                if document.truncated:
+                    truncated.append(document)
+                yield document.body, document.context
+
+        body, context = merge.merge_documents(
+            _parts(), namespace_handling=namespace_handling)
+        result = cls(body=body, context=context)
+        if truncated:
+            result.truncated = True
+        return result
+
+    def to_bytes(self):
+        """ Serialize this instance to the compact binary format
+
+            See `xjson.binary` for a description of the format.
+
+            Returns:
+                a bytes instance containing the body, context and ident
+        """
+        return binary.encode(self.body, self.context, self._ident)
+
+    @classmethod
+    def from_bytes(cls, data, lazy=False):
+        """ Read an instance from the compact binary format
+
+            Parameters:
+                data - a bytes-like object (bytes, mmap, memoryview...)
+                    generated by `to_bytes`
+                lazy - if True, then subtrees in the body are only decoded
+                    when they are accessed, which is much quicker than
+                    json.loads when loading lots of documents (e.g. warming
+                    up the registry). The lazy body is a read-only
+                    LazyDict, which the helpers that walk converted
+                    documents (merge, spatial indexes, render...) don't
+                    accept - call its `materialize` method first. Optional,
+                    defaults to False, which decodes the whole body into
+                    ordinary dicts and lists (slower than json.loads).
+
+            Returns:
+                the new XJson instance
+        """
+        body, context, ident = binary.decode(data, lazy=lazy)
+        if ident is not None:
+            try:
+                ident = uuid.UUID(ident)
+            except ValueError:
+                pass
+        return cls(body=body, context=context, ident=ident)
 
     def register(self):
         """ Register this xjson instance with the XJson registry
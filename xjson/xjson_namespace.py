@@ -6,7 +6,12 @@
     description: Defines a namespace for xjson.xjson
 """
 
-from ._version import __version__
+try:
+    from ._version import __version__
+except ImportError:
+    # _version.py is generated by `setup.py update_version`, so it's missing
+    # when running from a plain checkout
+    __version__ = 'unknown'
 
 # Namespace for xjson objects in XML
 XJSON_NAMESPACE = \